@@ -14,3 +14,11 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'chatbot.settings')
 
 application = get_asgi_application()
+
+# Sin esto el modelo (y sklearn) se carga con el primer request
+from django.conf import settings  # noqa: E402
+
+if getattr(settings, "NLP_WARMUP_ON_BOOT", True):
+    from core.nlp import warm_up
+
+    warm_up()
@@ -71,6 +71,7 @@ USE_TZ = True
 
 
 MIDDLEWARE = [
+    "core.timing.ServerTimingMiddleware",  # solo se instala con NLP_SERVER_TIMING=1
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -146,4 +147,89 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:3000",
 ]
 
-CORS_ALLOW_CREDENTIALS = True
\ No newline at end of file
+CORS_ALLOW_CREDENTIALS = True
+
+# NLP: registro de modelos (ml/registry). El backend revisa ml/registry/CURRENT
+# cada NLP_MODEL_POLL_SECONDS y cambia de modelo sin reiniciar (0 = desactivado).
+NLP_MODEL_POLL_SECONDS = float(os.getenv("NLP_MODEL_POLL_SECONDS", "30"))
+
+# Máximo de consultas por request en /api/nlp/intent/batch/
+NLP_BATCH_MAX_QUERIES = int(os.getenv("NLP_BATCH_MAX_QUERIES", "100"))
+
+# Hilos dedicados a la inferencia en /api/nlp/intent/async/ (ASGI)
+NLP_INFERENCE_THREADS = int(os.getenv("NLP_INFERENCE_THREADS", "2"))
+
+# Render JSON de la API de core con orjson (o json compacto si no está
+# instalado) y respuestas de catálogo pre-codificadas. 0 = renderers de DRF.
+NLP_FAST_JSON = os.getenv("NLP_FAST_JSON", "1") == "1"
+
+# Segundos que el proxy/navegador puede reusar /api/nlp/catalog/<intent>/ sin revalidar
+NLP_CATALOG_MAX_AGE = int(os.getenv("NLP_CATALOG_MAX_AGE", "300"))
+
+# Control de admisión de la inferencia (core/admission.py): cuántas requests
+# predicen a la vez, cuántas pueden esperar y cuánto como máximo.
+NLP_MAX_CONCURRENT_INFERENCE = int(os.getenv("NLP_MAX_CONCURRENT_INFERENCE", "4"))
+NLP_ADMISSION_QUEUE = int(os.getenv("NLP_ADMISSION_QUEUE", "32"))
+NLP_ADMISSION_DEADLINE_MS = float(os.getenv("NLP_ADMISSION_DEADLINE_MS", "1500"))
+# Con la cola llena: "degrade" (respuesta por palabras clave) o "reject" (503)
+NLP_SHED_MODE = os.getenv("NLP_SHED_MODE", "degrade")
+NLP_RETRY_AFTER_SECONDS = int(os.getenv("NLP_RETRY_AFTER_SECONDS", "1"))
+
+# Contexto de conversación (core/sessions.py), por conversation_id del cliente.
+# "memory" = LRU en el proceso; "cache" = CACHES[NLP_SESSION_CACHE_ALIAS] de Django.
+NLP_SESSION_BACKEND = os.getenv("NLP_SESSION_BACKEND", "memory")
+NLP_SESSION_CACHE_ALIAS = os.getenv("NLP_SESSION_CACHE_ALIAS", "default")
+NLP_SESSION_TTL_SECONDS = int(os.getenv("NLP_SESSION_TTL_SECONDS", "1800"))
+NLP_SESSION_MAX = int(os.getenv("NLP_SESSION_MAX", "10000"))
+
+# Log de fallbacks (core/fallback_log.py): escritura por lotes en segundo plano
+# y rotación a .gz por tamaño o por día.
+FALLBACK_LOG_BATCH_SIZE = int(os.getenv("FALLBACK_LOG_BATCH_SIZE", "200"))
+FALLBACK_LOG_FLUSH_SECONDS = float(os.getenv("FALLBACK_LOG_FLUSH_SECONDS", "1.0"))
+FALLBACK_LOG_QUEUE_SIZE = int(os.getenv("FALLBACK_LOG_QUEUE_SIZE", "10000"))
+FALLBACK_LOG_MAX_BYTES = int(os.getenv("FALLBACK_LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+FALLBACK_LOG_ROTATE_DAILY = os.getenv("FALLBACK_LOG_ROTATE_DAILY", "1") == "1"
+
+# Telemetría muestreada de /api/nlp/intent/ (core/telemetry.py). 0 = apagada.
+NLP_TELEMETRY_SAMPLE_RATE = float(os.getenv("NLP_TELEMETRY_SAMPLE_RATE", "0.01"))
+NLP_TELEMETRY_DIR = os.getenv("NLP_TELEMETRY_DIR", str(BASE_DIR / "telemetry"))
+NLP_TELEMETRY_FLUSH_ROWS = int(os.getenv("NLP_TELEMETRY_FLUSH_ROWS", "5000"))
+NLP_TELEMETRY_FLUSH_SECONDS = float(os.getenv("NLP_TELEMETRY_FLUSH_SECONDS", "60"))
+
+# Tiempos por etapa con cabecera Server-Timing e histogramas en /api/nlp/stats/
+# (core/timing.py). Apagado no agrega nada al request.
+NLP_SERVER_TIMING = os.getenv("NLP_SERVER_TIMING", "0") == "1"
+
+# Métricas Prometheus en /api/metrics/ (core/metrics.py). Cada worker escribe
+# en archivos de NLP_METRICS_DIR; vaciar la carpeta al desplegar.
+NLP_METRICS = os.getenv("NLP_METRICS", "1") == "1"
+NLP_METRICS_DIR = os.getenv("NLP_METRICS_DIR", str(BASE_DIR / "metrics"))
+
+# Perfilado de un request con la cabecera X-NLP-Profile (core/profiling.py):
+# staff o token firmado de `manage.py profile_intent --token`. Apagado salvo
+# que se pida; los tokens se firman con NLP_PROFILE_SECRET (no con
+# SECRET_KEY, que está en el repo) y sin él solo vale la cabecera de staff.
+NLP_PROFILE_ENABLED = os.getenv("NLP_PROFILE_ENABLED", "0") == "1"
+NLP_PROFILE_SECRET = os.getenv("NLP_PROFILE_SECRET", "")
+NLP_PROFILE_DIR = os.getenv("NLP_PROFILE_DIR", str(BASE_DIR / "profiles"))
+NLP_PROFILE_TOKEN_MAX_AGE = int(os.getenv("NLP_PROFILE_TOKEN_MAX_AGE", "300"))
+# Perfiles que se guardan como máximo; se borran los más viejos (0 = sin tope)
+NLP_PROFILE_MAX_FILES = int(os.getenv("NLP_PROFILE_MAX_FILES", "200"))
+
+# Carpeta base de los fixtures que lee core/data.py (<dir>/<app>/fixtures/).
+# Vacío = los del proyecto; p. ej. scale_fixtures/100k de `manage.py gen_fixtures`.
+NLP_DATA_DIR = os.getenv("NLP_DATA_DIR", "")
+
+# Captura anónima de /api/nlp/intent/ para `manage.py replay_capture`
+# (core/capture.py). Solo cuando se va a medir capacidad.
+NLP_CAPTURE = os.getenv("NLP_CAPTURE", "0") == "1"
+NLP_CAPTURE_PATH = os.getenv("NLP_CAPTURE_PATH", str(BASE_DIR / "capture" / "intent_capture.jsonl"))
+
+# Cargar fixtures y modelo al arrancar el worker (wsgi.py/asgi.py) en vez de
+# con el primer request (~2.4 s). runserver también lo hace; el resto de
+# manage.py no. NLP_WARMUP_ON_BOOT=0 solo para arrancar rápido en desarrollo.
+NLP_WARMUP_ON_BOOT = os.getenv("NLP_WARMUP_ON_BOOT", "1") == "1"
+
+# Presupuesto de `python -X importtime` para `manage.py check` y la URLconf
+# (core/tests.py, ImportTimeBudgetTests).
+NLP_IMPORT_BUDGET_MS = float(os.getenv("NLP_IMPORT_BUDGET_MS", "1500"))
@@ -0,0 +1,193 @@
+# core/admission.py
+"""
+Control de admisión para el camino de inferencia (neurona + búsquedas).
+
+Como mucho `max_concurrent` requests predicen a la vez; hasta `max_queue`
+esperan en una cola FIFO y el resto se descarta de inmediato. Cada request
+trae un plazo: si con la cola actual no alcanzaría a entrar a tiempo (según
+el tiempo de servicio promedio), se descarta sin esperar.
+
+La misma cola sirve a hilos (vistas sync/DRF) y a corutinas (vista async):
+al liberar un lugar se le pasa directo al primero que espera.
+
+    try:
+        with ADMISSION.admit():
+            pred = predecir_intencion(q)
+    except Overloaded as e:
+        ...  # e.reason: "queue_full" | "deadline"
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+from django.conf import settings
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class _ThreadWaiter:
+    __slots__ = ("event", "granted")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+    def wake(self):
+        self.event.set()
+
+
+class _AsyncWaiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+    def wake(self):
+        self.loop.call_soon_threadsafe(self._set)
+
+    def _set(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class AdmissionController:
+    # Peso del último request en el promedio móvil del tiempo de servicio
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, max_concurrent: int, max_queue: int, deadline_s: float):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.deadline_s = deadline_s
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters = deque()
+        self._service_s = 0.0
+        self._counts = {
+            "admitted": 0, "queued": 0, "shed_queue_full": 0, "shed_deadline": 0,
+            "degraded": 0, "rejected": 0,
+        }
+
+    # ── cola ────────────────────────────────────
+    def _try_enter(self, deadline_s: float, make_waiter):
+        """
+        Bajo el lock: entra directo (None), encola (waiter) o lanza Overloaded.
+        """
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            self._counts["admitted"] += 1
+            return None
+        if len(self._waiters) >= self.max_queue:
+            self._counts["shed_queue_full"] += 1
+            raise Overloaded("queue_full")
+        # Espera estimada: los que están delante repartidos entre los lugares
+        espera = (len(self._waiters) + 1) / self.max_concurrent * self._service_s
+        if espera > deadline_s:
+            self._counts["shed_deadline"] += 1
+            raise Overloaded("deadline")
+        waiter = make_waiter()
+        self._waiters.append(waiter)
+        self._counts["queued"] += 1
+        return waiter
+
+    def _withdraw(self, waiter, reason: str = None) -> bool:
+        """
+        El que espera se rinde (plazo vencido o request cancelado).
+        Devuelve True si el lugar le llegó justo antes.
+        """
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            if reason:
+                self._counts[reason] += 1
+        return False
+
+    def _release(self, started: float | None):
+        elapsed = time.perf_counter() - started if started is not None else None
+        with self._lock:
+            if elapsed is None:
+                pass  # lugar devuelto sin usar: no cuenta para el promedio
+            elif self._service_s:
+                self._service_s += self.EWMA_ALPHA * (elapsed - self._service_s)
+            else:
+                self._service_s = elapsed
+            if self._waiters:
+                # El lugar pasa directo al siguiente: _active no cambia
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                self._counts["admitted"] += 1
+                waiter.wake()
+            else:
+                self._active -= 1
+
+    # ── API ─────────────────────────────────────
+    @contextmanager
+    def admit(self, deadline_s: float | None = None):
+        deadline_s = self.deadline_s if deadline_s is None else deadline_s
+        with self._lock:
+            waiter = self._try_enter(deadline_s, _ThreadWaiter)
+        if waiter is not None and not waiter.event.wait(deadline_s):
+            if not self._withdraw(waiter, "shed_deadline"):
+                raise Overloaded("deadline")
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(started)
+
+    @asynccontextmanager
+    async def admit_async(self, deadline_s: float | None = None):
+        deadline_s = self.deadline_s if deadline_s is None else deadline_s
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            waiter = self._try_enter(deadline_s, lambda: _AsyncWaiter(loop))
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), deadline_s)
+            except asyncio.TimeoutError:
+                if not self._withdraw(waiter, "shed_deadline"):
+                    raise Overloaded("deadline")
+            except asyncio.CancelledError:
+                # El cliente se fue: si el lugar ya era nuestro, se devuelve
+                if self._withdraw(waiter):
+                    self._release(None)
+                raise
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(started)
+
+    def record(self, outcome: str):
+        """
+        Qué hizo la vista con un request descartado: "degraded" o "rejected".
+        """
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "deadline_ms": round(self.deadline_s * 1000, 1),
+                "active": self._active,
+                "queue_depth": len(self._waiters),
+                "avg_service_ms": round(self._service_s * 1000, 3),
+                **self._counts,
+            }
+
+
+ADMISSION = AdmissionController(
+    max_concurrent=getattr(settings, "NLP_MAX_CONCURRENT_INFERENCE", 4),
+    max_queue=getattr(settings, "NLP_ADMISSION_QUEUE", 32),
+    deadline_s=getattr(settings, "NLP_ADMISSION_DEADLINE_MS", 1500) / 1000.0,
+)
@@ -0,0 +1,477 @@
+# core/bulkload.py
+"""
+Carga masiva de fixtures (lo usa `manage.py bulk_load`).
+
+loaddata arma la lista entera en memoria y guarda fila por fila. Acá:
+
+- JSONArrayReader lee la lista del fixture objeto por objeto, en bloques;
+  los campos binarios (la imagen de un horario) se decodifican de base64 a
+  medida que se leen, sin tener el texto completo en memoria
+- los objetos se juntan en lotes por modelo (batch_size, o max_batch_bytes
+  para los que traen imágenes) y cada lote es: una consulta para ver cuáles
+  ya existen por clave natural, bulk_update de esos y bulk_create (o COPY en
+  PostgreSQL con psycopg 3) del resto, en una transacción
+- idempotente: la clave natural (carnet, tipo de beca, slug,
+  group_code + periodo, ...) decide si se crea o se actualiza, así que
+  correrlo dos veces deja lo mismo
+- las FK del fixture apuntan a pks del fixture: se traducen a ids de la base
+  con lo que ya se cargó (o, si ese modelo no se pidió, con una pasada que
+  solo resuelve claves sin escribir; sin su archivo, ids_from_db)
+"""
+import binascii
+import json
+import re
+import time
+from array import array
+
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+_WS = frozenset(" \t\r\n")
+
+
+# ─────────────────────────────────────────────
+# Lectura en streaming
+# ─────────────────────────────────────────────
+
+class _B64Stream:
+    """
+    base64 que llega por pedazos (texto crudo de un string JSON).
+    """
+
+    def __init__(self):
+        self.pendiente = ""
+        self.partes = []
+        self.size = 0
+
+    def feed(self, texto: str):
+        texto = self.pendiente + texto
+        corte = ""
+        if texto.endswith("\\"):
+            # Un escape partido entre dos bloques
+            texto, corte = texto[:-1], "\\"
+        texto = texto.replace("\\/", "/").replace("\\n", "").replace("\\r", "")
+        util = len(texto) - len(texto) % 4
+        if util:
+            parte = binascii.a2b_base64(texto[:util])
+            self.partes.append(parte)
+            self.size += len(parte)
+        self.pendiente = texto[util:] + corte
+
+    def finish(self) -> bytes:
+        if self.pendiente.strip():
+            raise ValueError("base64 con largo inválido")
+        return b"".join(self.partes)
+
+
+def _set_blob(obj, name: str, data=None) -> bool:
+    """
+    Pone `data` donde quedó el null del blob; sin `data`, decodifica el
+    string base64 que raw_decode ya leyó entero (blobs chicos).
+    """
+    if isinstance(obj, dict):
+        if name in obj and (obj[name] is None if data is not None else isinstance(obj[name], str)):
+            obj[name] = data if data is not None else binascii.a2b_base64(obj[name])
+            return True
+        return any(_set_blob(v, name, data) for v in obj.values() if isinstance(v, (dict, list)))
+    if isinstance(obj, list):
+        return any(_set_blob(v, name, data) for v in obj)
+    return False
+
+
+class JSONArrayReader:
+    """
+    Itera los elementos de una lista JSON desde un archivo de texto.
+
+    Los strings de `blob_fields` se devuelven ya decodificados (bytes): el
+    texto base64 se consume por bloques y en el buffer queda un null.
+    """
+
+    def __init__(self, f, blob_fields=(), chunk_chars: int = 1 << 16):
+        self.f = f
+        self.chunk_chars = chunk_chars
+        self.buf = ""
+        self.pos = 0
+        self.chars = 0
+        self._decoder = json.JSONDecoder()
+        self.blob_fields = tuple(blob_fields)
+        self._blob_re = re.compile(
+            r'(?<!\\)"(%s)"\s*:\s*"' % "|".join(map(re.escape, blob_fields))
+        ) if blob_fields else None
+
+    def _fill(self) -> bool:
+        data = self.f.read(self.chunk_chars)
+        if not data:
+            return False
+        self.chars += len(data)
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def _peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return None
+
+    def __iter__(self):
+        if self._peek() != "[":
+            raise ValueError("el fixture no es una lista JSON")
+        self.pos += 1
+        if self._peek() == "]":
+            return
+        while True:
+            yield self._element()
+            c = self._peek()
+            if c == ",":
+                self.pos += 1
+            elif c == "]":
+                return
+            else:
+                raise ValueError(f"JSON inválido cerca de {self.buf[self.pos:self.pos + 40]!r}")
+
+    def _element(self):
+        blobs = {}
+        self._peek()  # raw_decode no salta espacios
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Incompleto: o hay un blob que sacar del buffer, o falta leer
+                m = self._blob_re.search(self.buf, self.pos) if self._blob_re else None
+                if m:
+                    blobs[m.group(1)] = self._stream_blob(m)
+                elif not self._fill():
+                    raise
+                continue
+            self.pos = end
+            for name in self.blob_fields:
+                _set_blob(obj, name, blobs.get(name))
+            return obj
+
+    def _stream_blob(self, m) -> bytes:
+        antes = self.buf[self.pos:m.start()]
+        self.buf, self.pos = self.buf[m.end():], 0
+        stream = _B64Stream()
+        while True:
+            fin = self.buf.find('"')
+            if fin >= 0:
+                stream.feed(self.buf[:fin])
+                resto = self.buf[fin + 1:]
+                break
+            stream.feed(self.buf)
+            self.buf = ""
+            if not self._fill():
+                raise ValueError(f"{m.group(1)} sin terminar al final del archivo")
+        self.buf, self.pos = f'{antes}"{m.group(1)}": null{resto}', 0
+        return stream.finish()
+
+
+# ─────────────────────────────────────────────
+# Modelos
+# ─────────────────────────────────────────────
+
+class Spec:
+    """
+    Cómo se carga un modelo: clave natural (attnames), FKs del fixture
+    (campo -> label del modelo referenciado) y campos binarios.
+    """
+
+    def __init__(self, label, key, refs=None, blob_fields=(), normalize=None):
+        self.label = label
+        self.key = tuple(key)
+        self.refs = refs or {}
+        self.blob_fields = tuple(blob_fields)
+        self.normalize = normalize
+
+    @property
+    def model(self):
+        return apps.get_model(self.label)
+
+
+def _norm_horario(values):
+    if values.get("group_code"):
+        # Lo mismo que Horario.save(), que bulk_create no llama
+        values["group_code"] = values["group_code"].strip().upper().replace(" ", "")
+
+
+def _norm_tramite(values):
+    if not values.get("slug"):
+        values["slug"] = slugify(values.get("titulo") or "")
+
+
+# En orden de dependencias
+SPECS = {s.label: s for s in (
+    Spec("categorias.categoria", ["nombre"]),
+    Spec("becas.beca", ["tipo"], refs={"categoria": "categorias.categoria"}),
+    Spec("students.student", ["carnet"]),
+    Spec("students.clase", ["codigo"]),
+    Spec("students.enrollment", ["student_id", "clase_id", "periodo"],
+         refs={"student": "students.student", "clase": "students.clase"}),
+    Spec("becas.asignacionbeca", ["student_id", "beca_id", "periodo"],
+         refs={"student": "students.student", "beca": "becas.beca"}),
+    Spec("horarios.horario", ["group_code", "periodo"], blob_fields=["imagen"], normalize=_norm_horario),
+    Spec("tramites.tramite", ["slug"], refs={"categoria": "categorias.categoria"}, normalize=_norm_tramite),
+)}
+
+# Modelos a los que otros apuntan: de estos se guarda pk del fixture -> id
+REFERENCED = {label for s in SPECS.values() for label in s.refs.values()}
+
+# Qué archivo trae cada modelo (relativo a la carpeta de datos)
+FIXTURE_OF = {
+    "categorias.categoria": "categorias/fixtures/categorias.json",
+    "becas.beca": "becas/fixtures/becas.json",
+    "students.student": "students/fixtures/students.json",
+    "students.clase": "students/fixtures/students.json",
+    "students.enrollment": "students/fixtures/students.json",
+    "becas.asignacionbeca": "becas/fixtures/asignaciones_becas.json",
+    "horarios.horario": "horarios/fixtures/horarios.json",
+    "tramites.tramite": "tramites/fixtures/tramites.json",
+}
+
+
+def dependencies(labels):
+    """
+    Los modelos referenciados (transitivamente) por `labels`.
+    """
+    out, pendientes = set(), list(labels)
+    while pendientes:
+        for ref in SPECS[pendientes.pop()].refs.values():
+            if ref not in out:
+                out.add(ref)
+                pendientes.append(ref)
+    return out
+
+
+class IdMap:
+    """
+    pk del fixture -> id en la base. Un array mientras los pk sean densos.
+    """
+    DENSE_LIMIT = 20_000_000
+
+    def __init__(self):
+        self.dense = array("q")
+        self.sparse = {}
+
+    def __setitem__(self, pk, id_):
+        if isinstance(pk, int) and 0 <= pk < self.DENSE_LIMIT:
+            if pk >= len(self.dense):
+                self.dense.extend([-1] * (pk + 1 - len(self.dense)))
+            self.dense[pk] = id_
+        else:
+            self.sparse[pk] = id_
+
+    def get(self, pk):
+        if isinstance(pk, int) and 0 <= pk < len(self.dense):
+            v = self.dense[pk]
+            return None if v < 0 else v
+        return self.sparse.get(pk)
+
+    def __len__(self):
+        return sum(1 for v in self.dense if v >= 0) + len(self.sparse)
+
+
+def ids_from_db(label: str, ids: IdMap) -> int:
+    """
+    Sin fixture del que resolver claves: cada fila que ya está en la base
+    se toma con su propio pk (como la deja loaddata). Devuelve cuántas.
+    """
+    n = 0
+    for pk in SPECS[label].model.objects.values_list("pk", flat=True).iterator():
+        ids[pk] = pk
+        n += 1
+    return n
+
+
+# ─────────────────────────────────────────────
+# Escritura
+# ─────────────────────────────────────────────
+
+def can_copy() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as c:
+        return hasattr(c.cursor, "copy")  # psycopg 3; psycopg2 no tiene cursor.copy()
+
+
+def _existing(model, key, claves, chunk: int = 500) -> dict:
+    """
+    {clave natural: id} de las claves que ya están en la base. De a `chunk`
+    claves por consulta (SQLite limita la cantidad de parámetros).
+    """
+    claves = list(claves)
+    out = {}
+    for i in range(0, len(claves), chunk):
+        parte = set(claves[i:i + chunk])
+        cond = Q()
+        for j, campo in enumerate(key):
+            valores = {k[j] for k in parte}
+            q = Q(**{f"{campo}__in": [v for v in valores if v is not None]})
+            if None in valores:
+                q |= Q(**{f"{campo}__isnull": True})
+            cond &= q
+        # Con clave compuesta el filtro trae de más (producto de los valores): se filtra acá
+        for fila in model.objects.filter(cond).values_list(*key, "pk").iterator():
+            if tuple(fila[:-1]) in parte:
+                out[tuple(fila[:-1])] = fila[-1]
+    return out
+
+
+def _copy(model, objs):
+    campos = [f for f in model._meta.concrete_fields if not f.primary_key]
+    cols = ", ".join(connection.ops.quote_name(f.column) for f in campos)
+    sql = f"COPY {connection.ops.quote_name(model._meta.db_table)} ({cols}) FROM STDIN"
+    with connection.cursor() as c, c.cursor.copy(sql) as cp:
+        for obj in objs:
+            cp.write_row([f.get_db_prep_save(f.pre_save(obj, True), connection) for f in campos])
+
+
+class Loader:
+    """
+    Junta objetos por modelo y los escribe por lotes. `modes`: label ->
+    "write" (crear/actualizar) o "resolve" (solo traducir pk -> id).
+    """
+
+    def __init__(self, modes: dict, batch_size: int = 2000, max_batch_bytes: int = 64 << 20,
+                 use_copy: bool = False, ids: dict | None = None):
+        self.modes = modes
+        self.batch_size = batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self.use_copy = use_copy
+        # Compartido entre archivos: los students de un archivo sirven a las asignaciones de otro
+        self.ids = ids if ids is not None else {label: IdMap() for label in REFERENCED}
+        self.batches = {label: {} for label in modes}  # label -> {clave: (pk, valores)}
+        self.batch_bytes = dict.fromkeys(modes, 0)
+        self.stats = {label: {"rows": 0, "created": 0, "updated": 0, "skipped": 0, "db_s": 0.0} for label in modes}
+        self._fields = {}
+
+    def blob_fields(self):
+        return sorted({f for label in self.modes for f in SPECS[label].blob_fields})
+
+    def _field(self, model, name):
+        k = (model, name)
+        if k not in self._fields:
+            try:
+                self._fields[k] = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                self._fields[k] = None
+        return self._fields[k]
+
+    def add(self, obj: dict):
+        label = (obj.get("model") or "").lower()
+        if label not in self.modes:
+            return
+        spec = SPECS[label]
+        # Primero lo que este modelo referencia, así sus pk ya tienen id
+        for ref in spec.refs.values():
+            if self.batches.get(ref):
+                self.flush(ref)
+
+        stats = self.stats[label]
+        stats["rows"] += 1
+        model = spec.model
+        values, peso = {}, 0
+        for name, value in (obj.get("fields") or {}).items():
+            if name in spec.refs:
+                if value is not None:
+                    value = self.ids[spec.refs[name]].get(value)
+                    if value is None:
+                        stats["skipped"] += 1  # apunta a algo que no se cargó
+                        return
+                values[f"{name}_id"] = value
+                continue
+            field = self._field(model, name)
+            if field is None or not field.concrete:
+                continue
+            value = field.to_python(value)
+            if isinstance(value, (bytes, bytearray, memoryview)):
+                peso += len(value)
+            values[field.attname] = value
+        if spec.normalize:
+            spec.normalize(values)
+
+        clave = tuple(values.get(k) for k in spec.key)
+        self.batches[label][clave] = (obj.get("pk"), values)
+        self.batch_bytes[label] += peso
+        if len(self.batches[label]) >= self.batch_size or self.batch_bytes[label] >= self.max_batch_bytes:
+            self.flush(label)
+
+    def flush(self, label=None):
+        if label is None:
+            for pendiente in self.modes:  # en el orden de SPECS: dependencias primero
+                self.flush(pendiente)
+            return
+        lote = self.batches[label]
+        if not lote:
+            return
+        self.batches[label] = {}
+        self.batch_bytes[label] = 0
+        spec, stats = SPECS[label], self.stats[label]
+        model = spec.model
+        t0 = time.perf_counter()
+
+        existentes = _existing(model, spec.key, lote.keys())
+        if self.modes[label] == "write":
+            crear, actualizar = [], []
+            for clave, (_, values) in lote.items():
+                if clave in existentes:
+                    actualizar.append(model(pk=existentes[clave], **values))
+                else:
+                    crear.append(model(**values))
+            with transaction.atomic():
+                if crear:
+                    if self.use_copy:
+                        _copy(model, crear)
+                    else:
+                        model.objects.bulk_create(crear, batch_size=self.batch_size)
+                if actualizar:
+                    campos = self._update_fields(model, actualizar, lote)
+                    model.objects.bulk_update(actualizar, campos, batch_size=min(self.batch_size, 500))
+            stats["created"] += len(crear)
+            stats["updated"] += len(actualizar)
+            if crear and label in self.ids:
+                # COPY (y SQLite viejo) no devuelven los ids: se buscan
+                existentes.update(_existing(model, spec.key, {c for c in lote if c not in existentes}))
+
+        if label in self.ids:
+            ids = self.ids[label]
+            for clave, (pk, _) in lote.items():
+                if clave in existentes:
+                    ids[pk] = existentes[clave]
+        stats["db_s"] += time.perf_counter() - t0
+
+    def _update_fields(self, model, objs, lote):
+        campos = sorted({k for _, values in lote.values() for k in values})
+        nombres = []
+        for f in model._meta.concrete_fields:
+            if f.primary_key or getattr(f, "auto_now_add", False) or f.name == "created_at":
+                continue
+            if getattr(f, "auto_now", False):
+                # bulk_update no llama a pre_save
+                ahora = timezone.now()
+                for o in objs:
+                    setattr(o, f.attname, ahora)
+                nombres.append(f.name)
+            elif f.attname in campos:
+                nombres.append(f.name)
+        return nombres
+
+
+def load_file(path, loader: Loader):
+    """
+    Pasa todos los objetos del archivo por `loader`. Devuelve (caracteres leídos, segundos).
+    """
+    t0 = time.perf_counter()
+    with open(path, "r", encoding="utf-8") as f:
+        reader = JSONArrayReader(f, blob_fields=loader.blob_fields())
+        for obj in reader:
+            loader.add(obj)
+    loader.flush()
+    return reader.chars, time.perf_counter() - t0
@@ -0,0 +1,151 @@
+# core/capture.py
+"""
+Captura anónima del tráfico real de /api/nlp/intent/ (y /intent/async/)
+para reproducirlo después con `manage.py replay_capture`.
+
+Solo con NLP_CAPTURE=1. Cada request deja una línea JSONL en
+NLP_CAPTURE_PATH con la hora de llegada, la consulta, el código de
+respuesta y la latencia que tuvo. Se escribe con el mismo escritor en
+segundo plano que el log de fallbacks (core/fallback_log.py): por lotes,
+O_APPEND entre workers y rotación a .gz.
+
+Anonimización (HMAC con SECRET_KEY y el día, no se puede revertir):
+- cada carnet de la consulta pasa a uno sintético con cohorte 2090-2099,
+  que nunca existe en los fixtures (core/fixturegen.py no genera esas
+  cohortes, ni en la escala 1m); el mismo carnet da el mismo sintético
+  durante el día, así las conversaciones siguen siendo coherentes
+- "carnets" guarda si el original existía, para que el replay lo cambie
+  por uno real del juego de datos contra el que corre
+- el conversation_id se reemplaza por su hash
+
+El resto del texto se guarda tal cual: si alguien escribe su nombre en la
+consulta, queda en la captura.
+"""
+import atexit
+import gzip
+import hashlib
+import hmac
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+
+from .fallback_log import _Writer
+from .nlp import CARNET_REGEX
+
+ENABLED = getattr(settings, "NLP_CAPTURE", False)
+CAPTURE_PATH = Path(getattr(settings, "NLP_CAPTURE_PATH", Path(settings.BASE_DIR) / "capture" / "intent_capture.jsonl"))
+# Reservadas: core/fixturegen.py las excluye
+SYNTHETIC_COHORTS = range(2090, 2100)
+
+_writer = None
+
+
+def _key() -> bytes:
+    dia = datetime.now(timezone.utc).strftime("%Y%m%d")
+    return hashlib.sha256(f"nlp-capture:{settings.SECRET_KEY}:{dia}".encode("utf-8")).digest()
+
+
+def _digest(key: bytes, value: str) -> int:
+    return int.from_bytes(hmac.new(key, value.encode("utf-8"), hashlib.sha256).digest()[:8], "little")
+
+
+def synthetic_carnet(key: bytes, carnet: str) -> str:
+    h = _digest(key, carnet.upper())
+    cohorte = SYNTHETIC_COHORTS[h % len(SYNTHETIC_COHORTS)]
+    return f"{cohorte}-{h // len(SYNTHETIC_COHORTS) % 10_000:04d}I"
+
+
+def anonymize(q: str, conversation_id=None, key: bytes | None = None):
+    """
+    (consulta con carnets sintéticos, {sintético: existía}, conversation_id anónimo).
+    """
+    from .data import find_student_by_carnet
+
+    key = key or _key()
+    carnets = {}
+
+    def cambiar(m):
+        original = m.group(1).upper()
+        sintetico = synthetic_carnet(key, original)
+        carnets[sintetico] = find_student_by_carnet(original) is not None
+        return sintetico
+
+    anon_q = CARNET_REGEX.sub(cambiar, q)
+    anon_conv = f"c{_digest(key, conversation_id):016x}" if conversation_id else None
+    return anon_q, carnets, anon_conv
+
+
+def record(endpoint: str, q: str, conversation_id, status: int, path: str, t_start: int):
+    """
+    Encola un request ya respondido. `t_start` es el perf_counter_ns del
+    inicio de la vista; la hora de llegada se reconstruye a partir de él.
+    No bloquea ni lanza excepciones.
+    """
+    global _writer
+    try:
+        ahora_ns = time.perf_counter_ns()
+        anon_q, carnets, anon_conv = anonymize(q, conversation_id)
+        entry = {
+            "t": round(time.time() - (ahora_ns - t_start) / 1e9, 6),
+            "endpoint": endpoint,
+            "query": anon_q,
+            "conversation_id": anon_conv,
+            "carnets": carnets,
+            "status": status,
+            "path": path,
+            "latency_ms": round((ahora_ns - t_start) / 1e6, 3),
+        }
+        if _writer is None:
+            _writer = _Writer(CAPTURE_PATH)
+        _writer.put(entry)
+    except Exception:
+        # La captura nunca debe romper la API
+        pass
+
+
+def flush():
+    if _writer is not None:
+        _writer.drain()
+
+
+atexit.register(flush)
+
+
+def capture_files(base: Path = CAPTURE_PATH):
+    """
+    El archivo actual y sus rotaciones (.jsonl y .jsonl.gz).
+    """
+    base = Path(base)
+    if base.is_dir():
+        return sorted(p for p in base.iterdir() if p.name.endswith((".jsonl", ".jsonl.gz")))
+    rotados = sorted(
+        p for p in base.parent.glob(f"{base.stem}.*{base.suffix}*")
+        if p.name.endswith((base.suffix, f"{base.suffix}.gz"))
+    ) if base.parent.is_dir() else []
+    return rotados + ([base] if base.exists() else [])
+
+
+def read_capture(paths):
+    """
+    Todos los registros de `paths`, ordenados por hora de llegada.
+    """
+    registros = []
+    for p in paths:
+        p = Path(p)
+        opener = gzip.open if p.suffix == ".gz" else open
+        with opener(p, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # una línea cortada por un worker que murió
+                if isinstance(entry.get("t"), (int, float)) and isinstance(entry.get("query"), str):
+                    registros.append(entry)
+    registros.sort(key=lambda e: e["t"])
+    return registros
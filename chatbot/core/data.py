@@ -3,22 +3,51 @@
 from django.conf import settings
 from pathlib import Path
 from functools import lru_cache
-import json, re
+import hashlib, json, re
+import time
+
+from . import metrics
+
+# Rutas de fixtures: <DATA_DIR>/<app>/fixtures/<archivo>.json
+# NLP_DATA_DIR permite apuntar a otro juego (p. ej. uno generado con gen_fixtures)
+DATA_DIR = Path(getattr(settings, "NLP_DATA_DIR", None) or settings.BASE_DIR)
+FIXTURE_FILES = {
+    "categorias": ("categorias", "categorias.json"),
+    "becas": ("becas", "becas.json"),
+    "students": ("students", "students.json"),
+    "asignaciones": ("becas", "asignaciones_becas.json"),
+    "horarios": ("horarios", "horarios.json"),
+    "tramites": ("tramites", "tramites.json"),
+}
+
+
+def fixture_path(nombre: str, base_dir=None) -> Path:
+    app, archivo = FIXTURE_FILES[nombre]
+    return Path(base_dir or DATA_DIR) / app / "fixtures" / archivo
+
 
-# Rutas de fixtures
 FIXTURE_CANDIDATES = [
-    Path(settings.BASE_DIR) / "becas" / "fixtures" / "becas.json",
+    fixture_path("becas"),
 ]
-TRAMITES_FIXTURE = Path(settings.BASE_DIR) / "tramites" / "fixtures" / "tramites.json"
+TRAMITES_FIXTURE = fixture_path("tramites")
+
+
+STUDENTS_FIXTURE = fixture_path("students")
+ASIG_FIXTURE     = fixture_path("asignaciones")
+HORARIOS_FIXTURE = fixture_path("horarios")
+
+DATA_FIXTURES = (*FIXTURE_CANDIDATES, STUDENTS_FIXTURE, ASIG_FIXTURE, HORARIOS_FIXTURE, TRAMITES_FIXTURE)
 
 
-STUDENTS_FIXTURE = Path(settings.BASE_DIR) / "students" / "fixtures" / "students.json"
-ASIG_FIXTURE     = Path(settings.BASE_DIR) / "becas" / "fixtures" / "asignaciones_becas.json"
-HORARIOS_FIXTURE = Path(settings.BASE_DIR) / "horarios" / "fixtures" / "horarios.json"
+def _loaded(fixture: str):
+    # Cada lectura de un fixture cuenta como carga del snapshot (core/metrics.py)
+    metrics.DATA_LOADS.labels(fixture).inc()
+    metrics.DATA_LOADED_AT.set(time.time())
 
 
 @lru_cache
 def _load_becas_raw():
+    _loaded("becas")
     for p in FIXTURE_CANDIDATES:
         if p.exists():
             with open(p, "r", encoding="utf-8") as f:
@@ -27,6 +56,7 @@ def _load_becas_raw():
 
 @lru_cache
 def _load_students_raw():
+    _loaded("students")
     if not STUDENTS_FIXTURE.exists():
         return []
     with open(STUDENTS_FIXTURE, "r", encoding="utf-8") as f:
@@ -34,6 +64,7 @@ def _load_students_raw():
 
 @lru_cache
 def _load_asignaciones_raw():
+    _loaded("asignaciones")
     if not ASIG_FIXTURE.exists():
         return []
     with open(ASIG_FIXTURE, "r", encoding="utf-8") as f:
@@ -50,6 +81,12 @@ def get_becas():
     Devuelve: [{"pk": int, "tipo": str, "descripcion": str, "requisitos": [str], "activa": bool, "nombre": str?}]
     Solo incluye las activas (activa=True) si el campo existe (fallback a True si no está).
     """
+    return list(_becas_activas())
+
+
+@lru_cache
+def _becas_activas():
+    # Se arma una sola vez por proceso; get_becas() devuelve una copia de la lista
     raw = _load_becas_raw()
     becas = []
     for it in raw:
@@ -74,6 +111,7 @@ def _load_horarios_raw():
     Carga el fixture horarios/fixtures/horarios.json.
     Si no existe, devuelve lista vacía.
     """
+    _loaded("horarios")
     if not HORARIOS_FIXTURE.exists():
         return []
     with open(HORARIOS_FIXTURE, "r", encoding="utf-8") as f:
@@ -95,18 +133,24 @@ def buscar_beca_por_tipo(query: str):
     return candidatos
 
 
+# Índices: se construyen una vez (la primera consulta) y se comparten entre
+# requests, así buscar por carnet/pk/grupo/slug es un lookup O(1).
+
+@lru_cache
 def _beca_index_by_pk():
     idx = {}
     for it in _load_becas_raw():
         idx[it.get("pk")] = it
     return idx
 
+@lru_cache
 def _student_index_by_pk():
     idx = {}
     for it in _load_students_raw():
         idx[it.get("pk")] = it
     return idx
 
+@lru_cache
 def _student_index_by_carnet():
     idx = {}
     for it in _load_students_raw():
@@ -137,21 +181,26 @@ def _get_beca_nombre_from_pk(beca_pk: int):
 def get_asignaciones():
     return _load_asignaciones_raw()
 
+@lru_cache
+def _asignaciones_index_by_student_pk():
+    """
+    Índice interno: student pk -> [asignaciones], ya ordenadas
+    (activas al frente y, dentro, de pk más reciente a más viejo).
+    """
+    idx = {}
+    for it in get_asignaciones():
+        f = it.get("fields", {}) or {}
+        idx.setdefault(f.get("student"), []).append(it)
+    for asigns in idx.values():
+        asigns.sort(key=lambda it: ((it.get("fields", {}) or {}).get("activo", False), it.get("pk", 0)), reverse=True)
+    return idx
+
 def _asignaciones_de_student_pk(student_pk: int):
     """
     Filtra asignaciones por student pk, y prioriza las activas.
     Ordena por pk descendente como heurística de "más reciente".
     """
-    asigns = []
-    for it in get_asignaciones():
-        f = it.get("fields", {}) or {}
-        if f.get("student") == student_pk:
-            asigns.append(it)
-    if not asigns:
-        return []
-    # primero activas al frente
-    asigns.sort(key=lambda it: ((it.get("fields", {}) or {}).get("activo", False), it.get("pk", 0)), reverse=True)
-    return asigns
+    return list(_asignaciones_index_by_student_pk().get(student_pk, []))
 
 def buscar_asignacion_por_carnet(carnet: str):
     """
@@ -203,6 +252,7 @@ def _load_tramites_raw():
     Carga el fixture tramites/fixtures/tramites.json.
     Si no existe, devuelve lista vacía.
     """
+    _loaded("tramites")
     if not TRAMITES_FIXTURE.exists():
         return []
     with open(TRAMITES_FIXTURE, "r", encoding="utf-8") as f:
@@ -285,6 +335,7 @@ def get_horarios(activos_only: bool = True):
     return resultados
 
 
+@lru_cache
 def _horarios_index_by_group_code():
     """
     Índice interno: group_code -> [items crudos]
@@ -305,11 +356,14 @@ def buscar_horarios_por_group_code(group_code: str):
     """
     if not group_code:
         return []
-    group_code = group_code.strip().upper()
-    idx = _horarios_index_by_group_code()
-    items = idx.get(group_code, [])
+    return list(_horarios_normalizados_por_grupo(group_code.strip().upper()))
+
+
+@lru_cache(maxsize=1024)
+def _horarios_normalizados_por_grupo(group_code: str):
+    items = _horarios_index_by_group_code().get(group_code, [])
     if not items:
-        return []
+        return ()
 
     activos = []
     inactivos = []
@@ -323,7 +377,7 @@ def buscar_horarios_por_group_code(group_code: str):
     activos.sort(key=lambda it: it.get("pk", 0), reverse=True)
     inactivos.sort(key=lambda it: it.get("pk", 0), reverse=True)
 
-    return [_normalize_horario(it) for it in (activos + inactivos)]
+    return tuple(_normalize_horario(it) for it in (activos + inactivos))
 
 
 def get_horario_estudiante(carnet: str):
@@ -477,6 +531,7 @@ def get_tramites(activos_only: bool = True, categoria: int | None = None):
     return tramites
 
 
+@lru_cache
 def _tramites_index_by_slug():
     """
     Índice interno por slug (ej: 'tramite-titulo-universitario', 'protocolo-monografico', etc.).
@@ -565,3 +620,65 @@ def get_tramite_baja_universidad():
     Devuelve el trámite de baja académica.
     """
     return get_tramite_by_slug("baja-universidad")
+
+
+HASH_CHUNK_BYTES = 1 << 20
+
+
+@lru_cache
+def get_data_version() -> str:
+    """
+    Huella del snapshot de datos: sha256 del contenido de los fixtures.
+    Cambia solo si cambian los datos, así que sirve de base para ETags.
+    """
+    h = hashlib.sha256()
+    for p in DATA_FIXTURES:
+        h.update(p.name.encode("utf-8"))
+        if p.exists():
+            # Por bloques: los fixtures a escala (y las imágenes de horarios) pesan cientos de MB
+            with open(p, "rb") as f:
+                for bloque in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+                    h.update(bloque)
+    return h.hexdigest()[:16]
+
+
+def reload():
+    """
+    Olvida los fixtures cargados y todos los índices; la próxima búsqueda
+    vuelve a leer de disco. Las respuestas pre-codificadas de los handlers
+    se limpian aparte (core.handlers.clear_fragments).
+    """
+    for obj in list(globals().values()):
+        if callable(getattr(obj, "cache_clear", None)):
+            obj.cache_clear()
+
+
+def use_data_dir(base_dir):
+    """
+    Cambia el juego de fixtures (benchmarks por escala) y recarga.
+    """
+    global DATA_DIR, FIXTURE_CANDIDATES, TRAMITES_FIXTURE, STUDENTS_FIXTURE
+    global ASIG_FIXTURE, HORARIOS_FIXTURE, DATA_FIXTURES
+    DATA_DIR = Path(base_dir)
+    FIXTURE_CANDIDATES = [fixture_path("becas")]
+    TRAMITES_FIXTURE = fixture_path("tramites")
+    STUDENTS_FIXTURE = fixture_path("students")
+    ASIG_FIXTURE = fixture_path("asignaciones")
+    HORARIOS_FIXTURE = fixture_path("horarios")
+    DATA_FIXTURES = (*FIXTURE_CANDIDATES, STUDENTS_FIXTURE, ASIG_FIXTURE, HORARIOS_FIXTURE, TRAMITES_FIXTURE)
+    reload()
+
+
+def warm_up():
+    """
+    Carga los fixtures y arma todos los índices de una vez, para que las
+    búsquedas siguientes sean solo lookups en memoria (sin disco).
+    """
+    get_data_version()
+    _becas_activas()
+    _beca_index_by_pk()
+    _student_index_by_pk()
+    _student_index_by_carnet()
+    _asignaciones_index_by_student_pk()
+    _horarios_index_by_group_code()
+    _tramites_index_by_slug()
@@ -1,8 +1,36 @@
 # core/fallback_log.py
+"""
+Log de fallbacks en segundo plano.
+
+log_fallback() solo arma el registro y lo deja en una cola; un hilo aparte
+junta los registros y los escribe por lotes:
+
+- un lote se escribe cuando junta FALLBACK_LOG_BATCH_SIZE registros o pasan
+  FALLBACK_LOG_FLUSH_SECONDS, lo que ocurra primero
+- cada lote es UN os.write sobre un descriptor abierto con O_APPEND, así
+  varios workers de gunicorn pueden escribir el mismo archivo sin mezclar
+  líneas
+- al pasar FALLBACK_LOG_MAX_BYTES o cambiar el día, el archivo se renombra
+  (fallback_queries.20250101-120000.jsonl) y se comprime a .gz
+- si la cola se llena se descarta el registro: el request nunca espera
+- al salir el proceso (atexit) se escribe lo que quedó en la cola
+"""
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 from django.conf import settings
+import atexit
+import gzip
 import json
+import os
+import queue
+import shutil
+import threading
+import time
+
+try:
+  import fcntl  # para que un solo worker rote a la vez (no existe en Windows)
+except ImportError:
+  fcntl = None
 
 # Ruta del archivo donde guardaremos los fallbacks
 # Puedes cambiarla si quieres, por ejemplo a una carpeta "logs/"
@@ -10,15 +38,176 @@ DEFAULT_LOG_PATH = Path(settings.BASE_DIR) / "fallback_queries.jsonl"
 
 LOG_PATH = Path(getattr(settings, "FALLBACK_LOG_PATH", DEFAULT_LOG_PATH))
 
+BATCH_SIZE = getattr(settings, "FALLBACK_LOG_BATCH_SIZE", 200)
+FLUSH_SECONDS = getattr(settings, "FALLBACK_LOG_FLUSH_SECONDS", 1.0)
+QUEUE_SIZE = getattr(settings, "FALLBACK_LOG_QUEUE_SIZE", 10000)
+MAX_BYTES = getattr(settings, "FALLBACK_LOG_MAX_BYTES", 50 * 1024 * 1024)
+ROTATE_DAILY = getattr(settings, "FALLBACK_LOG_ROTATE_DAILY", True)
+DRAIN_TIMEOUT = 5.0
+COMPRESS_DELAY = 2.0
+
+_STOP = object()
+
+
+class _Writer:
+  def __init__(self, path: Path):
+    self.path = path
+    self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+    self.dropped = 0
+    self.written = 0
+    self._thread = None
+    self._pid = None
+    self._start_lock = threading.Lock()
+
+  # ── lado del request ──────────────────────────
+  def put(self, entry: dict):
+    self._ensure_started()
+    try:
+      self.queue.put_nowait(entry)
+    except queue.Full:
+      self.dropped += 1
+
+  def _ensure_started(self):
+    # Por pid: tras un fork (gunicorn --preload) el hilo del padre no existe
+    if self._pid == os.getpid():
+      return
+    with self._start_lock:
+      if self._pid == os.getpid():
+        return
+      self._thread = threading.Thread(target=self._run, name="fallback-log", daemon=True)
+      self._thread.start()
+      self._pid = os.getpid()
+
+  # ── hilo escritor ─────────────────────────────
+  def _run(self):
+    while True:
+      lote = []
+      stop = False
+      limite = time.monotonic() + FLUSH_SECONDS
+      while len(lote) < BATCH_SIZE:
+        restante = limite - time.monotonic()
+        if restante <= 0:
+          break
+        try:
+          item = self.queue.get(timeout=restante)
+        except queue.Empty:
+          break
+        if item is _STOP:
+          stop = True
+          break
+        lote.append(item)
+      if lote:
+        self._write(lote)
+      if stop:
+        return
+
+  def _write(self, lote):
+    try:
+      data = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in lote).encode("utf-8")
+      self.path.parent.mkdir(parents=True, exist_ok=True)
+      self._rotate_if_needed()
+      fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+      try:
+        view = memoryview(data)
+        while view:
+          n = os.write(fd, view)
+          view = view[n:]
+      finally:
+        os.close(fd)
+      self.written += len(lote)
+    except Exception:
+      # No queremos que un fallo de log rompa nada: el lote se pierde
+      self.dropped += len(lote)
+
+  # ── rotación ──────────────────────────────────
+  def _needs_rotation(self) -> bool:
+    try:
+      st = os.stat(self.path)
+    except FileNotFoundError:
+      return False
+    if st.st_size >= MAX_BYTES:
+      return True
+    if ROTATE_DAILY and st.st_size:
+      dia_archivo = datetime.fromtimestamp(st.st_mtime, timezone.utc).date()
+      return dia_archivo != datetime.now(timezone.utc).date()
+    return False
+
+  def _rotate_if_needed(self):
+    if not self._needs_rotation():
+      return
+    lock_path = self.path.with_name(self.path.name + ".lock")
+    with open(lock_path, "a") as lock:
+      if fcntl is not None:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+      try:
+        # Otro worker pudo haber rotado mientras esperábamos el lock
+        if not self._needs_rotation():
+          return
+        sello = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        rotado = self.path.with_name(f"{self.path.stem}.{sello}{self.path.suffix}")
+        n = 1
+        while rotado.exists() or Path(str(rotado) + ".gz").exists():
+          # Dos rotaciones en el mismo segundo: no pisar la anterior
+          rotado = self.path.with_name(f"{self.path.stem}.{sello}-{n}{self.path.suffix}")
+          n += 1
+        os.replace(self.path, rotado)
+      finally:
+        if fcntl is not None:
+          fcntl.flock(lock, fcntl.LOCK_UN)
+    # Otros workers pueden tener un lote en vuelo sobre el archivo viejo: se
+    # comprime un rato después y en otro hilo, para no frenar la escritura
+    timer = threading.Timer(COMPRESS_DELAY, _compress, args=(rotado,))
+    timer.daemon = True
+    timer.start()
+
+  # ── cierre ────────────────────────────────────
+  def drain(self, timeout: float = DRAIN_TIMEOUT):
+    """
+    Escribe lo pendiente y detiene el hilo. Se llama sola al salir.
+    """
+    if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+      return
+    try:
+      self.queue.put(_STOP, timeout=timeout)
+    except queue.Full:
+      return
+    self._thread.join(timeout)
+    self._pid = None
+
+  def stats(self) -> dict:
+    return {"pending": self.queue.qsize(), "written": self.written, "dropped": self.dropped}
+
+
+def _compress(path: Path):
+  """
+  archivo.jsonl -> archivo.jsonl.gz. Si el proceso muere a la mitad queda
+  el .jsonl intacto (los lectores aceptan los dos).
+  """
+  destino = Path(str(path) + ".gz")
+  tmp = Path(f"{destino}.tmp{os.getpid()}")
+  try:
+    with open(path, "rb") as src, gzip.open(tmp, "wb") as dst:
+      shutil.copyfileobj(src, dst)
+    os.replace(tmp, destino)
+    os.remove(path)
+  except Exception:
+    try:
+      tmp.unlink()
+    except OSError:
+      pass
+
+
+_WRITER = _Writer(LOG_PATH)
+atexit.register(_WRITER.drain)
+
 
 def log_fallback(query: str, intent: str, confidence: float, meta: dict | None = None):
   """
-  Guarda en un archivo .jsonl (una línea por registro) las consultas
+  Encola en el log .jsonl (una línea por registro) las consultas
   que la neurona no entendió bien o que consideramos 'fallback'.
+  No bloquea ni lanza excepciones.
   """
   try:
-    LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
-
     entry = {
       "timestamp": datetime.utcnow().isoformat(),
       "query": query,
@@ -26,10 +215,20 @@ def log_fallback(query: str, intent: str, confidence: float, meta: dict | None =
       "confidence": round(float(confidence or 0.0), 3),
       "meta": meta or {},
     }
-
-    with LOG_PATH.open("a", encoding="utf-8") as f:
-      f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    _WRITER.put(entry)
 
   except Exception:
     # No queremos que un fallo de log rompa la API
     pass
+
+
+def flush(timeout: float = DRAIN_TIMEOUT):
+  """
+  Escribe lo pendiente ya (comandos, tests). El hilo se vuelve a crear
+  con el próximo log_fallback.
+  """
+  _WRITER.drain(timeout)
+
+
+def stats() -> dict:
+  return _WRITER.stats()
@@ -0,0 +1,260 @@
+# core/fixturegen.py
+"""
+Fixtures sintéticos a escala (lo usan `manage.py gen_fixtures` y `bench_data`).
+
+generate() escribe un juego completo con la misma estructura que
+<app>/fixtures/ (core/data.fixture_path), sin armar las listas en memoria:
+cada archivo se escribe objeto por objeto.
+
+- students.json:           N estudiantes (solo students.student)
+- categorias.json:         copia de las categorías reales (becas y trámites las referencian)
+- becas.json:              copia de las becas reales (las asignaciones las referencian)
+- asignaciones_becas.json: historial de becas de ~BECA_RATIO de los estudiantes
+- horarios.json:           un horario por grupo y período; activos los del período actual
+- tramites.json:           los trámites reales + sintéticos
+
+Consistencia:
+- carnets únicos con el formato de CARNET_REGEX (20AA-NNNNI): 10 000 por
+  cohorte, así que el máximo es MAX_STUDENTS. Las cohortes de
+  capture.SYNTHETIC_COHORTS nunca se usan: son los carnets "que no existen"
+  de una captura, y el replay contra cualquier escala debe seguir viéndolos así
+- grupos con GROUP_CODE_RE (año 1-5, turno M/T, sección 1-2) y acordes al
+  año que cursa el estudiante
+- tiene_beca == su asignación más reciente está "activa"
+"""
+import base64
+import json
+import os
+import random
+import re
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+
+from core.capture import SYNTHETIC_COHORTS
+from core.data import fixture_path
+from horarios.models import GROUP_CODE_RE
+
+FIRST_COHORT = 2000
+LAST_COHORT = SYNTHETIC_COHORTS.start - 1  # 2089: de ahí en adelante son de core/capture.py
+MAX_STUDENTS = (LAST_COHORT - FIRST_COHORT + 1) * 10_000  # NNNN de 0000 a 9999
+# "1m" es todo el formato sin las cohortes reservadas (900 000)
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": MAX_STUDENTS}
+CURRENT_YEAR = 2025
+BECA_RATIO = 0.12
+SECUNDARIO_RATIO = 0.3
+
+# Estado de la asignación más reciente (las anteriores quedan "finalizada")
+ESTADOS_ACTUALES = {"activa": 0.7, "asignada": 0.1, "suspendida": 0.08, "finalizada": 0.07, "rechazada": 0.05}
+
+NOMBRES = ["Juan", "María", "José", "Ana", "Carlos", "Lucía", "Luis", "Sofía", "Pedro", "Valeria",
+           "Miguel", "Camila", "Jorge", "Daniela", "Andrés", "Fernanda", "Diego", "Gabriela"]
+APELLIDOS = ["González", "Martínez", "López", "Hernández", "Pérez", "García", "Rodríguez", "Sánchez",
+             "Ramírez", "Flores", "Morales", "Castillo", "Reyes", "Gutiérrez", "Ortiz", "Rivera"]
+TEMAS_TRAMITE = ["constancia", "certificado", "reposición", "convalidación", "traslado", "reingreso",
+                 "solvencia", "revisión", "cambio de turno", "retiro de asignatura"]
+
+_GROUP_RE = re.compile(GROUP_CODE_RE)
+
+
+def periodos(n: int):
+    """
+    Los n períodos más recientes, del actual hacia atrás:
+    "I Semestre 2025", "II Semestre 2024", "I Semestre 2024", ...
+    """
+    out = []
+    anio, sem = CURRENT_YEAR, "I"
+    for _ in range(n):
+        out.append(f"{sem} Semestre {anio}")
+        if sem == "I":
+            sem, anio = "II", anio - 1
+        else:
+            sem = "I"
+    return out
+
+
+def group_codes():
+    return [f"{anio}{turno}{sec}" for anio in range(1, 6) for turno in "MT" for sec in (1, 2)]
+
+
+def _carnet(i: int, n: int) -> tuple:
+    """
+    (carnet, cohorte) del estudiante i: las cohortes más recientes se llenan
+    primero y solo se usan años viejos si no alcanza.
+    """
+    cohortes = max(5, -(-n // 10_000))
+    primera = max(FIRST_COHORT, min(CURRENT_YEAR - cohortes + 1, LAST_COHORT - cohortes + 1))
+    cohorte = primera + i % cohortes
+    # NNNN arranca en 0001 como los reales; 0000 solo si hace falta el cupo completo
+    desde = 1 if n <= cohortes * 9_999 else 0
+    return f"{cohorte}-{i // cohortes + desde:04d}I", cohorte
+
+
+def _write_fixture(path: Path, objetos) -> int:
+    """
+    Lista JSON de fixture escrita objeto por objeto (a .tmp y luego rename).
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    n = 0
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("[")
+        for obj in objetos:
+            f.write(",\n" if n else "\n")
+            f.write(json.dumps(obj, ensure_ascii=False))
+            n += 1
+        f.write("\n]\n")
+    os.replace(tmp, path)
+    return n
+
+
+def _students(n: int, rng: random.Random, grupos_por_anio: dict):
+    for i in range(n):
+        carnet, cohorte = _carnet(i, n)
+        anio = min(5, max(1, CURRENT_YEAR - cohorte + 1))
+        principal = rng.choice(grupos_por_anio[anio])
+        secundario = None
+        if anio > 1 and rng.random() < SECUNDARIO_RATIO:
+            # Repite una clase del año anterior
+            secundario = rng.choice(grupos_por_anio[anio - 1])
+        yield {
+            "model": "students.student",
+            "pk": i + 1,
+            "fields": {
+                "nombre": f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}",
+                "carnet": carnet,
+                "anio_actual": anio,
+                "tiene_beca": False,  # se corrige abajo con las asignaciones
+                "grupo_secundario": secundario,
+                "grupo_principal": principal,
+            },
+        }
+
+
+def _asignaciones(n: int, seed: int, beca_pks, lista_periodos, becados: dict):
+    """
+    `becados` se llena acá: student pk -> True si su asignación actual está activa.
+    """
+    rng = random.Random(seed + 1)
+    estados, pesos = zip(*ESTADOS_ACTUALES.items())
+    pk = 0
+    inicio = date(CURRENT_YEAR, 2, 1)
+    for student_pk in range(1, n + 1):
+        if rng.random() >= BECA_RATIO:
+            continue
+        historial = rng.randint(1, min(4, len(lista_periodos)))
+        actual = rng.choices(estados, weights=pesos)[0]
+        beca = rng.choice(beca_pks)
+        for k in range(historial - 1, -1, -1):
+            estado = actual if k == 0 else "finalizada"
+            pk += 1
+            fecha = inicio - timedelta(days=182 * k)
+            yield {
+                "model": "becas.asignacionbeca",
+                "pk": pk,
+                "fields": {
+                    "student": student_pk,
+                    "beca": beca,
+                    "periodo": lista_periodos[k],
+                    "estado": estado,
+                    "fecha_asignacion": fecha.isoformat(),
+                    "fecha_fin": None if estado in ("activa", "asignada") else (fecha + timedelta(days=150)).isoformat(),
+                    "monto_mensual": f"{rng.choice((500, 800, 1000, 1500)):.2f}",
+                    "activo": estado in ("activa", "asignada"),
+                },
+            }
+        becados[student_pk] = actual == "activa"
+
+
+def _horarios(lista_periodos, imagen_b64: str):
+    pk = 0
+    for p_idx, periodo in enumerate(lista_periodos):
+        for g in group_codes():
+            pk += 1
+            yield {
+                "model": "horarios.horario",
+                "pk": pk,
+                "fields": {
+                    "group_code": g,
+                    "titulo": f"Horario {g} - {periodo}",
+                    "periodo": periodo,
+                    "content_type": "image/jpeg",
+                    "original_filename": f"{g}.jpg",
+                    "imagen": imagen_b64,
+                    "activo": p_idx == 0,
+                    "created_at": f"{CURRENT_YEAR}-01-15T00:00:00Z",
+                    "updated_at": f"{CURRENT_YEAR}-01-15T00:00:00Z",
+                },
+            }
+
+
+def _tramites(n: int, rng: random.Random, reales):
+    pk = 0
+    for t in reales:
+        pk += 1
+        yield {**t, "pk": pk}
+    for i in range(n):
+        pk += 1
+        tema = rng.choice(TEMAS_TRAMITE)
+        yield {
+            "model": "tramites.tramite",
+            "pk": pk,
+            "fields": {
+                "categoria": rng.choice((2, 4, 5)),
+                "titulo": f"Trámite de {tema} #{i + 1}",
+                "slug": f"{tema.replace(' ', '-').replace('ó', 'o').replace('ú', 'u')}-{i + 1}",
+                "descripcion": f"Pasos para solicitar {tema} en la universidad.",
+                "requisitos": [f"Requisito {k + 1} de {tema}" for k in range(rng.randint(2, 8))],
+                "activo": rng.random() < 0.9,
+                "created_at": f"{CURRENT_YEAR}-01-15T00:00:00Z",
+                "updated_at": f"{CURRENT_YEAR}-01-15T00:00:00Z",
+            },
+        }
+
+
+def _load(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def generate(out_dir, students: int, periods: int = 10, tramites: int = 200,
+             image_bytes: int = 4096, seed: int = 42) -> dict:
+    """
+    Escribe el juego completo en out_dir y devuelve cuántos objetos tiene cada archivo.
+    """
+    if not 1 <= students <= MAX_STUDENTS:
+        raise ValueError(f"students debe estar entre 1 y {MAX_STUDENTS} (formato de carnet)")
+    out_dir = Path(out_dir)
+    base = Path(settings.BASE_DIR)
+    rng = random.Random(seed)
+    lista_periodos = periodos(periods)
+    grupos = group_codes()
+    assert all(_GROUP_RE.match(g) for g in grupos)
+    grupos_por_anio = {a: [g for g in grupos if g[0] == str(a)] for a in range(1, 6)}
+
+    conteos = {"categorias": _write_fixture(fixture_path("categorias", out_dir), _load(fixture_path("categorias", base)))}
+    becas = _load(fixture_path("becas", base))
+    beca_pks = [b["pk"] for b in becas if (b.get("fields") or {}).get("activa", True)] or [b["pk"] for b in becas]
+    conteos["becas"] = _write_fixture(fixture_path("becas", out_dir), becas)
+
+    # Primero las asignaciones: así se sabe quién tiene beca al escribir students
+    becados = {}
+    conteos["asignaciones"] = _write_fixture(
+        fixture_path("asignaciones", out_dir),
+        _asignaciones(students, seed, beca_pks, lista_periodos, becados),
+    )
+
+    def students_con_beca():
+        for obj in _students(students, rng, grupos_por_anio):
+            obj["fields"]["tiene_beca"] = becados.get(obj["pk"], False)
+            yield obj
+
+    conteos["students"] = _write_fixture(fixture_path("students", out_dir), students_con_beca())
+
+    imagen = base64.b64encode(random.Random(seed).randbytes(image_bytes)).decode("ascii")
+    conteos["horarios"] = _write_fixture(fixture_path("horarios", out_dir), _horarios(lista_periodos, imagen))
+
+    reales = [t for t in _load(fixture_path("tramites", base)) if t.get("model") == "tramites.tramite"]
+    conteos["tramites"] = _write_fixture(fixture_path("tramites", out_dir), _tramites(tramites, rng, reales))
+    return conteos
@@ -0,0 +1,472 @@
+# core/handlers.py
+"""
+Un handler por intención. La vista (sync, batch o async) decide la intención
+y despacha con HANDLERS[intent]; el handler solo arma el "answer".
+
+Cada handler declara:
+- needs_carnet: si sin carnet solo puede pedirlo (y con qué mensaje)
+- uses_query:   si la respuesta depende del texto (p. ej. qué beca se nombró)
+- reads:        qué datos de core/data.py consulta
+- static:       si la respuesta no depende de la consulta ni del carnet;
+                en ese caso se arma y se codifica a JSON una sola vez
+                (core/renderers.PreEncoded)
+
+y se mide solo: cada llamada suma a las estadísticas de su intención.
+"""
+import threading
+import time
+
+from .renderers import PreEncoded
+from . import metrics, timing
+
+from .data import (
+    get_becas,
+    buscar_beca_por_tipo,
+    find_student_by_carnet,
+    detalle_beca,
+    get_tramites_monografia,
+    get_tramite_titulo_universitario,
+    get_tramite_baja_universidad,
+    get_horario_estudiante,
+)
+
+FALLBACK_MENSAJE = (
+    "No estoy seguro de haber entendido tu consulta.\n\n"
+    "Puedo ayudarte con:\n"
+    "• Becas (tipos, requisitos, si tienes beca, etc.)\n"
+    "• Horarios y grupo según tu carnet\n"
+    "• Trámites de monografía, título y baja\n\n"
+    "Por ejemplo:\n"
+    "» ¿Qué tipos de beca hay?\n"
+    "» ¿Cuáles son los requisitos del trámite de título universitario?\n"
+    "» ¿Cuál es mi grupo según mi carnet 2021-0001I?"
+)
+_FALLBACK_ANSWER = PreEncoded(mensaje=FALLBACK_MENSAJE)
+
+
+class HandlerContext:
+    """
+    Lo que un handler puede usar: el texto, el carnet ya extraído, el
+    estudiante si la conversación ya lo resolvió (core/sessions.py) y la
+    función para registrar fallbacks.
+    """
+    __slots__ = ("query", "carnet", "intent", "confidence", "log", "student")
+
+    def __init__(self, query, carnet=None, intent=None, confidence=0.0, log=None, student=None):
+        self.query = query
+        self.carnet = carnet
+        self.intent = intent
+        self.confidence = confidence
+        self.log = log
+        self.student = student
+
+
+class IntentHandler:
+    intent = None
+    needs_carnet = False
+    missing_carnet_message = None
+    uses_query = False
+    reads = ()
+    static = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = 0
+        self._total_ns = 0
+        self._max_ns = 0
+        self._fragment = None
+        self._missing_carnet = PreEncoded(mensaje=self.missing_carnet_message) if self.needs_carnet else None
+
+    def __call__(self, ctx: HandlerContext, **kwargs) -> dict:
+        t0 = time.perf_counter_ns()
+        try:
+            if self.needs_carnet and not ctx.carnet:
+                return self._missing_carnet
+            if self.static:
+                frag = self._fragment
+                if frag is None:
+                    frag = self._fragment = PreEncoded(self.answer(ctx, **kwargs))
+                return frag
+            return self.answer(ctx, **kwargs)
+        finally:
+            elapsed = time.perf_counter_ns() - t0
+            timing.add("handler", elapsed)
+            with self._lock:
+                self._count += 1
+                self._total_ns += elapsed
+                if elapsed > self._max_ns:
+                    self._max_ns = elapsed
+
+    def answer(self, ctx: HandlerContext) -> dict:
+        raise NotImplementedError
+
+    def clear_fragment(self):
+        self._fragment = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total, mx = self._count, self._total_ns, self._max_ns
+        return {
+            "count": count,
+            "avg_ms": round(total / count / 1e6, 4) if count else 0.0,
+            "max_ms": round(mx / 1e6, 4),
+            "needs_carnet": self.needs_carnet,
+            "reads": list(self.reads),
+        }
+
+
+# ─────────────────────────────────────────────
+# Becas
+# ─────────────────────────────────────────────
+
+class TiposBecasHandler(IntentHandler):
+    intent = "tipos_becas"
+    reads = ("becas",)
+    static = True
+
+    def answer(self, ctx):
+        tipos = [b["tipo"] or (b.get("nombre") or "Beca") for b in get_becas()]
+        return {
+            "mensaje": "Tenemos disponibles los siguientes tipos de becas:",
+            "tipos_becas": tipos,
+        }
+
+
+class RequisitosBecasHandler(IntentHandler):
+    intent = "requisitos_becas"
+    uses_query = True
+    reads = ("becas",)
+
+    def answer(self, ctx):
+        candidatos = buscar_beca_por_tipo(ctx.query)
+        if candidatos:
+            return {
+                "mensaje": "Estos son los requisitos de la beca que consultaste:",
+                "becas": [
+                    {"tipo": b["tipo"], "requisitos": b["requisitos"]}
+                    for b in candidatos
+                ],
+            }
+        return {
+            "mensaje": "No entendí qué beca específica deseas. Te muestro los tipos disponibles:",
+            "requisitos_por_beca": {
+                b["tipo"]: b["requisitos"] for b in get_becas()
+            },
+        }
+
+
+class AsignacionBecaHandler(IntentHandler):
+    """
+    estado_beca y detalle_beca: misma búsqueda, cambian los textos y la clave.
+    """
+    needs_carnet = True
+    reads = ("students", "asignaciones", "becas")
+    mensaje_con_beca = None
+
+    def answer(self, ctx):
+        carnet = ctx.carnet
+        st = ctx.student or find_student_by_carnet(carnet)
+        if not st:
+            return {"mensaje": f"No encontré el carnet {carnet} en el sistema."}
+
+        info = detalle_beca(carnet)
+        nombre = st.get("fields", {}).get("nombre") or carnet
+        if not info:
+            return {
+                "mensaje": f"{nombre} ({carnet}), no tienes una beca asignada.",
+                self.intent: {
+                    "tiene_beca": False,
+                    "carnet": carnet,
+                    "nombre": nombre,
+                },
+            }
+        return {
+            "mensaje": f"{nombre} ({carnet}), {self.mensaje_con_beca}",
+            self.intent: {
+                "tiene_beca": True,
+                "carnet": carnet,
+                "nombre": nombre,
+                "beca": info.get("beca"),
+                "porcentaje": info.get("porcentaje"),
+                "periodo": info.get("periodo"),
+                "estado": info.get("estado"),
+                "activo": info.get("activo", False),
+            },
+        }
+
+
+class EstadoBecaHandler(AsignacionBecaHandler):
+    intent = "estado_beca"
+    missing_carnet_message = "Pásame tu carnet (formato 2021-0001I) y te digo si tienes beca y de qué tipo."
+    mensaje_con_beca = "tienes una beca asignada."
+
+
+class DetalleBecaHandler(AsignacionBecaHandler):
+    intent = "detalle_beca"
+    missing_carnet_message = "Pásame tu carnet (formato 2021-0001I) y te digo cuál beca tienes."
+    mensaje_con_beca = "este es el detalle de tu beca:"
+
+
+class AplicarBecaHandler(IntentHandler):
+    intent = "aplicar_beca"
+    uses_query = True
+    reads = ("becas",)
+
+    def answer(self, ctx):
+        candidatos = buscar_beca_por_tipo(ctx.query)
+        if candidatos:
+            return {
+                "mensaje": "Estos son los requisitos para aplicar a la beca que mencionaste:",
+                "becas": [
+                    {"tipo": b["tipo"], "requisitos": b["requisitos"]}
+                    for b in candidatos
+                ],
+            }
+        tipos = [b["tipo"] or (b.get("nombre") or "Beca") for b in get_becas()]
+        return {
+            "mensaje": "¿Por cuál beca te gustaría aplicar? Elige una:",
+            "tipos_becas": tipos,
+        }
+
+
+class DondeReciboBecaHandler(IntentHandler):
+    intent = "donde_recibo_beca"
+    static = True
+
+    def answer(self, ctx):
+        return {
+            "mensaje": "La beca se recibe según tu asignación (pago en Caja o depósito bancario).",
+            "metodos_entrega": ["Caja", "Depósito"],
+        }
+
+
+# ─────────────────────────────────────────────
+# Horarios
+# ─────────────────────────────────────────────
+
+class HorarioEstudianteHandler(IntentHandler):
+    intent = "horario_estudiante"
+    needs_carnet = True
+    missing_carnet_message = "Pásame tu carnet (formato 2021-0001I) y te muestro tu grupo y horarios."
+    reads = ("students", "horarios")
+
+    def answer(self, ctx):
+        carnet = ctx.carnet
+        info = get_horario_estudiante(carnet)
+        if not info:
+            return {"mensaje": f"No encontré el carnet {carnet} en el sistema."}
+
+        grupos = info.get("grupos") or []
+        tiene_algún_horario = any((g.get("horarios") for g in grupos))
+        nombre = info.get("nombre") or carnet
+
+        if not grupos:
+            return {
+                "mensaje": (
+                    f"{nombre} ({carnet}), no encontré ningún grupo asignado "
+                    "para este estudiante."
+                ),
+                "horario": {
+                    "tiene_horario": False,
+                    "carnet": info["carnet"],
+                    "nombre": nombre,
+                    "grupo": None,
+                    "mensaje": "No encontré ningún grupo asignado para este estudiante.",
+                    "grupos": [],
+                },
+            }
+        if not tiene_algún_horario:
+            return {
+                "mensaje": (
+                    f"{nombre} ({carnet}), tienes grupo asignado pero no encontré "
+                    "horarios registrados para tus grupos."
+                ),
+                "horario": {
+                    "tiene_horario": False,
+                    "carnet": info["carnet"],
+                    "nombre": nombre,
+                    "grupo": info.get("grupo"),
+                    "mensaje": "Tienes grupo, pero no encontré horarios registrados para tus grupos.",
+                    "grupos": grupos,
+                },
+            }
+        h = info.get("horario")  # horario principal
+        return {
+            "mensaje": f"{nombre} ({carnet}), estos son tus grupos y horarios.",
+            "horario": {
+                "tiene_horario": True,
+                "carnet": info["carnet"],
+                "nombre": nombre,
+                "grupo": info.get("grupo"),
+                "periodo": h.get("periodo") if h else None,
+                "titulo": h.get("titulo") if h else None,
+                "horario_id": h.get("pk") if h else None,
+                "archivo": h.get("original_filename") if h else None,
+                "grupos": grupos,
+            },
+        }
+
+
+# ─────────────────────────────────────────────
+# Trámites
+# ─────────────────────────────────────────────
+
+class TramiteMonografiaHandler(IntentHandler):
+    intent = "tramite_monografia"
+    reads = ("tramites",)
+    static = True
+
+    def answer(self, ctx):
+        tramites = get_tramites_monografia()
+        if not tramites:
+            return {
+                "mensaje": (
+                    "Por ahora no tengo registrados los requisitos de monografía. "
+                    "Te recomiendo consultar en Registro Académico."
+                )
+            }
+        return {
+            "mensaje": "Aquí tienes los trámites y requisitos relacionados con la monografía.",
+            "tramite": "monografia",
+            "tramites": [
+                {
+                    "titulo": t["titulo"],
+                    "slug": t["slug"],
+                    "descripcion": t["descripcion"],
+                    "requisitos": t["requisitos"],
+                }
+                for t in tramites
+            ],
+        }
+
+
+class TramiteUnicoHandler(IntentHandler):
+    """
+    Trámites que se resuelven con UN registro del fixture (título, baja).
+    """
+    reads = ("tramites",)
+    static = True
+    tramite = None
+    mensaje = None
+    mensaje_sin_datos = None
+
+    def get_tramite(self):
+        raise NotImplementedError
+
+    def answer(self, ctx):
+        tramite = self.get_tramite()
+        if not tramite:
+            return {"mensaje": self.mensaje_sin_datos}
+        return {
+            "mensaje": self.mensaje,
+            "tramite": self.tramite,
+            "titulo": tramite["titulo"],
+            "slug": tramite["slug"],
+            "descripcion": tramite["descripcion"],
+            "requisitos": tramite["requisitos"],
+        }
+
+
+class TramiteTituloHandler(TramiteUnicoHandler):
+    intent = "tramite_titulo"
+    tramite = "titulo_universitario"
+    mensaje = "Estos son los requisitos para el trámite de título universitario."
+    mensaje_sin_datos = (
+        "Por ahora no tengo registrados los requisitos para el título universitario. "
+        "Te recomiendo consultar en Registro Académico."
+    )
+
+    def get_tramite(self):
+        return get_tramite_titulo_universitario()
+
+
+class TramiteBajaHandler(TramiteUnicoHandler):
+    intent = "tramite_baja"
+    tramite = "baja_universidad"
+    mensaje = "Estos son los requisitos para el trámite de baja de la universidad."
+    mensaje_sin_datos = (
+        "Por ahora no tengo registrado el proceso de baja. "
+        "Te recomiendo consultar en Registro Académico."
+    )
+
+    def get_tramite(self):
+        return get_tramite_baja_universidad()
+
+
+# ─────────────────────────────────────────────
+# Charla y fallback
+# ─────────────────────────────────────────────
+
+class SaludoHandler(IntentHandler):
+    intent = "saludo"
+    static = True
+
+    def answer(self, ctx):
+        return {
+            "mensaje": (
+                "¡Hola! 👋 Puedo ayudarte con:\n"
+                "• Becas (tipos, requisitos, si tienes beca, etc.)\n"
+                "• Horarios y grupo según tu carnet\n"
+                "• Trámites de monografía, título y baja\n\n"
+                "Por ejemplo, puedes preguntar:\n"
+                "» ¿Qué tipos de beca hay?\n"
+                "» ¿Cuáles son los requisitos de la beca monetaria?\n"
+                "» ¿Cuál es mi grupo según mi carnet 2021-0001I?"
+            )
+        }
+
+
+class FallbackHandler(IntentHandler):
+    """
+    Respuesta genérica. Registra la consulta en el log de fallbacks con el
+    motivo que le pase la vista: FALLBACK(ctx, reason=..., domain_intent=...).
+    Con ctx.log=None (respuestas degradadas, sin neurona) no registra nada.
+    """
+    intent = "desconocido"
+
+    def answer(self, ctx, reason: str = "final_fallback", domain_intent: bool = False):
+        if ctx.log is not None:
+            metrics.FALLBACKS.labels(reason).inc()
+            ctx.log(
+                query=ctx.query,
+                intent=ctx.intent,
+                confidence=ctx.confidence,
+                meta={
+                    "reason": reason,
+                    "domain_intent": domain_intent,
+                },
+            )
+        return _FALLBACK_ANSWER
+
+
+HANDLERS = {
+    h.intent: h
+    for h in (
+        TiposBecasHandler(),
+        RequisitosBecasHandler(),
+        EstadoBecaHandler(),
+        DetalleBecaHandler(),
+        AplicarBecaHandler(),
+        DondeReciboBecaHandler(),
+        HorarioEstudianteHandler(),
+        TramiteMonografiaHandler(),
+        TramiteTituloHandler(),
+        TramiteBajaHandler(),
+        SaludoHandler(),
+        FallbackHandler(),
+    )
+}
+SALUDO = HANDLERS["saludo"]
+FALLBACK = HANDLERS["desconocido"]
+
+
+def clear_fragments():
+    """
+    Olvida las respuestas pre-codificadas (p. ej. al recargar los fixtures).
+    """
+    for h in HANDLERS.values():
+        h.clear_fragment()
+
+
+def handler_stats() -> dict:
+    return {intent: h.stats() for intent, h in HANDLERS.items()}
@@ -0,0 +1,355 @@
+# core/loadbench.py
+"""
+Benchmark de punta a punta de /api/nlp/intent/ (lo usa `manage.py bench_intent`).
+
+Objetivos:
+- client: django.test.Client en este proceso (vista + middleware, sin red)
+- wsgi:   servidor WSGI local en otro proceso (gunicorn si está instalado,
+          si no `manage.py runserver --noreload`)
+- asgi:   uvicorn en otro proceso, contra /api/nlp/intent/async/
+
+Cada objetivo se corre a varias concurrencias con la misma mezcla de
+consultas (query_mix, semilla fija) y se reporta throughput y p50/p95/p99.
+compare() marca las regresiones contra un JSON de una corrida anterior.
+"""
+import http.client
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from itertools import cycle, islice
+
+from django.conf import settings
+
+from ml.corpus import iter_augmented, iter_templates
+
+INTENT_PATH = "/api/nlp/intent/"
+ASYNC_INTENT_PATH = "/api/nlp/intent/async/"
+TARGETS = ("client", "wsgi", "asgi")
+DEFAULT_CONCURRENCY = (1, 4, 16)
+
+# Proporción de cada tipo de consulta en la mezcla
+MIX_WEIGHTS = {"dominio": 0.75, "saludo": 0.12, "fuera": 0.13}
+# De las consultas con carnet, cuántas usan uno que SÍ está en los fixtures
+REAL_CARNET_RATIO = 0.8
+
+SMALLTALK = [
+    "hola", "buenas", "buenas tardes", "buenos días", "hola que tal", "hey", "hello", "ola",
+]
+FUERA_DE_DOMINIO = [
+    "xyz", "cuánto es 2 + 2", "qué hora es", "me recomiendas una película",
+    "dónde queda la cafetería", "asdf qwer", "quién ganó el partido ayer",
+]
+
+# Cuánto puede empeorar una corrida respecto a la base (misma concurrencia y objetivo)
+DEFAULT_THRESHOLDS = {"p95_ms": 1.25, "p99_ms": 1.5, "min_throughput_ratio": 0.8}
+ABSOLUTE_SLACK_MS = 0.5
+
+_CARNET_RE = re.compile(r"\b20\d{2}-\d{4}i\b", re.IGNORECASE)
+
+
+def query_mix(n: int, seed: int = 7, carnets=()) -> list:
+    """
+    n consultas crudas: frases del corpus con typos (la mayoría), saludos y
+    consultas fuera del dominio. Los carnets se cambian por reales de `carnets`.
+    """
+    rng = random.Random(seed)
+    carnets = list(carnets)
+    dominio = iter_augmented(iter_templates(), seed=seed)
+    tipos, pesos = zip(*MIX_WEIGHTS.items())
+    out = []
+    for tipo in rng.choices(tipos, weights=pesos, k=n):
+        if tipo == "saludo":
+            out.append(rng.choice(SMALLTALK))
+        elif tipo == "fuera":
+            out.append(rng.choice(FUERA_DE_DOMINIO))
+        else:
+            q, _ = next(dominio)
+            if carnets and rng.random() < REAL_CARNET_RATIO:
+                q = _CARNET_RE.sub(rng.choice(carnets), q)
+            out.append(q)
+    return out
+
+
+def _percentile(sorted_vals, p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(p / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+def _summary(latencias_ms) -> dict:
+    lat = sorted(latencias_ms)
+    return {
+        "count": len(lat),
+        "p50_ms": round(_percentile(lat, 50), 3),
+        "p95_ms": round(_percentile(lat, 95), 3),
+        "p99_ms": round(_percentile(lat, 99), 3),
+    }
+
+
+# ─────────────────────────────────────────────
+# Clientes (uno por hilo)
+# ─────────────────────────────────────────────
+
+class DjangoClientSender:
+    def __init__(self, path=INTENT_PATH):
+        from django.test import Client
+        # HTTP_HOST: CommonMiddleware valida el host contra ALLOWED_HOSTS
+        self.client = Client(HTTP_HOST="localhost")
+        self.path = path
+
+    def send(self, q: str, conversation_id=None, path=None):
+        body = {"query": q, "conversation_id": conversation_id} if conversation_id else {"query": q}
+        r = self.client.post(path or self.path, body, content_type="application/json")
+        return r.status_code, r.content
+
+    def close(self):
+        pass
+
+
+class HTTPSender:
+    """
+    Conexión keep-alive a un servidor local; se reabre si el servidor la cierra.
+    """
+
+    def __init__(self, host: str, port: int, path: str):
+        self.host, self.port, self.path = host, port, path
+        self.conn = None
+
+    def send(self, q: str, conversation_id=None, path=None):
+        body = {"query": q, "conversation_id": conversation_id} if conversation_id else {"query": q}
+        body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        for intento in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            try:
+                self.conn.request("POST", path or self.path, body, {"Content-Type": "application/json"})
+                r = self.conn.getresponse()
+                data = r.read()
+                if r.getheader("Connection", "").lower() == "close":
+                    self.close()
+                return r.status, data
+            except (ConnectionError, http.client.HTTPException):
+                self.close()
+                if intento:
+                    raise
+        return None
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def run_level(make_sender, queries, concurrency: int, warmup: int = 20) -> dict:
+    """
+    Reparte `queries` entre `concurrency` hilos, cada uno con su cliente.
+    """
+    resultados = [None] * concurrency
+    barrera = threading.Barrier(concurrency + 1)
+
+    def worker(idx):
+        try:
+            sender = make_sender()
+        except BaseException:
+            barrera.abort()
+            raise
+        try:
+            try:
+                for q in islice(cycle(queries), warmup):
+                    sender.send(q)
+            finally:
+                # Si el calentamiento falla, que el hilo principal no quede esperando
+                barrera.wait()
+            lat, por_intent, errores = [], defaultdict(list), 0
+            for q in queries[idx::concurrency]:
+                t0 = time.perf_counter_ns()
+                try:
+                    code, body = sender.send(q)
+                except Exception:
+                    code, body = 0, b""
+                ms = (time.perf_counter_ns() - t0) / 1e6
+                lat.append(ms)
+                if code != 200:
+                    errores += 1
+                    continue
+                try:
+                    por_intent[json.loads(body).get("intent", "?")].append(ms)
+                except ValueError:
+                    errores += 1
+            resultados[idx] = (lat, por_intent, errores)
+        finally:
+            sender.close()
+
+    hilos = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for h in hilos:
+        h.start()
+    try:
+        barrera.wait()
+    except threading.BrokenBarrierError:
+        raise RuntimeError("no se pudo crear el cliente del benchmark")
+    t0 = time.perf_counter()
+    for h in hilos:
+        h.join()
+    elapsed = time.perf_counter() - t0
+
+    lat, por_intent, errores = [], defaultdict(list), 0
+    for r in resultados:
+        if r is None:
+            continue
+        lat += r[0]
+        errores += r[2]
+        for intent, vals in r[1].items():
+            por_intent[intent] += vals
+    return {
+        "concurrency": concurrency,
+        "requests": len(lat),
+        "errors": errores,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(lat) / elapsed, 1) if elapsed else 0.0,
+        **_summary(lat),
+        "by_intent": {k: _summary(v) for k, v in sorted(por_intent.items())},
+    }
+
+
+# ─────────────────────────────────────────────
+# Servidores locales
+# ─────────────────────────────────────────────
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _has_module(name: str) -> bool:
+    try:
+        __import__(name)
+    except ImportError:
+        return False
+    return True
+
+
+class LocalServer:
+    """
+    Levanta el proyecto en otro proceso (así el generador de carga no le
+    roba el GIL) y espera a que acepte conexiones.
+    """
+
+    def __init__(self, kind: str, workers: int = 1):
+        self.kind = kind
+        self.port = _free_port()
+        self.path = ASYNC_INTENT_PATH if kind == "asgi" else INTENT_PATH
+        addr = f"127.0.0.1:{self.port}"
+        if kind == "asgi":
+            if not _has_module("uvicorn"):
+                raise RuntimeError("el objetivo asgi necesita uvicorn instalado")
+            self.server = "uvicorn"
+            self.cmd = [sys.executable, "-m", "uvicorn", "chatbot.asgi:application",
+                        "--host", "127.0.0.1", "--port", str(self.port), "--workers", str(workers),
+                        "--log-level", "warning", "--no-access-log"]
+        elif _has_module("gunicorn"):
+            self.server = "gunicorn"
+            self.cmd = [sys.executable, "-m", "gunicorn", "chatbot.wsgi:application",
+                        "--bind", addr, "--workers", str(workers), "--threads", "8",
+                        "--log-level", "warning"]
+        else:
+            self.server = "runserver"
+            self.cmd = [sys.executable, "manage.py", "runserver", addr, "--noreload"]
+        self.proc = None
+
+    def __enter__(self):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "chatbot.settings"),
+               # Que cada worker cargue el modelo antes de atender, no con el primer request medido
+               "NLP_WARMUP_ON_BOOT": "1"}
+        self.proc = subprocess.Popen(
+            self.cmd, cwd=str(settings.BASE_DIR), env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        limite = time.monotonic() + 30
+        while time.monotonic() < limite:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"{self.server} terminó al arrancar (código {self.proc.returncode})")
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=0.5):
+                    return self
+            except OSError:
+                time.sleep(0.2)
+        self.__exit__()
+        raise RuntimeError(f"{self.server} no abrió el puerto {self.port} en 30 s")
+
+    def __exit__(self, *exc):
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+        return False
+
+    def sender(self):
+        return HTTPSender("127.0.0.1", self.port, self.path)
+
+
+def run_target(target: str, queries, levels, workers: int = 1, warmup: int = 20) -> dict:
+    if target == "client":
+        runs = [run_level(DjangoClientSender, queries, c, warmup) for c in levels]
+        return {"target": target, "server": "django.test.Client", "runs": runs}
+    with LocalServer(target, workers) as srv:
+        runs = [run_level(srv.sender, queries, c, warmup) for c in levels]
+        return {"target": target, "server": srv.server, "workers": workers, "runs": runs}
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=str(settings.BASE_DIR),
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "measured_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(current: dict, baseline: dict, thresholds: dict | None = None):
+    """
+    Regresiones de `current` contra `baseline` (misma forma que el JSON de
+    bench_intent), por objetivo y concurrencia. Lista vacía = sin regresiones.
+    """
+    th = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    base_runs = {
+        (t["target"], r["concurrency"]): r
+        for t in baseline.get("targets", []) for r in t["runs"]
+    }
+    regresiones = []
+    for t in current.get("targets", []):
+        for r in t["runs"]:
+            base = base_runs.get((t["target"], r["concurrency"]))
+            if base is None:
+                continue
+            donde = f"{t['target']} c={r['concurrency']}"
+            for key in ("p95_ms", "p99_ms"):
+                if base[key] and r[key] > base[key] * th[key] and r[key] - base[key] > ABSOLUTE_SLACK_MS:
+                    regresiones.append(f"{donde} {key}: {r[key]} > {th[key]} x {base[key]}")
+            if base["throughput_rps"] and r["throughput_rps"] < base["throughput_rps"] * th["min_throughput_ratio"]:
+                regresiones.append(
+                    f"{donde} throughput: {r['throughput_rps']} rps < "
+                    f"{th['min_throughput_ratio']} x {base['throughput_rps']}"
+                )
+            if r["errors"] > base["errors"]:
+                regresiones.append(f"{donde} errores: {r['errors']} (antes {base['errors']})")
+    return regresiones
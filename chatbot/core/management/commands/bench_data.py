@@ -0,0 +1,152 @@
+# core/management/commands/bench_data.py
+# Uso (desde la carpeta chatbot/):
+#   python manage.py bench_data                          # escalas 10k y 100k (las genera si faltan)
+#   python manage.py bench_data --scales 10k,100k,1m --json bench/data.json
+#   python manage.py bench_data --dirs scale_fixtures/100k,/tmp/fx
+"""
+Microbenchmarks de las funciones públicas de core/data.py contra juegos de
+fixtures de distinta escala (core/fixturegen.py).
+
+Por escala: tamaño en disco, carga en frío (warm_up: leer + indexar) y, por
+función, microsegundos por llamada con argumentos variados (carnets que
+existen y que no, grupos, slugs, textos).
+"""
+import json
+import random
+import time
+from itertools import cycle, islice
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from core import data, fixturegen
+from core.handlers import clear_fragments
+from core.management.commands.gen_fixtures import DEFAULT_OUT
+
+MISSING_CARNET_RATIO = 0.2
+
+
+def _args(seed: int = 7, n: int = 512) -> dict:
+    """
+    Argumentos por función, tomados del juego cargado.
+    """
+    rng = random.Random(seed)
+    existentes = list(data._student_index_by_carnet())
+    carnets = [
+        f"2099-{rng.randint(0, 9999):04d}I" if rng.random() < MISSING_CARNET_RATIO or not existentes
+        else rng.choice(existentes)
+        for _ in range(n)
+    ]
+    slugs = list(data._tramites_index_by_slug()) or ["baja-universidad"]
+    asignaciones = data.get_asignaciones()
+    tipos = [b["tipo"] for b in data.get_becas()] + ["beca deportiva", "alimenticia"]
+    return {
+        "get_becas": [()],
+        "buscar_beca_por_tipo": [(t,) for t in tipos],
+        "find_student_by_carnet": [(c,) for c in carnets],
+        "get_asignaciones": [()],
+        "buscar_asignacion_por_carnet": [(c,) for c in carnets],
+        "resumen_asignacion": [(a,) for a in rng.sample(asignaciones, min(n, len(asignaciones)))] or [(None,)],
+        "tiene_beca": [(c,) for c in carnets],
+        "detalle_beca": [(c,) for c in carnets],
+        "get_horarios": [()],
+        "buscar_horarios_por_group_code": [(g,) for g in fixturegen.group_codes() + ["9X9"]],
+        "get_horario_estudiante": [(c,) for c in carnets],
+        "get_tramites": [()],
+        "get_tramite_by_slug": [(rng.choice(slugs),) for _ in range(64)] + [("no-existe",)],
+        "buscar_tramites_por_texto": [(q,) for q in ("monografía", "título", "constancia", "xyz")],
+        "get_tramites_monografia": [()],
+        "get_tramite_titulo_universitario": [()],
+        "get_tramite_baja_universidad": [()],
+        "get_data_version": [()],
+    }
+
+
+def _us_per_call(fn, args, min_calls: int, min_seconds: float) -> float:
+    for a in args[:8]:
+        fn(*a)  # calentamiento
+    calls, t0 = 0, time.perf_counter_ns()
+    it = cycle(args)
+    while True:
+        for a in islice(it, min_calls):
+            fn(*a)
+        calls += min_calls
+        elapsed = time.perf_counter_ns() - t0
+        if elapsed >= min_seconds * 1e9:
+            return elapsed / calls / 1e3
+
+
+def _bench_dir(base: Path, min_calls: int, min_seconds: float) -> dict:
+    data.use_data_dir(base)
+    clear_fragments()
+    disco = {n: data.fixture_path(n, base).stat().st_size for n in data.FIXTURE_FILES
+             if data.fixture_path(n, base).exists()}
+    t0 = time.perf_counter()
+    data.warm_up()
+    carga = time.perf_counter() - t0
+
+    funciones = {}
+    for nombre, args in _args().items():
+        funciones[nombre] = round(_us_per_call(getattr(data, nombre), args, min_calls, min_seconds), 3)
+    return {
+        "dir": str(base),
+        "students": len(data._student_index_by_carnet()),
+        "asignaciones": len(data.get_asignaciones()),
+        "horarios": len(data.get_horarios(activos_only=False)),
+        "tramites": len(data.get_tramites(activos_only=False)),
+        "disk_bytes": disco,
+        "warm_up_s": round(carga, 3),
+        "us_per_call": funciones,
+    }
+
+
+class Command(BaseCommand):
+    help = "Microbenchmarks de core/data.py por escala de fixtures"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scales", default="10k,100k", help=f"De {', '.join(fixturegen.SCALES)}")
+        parser.add_argument("--dirs", help="Carpetas de fixtures ya generadas (en vez de --scales)")
+        parser.add_argument("--regen", action="store_true", help="Regenerar aunque ya existan")
+        parser.add_argument("--min-calls", type=int, default=200)
+        parser.add_argument("--min-seconds", type=float, default=0.2)
+        parser.add_argument("--json", help="Guardar los resultados en JSON")
+
+    def handle(self, *args, **opts):
+        if opts["dirs"]:
+            bases = [Path(d) for d in opts["dirs"].split(",") if d.strip()]
+        else:
+            bases = []
+            for scale in (s.strip() for s in opts["scales"].split(",") if s.strip()):
+                if scale not in fixturegen.SCALES:
+                    raise CommandError(f"Escala desconocida: {scale}")
+                base = DEFAULT_OUT / scale
+                if opts["regen"] or not data.fixture_path("students", base).exists():
+                    call_command("gen_fixtures", scale=scale, out=str(base), stdout=self.stdout)
+                bases.append(base)
+
+        original = data.DATA_DIR
+        resultados = []
+        try:
+            for base in bases:
+                if not data.fixture_path("students", base).exists():
+                    raise CommandError(f"{base} no tiene students/fixtures/students.json")
+                r = _bench_dir(base, opts["min_calls"], opts["min_seconds"])
+                resultados.append(r)
+                self.stdout.write(
+                    f"\n{base}: {r['students']} estudiantes, {r['asignaciones']} asignaciones, "
+                    f"{r['horarios']} horarios, {r['tramites']} trámites; warm_up {r['warm_up_s']} s"
+                )
+        finally:
+            data.use_data_dir(original)
+            clear_fragments()
+
+        self.stdout.write(f"\n{'función (us/llamada)':34}" + "".join(f"{Path(r['dir']).name:>12}" for r in resultados))
+        for nombre in resultados[0]["us_per_call"] if resultados else ():
+            self.stdout.write(f"{nombre:34}" + "".join(f"{r['us_per_call'][nombre]:>12.2f}" for r in resultados))
+
+        if opts["json"]:
+            Path(opts["json"]).parent.mkdir(parents=True, exist_ok=True)
+            with open(opts["json"], "w", encoding="utf-8") as f:
+                json.dump(resultados, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"\n Resultados guardados en {opts['json']}")
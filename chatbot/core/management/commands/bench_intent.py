@@ -0,0 +1,99 @@
+# core/management/commands/bench_intent.py
+# Uso (desde la carpeta chatbot/):
+#   python manage.py bench_intent                                # client, concurrencias 1,4,16
+#   python manage.py bench_intent --targets client,wsgi,asgi --requests 2000
+#   python manage.py bench_intent --baseline bench/intent-20250101-120000.json
+"""
+Throughput y latencia (p50/p95/p99) de /api/nlp/intent/ de punta a punta,
+con una mezcla fija de consultas (intenciones del corpus con typos y
+carnets reales, saludos y consultas fuera del dominio).
+
+El resultado se guarda en JSON (--out, por defecto bench/intent-<fecha>.json);
+con --baseline se compara contra otra corrida y el comando falla si hay
+regresiones. Ver core/loadbench.py.
+"""
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import loadbench
+from core.data import _student_index_by_carnet, warm_up
+
+
+def _levels(value: str):
+    try:
+        levels = tuple(int(x) for x in value.split(",") if x.strip())
+    except ValueError:
+        raise CommandError(f"--concurrency inválido: {value}")
+    if not levels or min(levels) < 1:
+        raise CommandError("--concurrency necesita enteros positivos")
+    return levels
+
+
+class Command(BaseCommand):
+    help = "Benchmark de punta a punta de /api/nlp/intent/ (client, WSGI, ASGI)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--targets", default="client", help=f"Separados por coma: {', '.join(loadbench.TARGETS)}")
+        parser.add_argument("--concurrency", default=",".join(map(str, loadbench.DEFAULT_CONCURRENCY)))
+        parser.add_argument("--requests", type=int, default=1000, help="Requests por nivel de concurrencia")
+        parser.add_argument("--warmup", type=int, default=20, help="Requests de calentamiento por hilo")
+        parser.add_argument("--workers", type=int, default=1, help="Workers del servidor local (wsgi/asgi)")
+        parser.add_argument("--seed", type=int, default=7)
+        parser.add_argument("--out", help="JSON de salida")
+        parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+
+    def handle(self, *args, **opts):
+        targets = [t.strip() for t in opts["targets"].split(",") if t.strip()]
+        desconocidos = set(targets) - set(loadbench.TARGETS)
+        if desconocidos:
+            raise CommandError(f"Objetivos desconocidos: {', '.join(sorted(desconocidos))}")
+        levels = _levels(opts["concurrency"])
+
+        warm_up()
+        queries = loadbench.query_mix(opts["requests"], seed=opts["seed"], carnets=_student_index_by_carnet())
+
+        reporte = {
+            "environment": loadbench.environment(),
+            "config": {
+                "requests": opts["requests"], "concurrency": list(levels),
+                "warmup": opts["warmup"], "workers": opts["workers"], "seed": opts["seed"],
+            },
+            "targets": [],
+        }
+        self.stdout.write(f"{'objetivo':10} {'c':>3} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errores':>8}")
+        for target in targets:
+            try:
+                res = loadbench.run_target(target, queries, levels, opts["workers"], opts["warmup"])
+            except RuntimeError as e:
+                self.stderr.write(f"{target}: {e}")
+                continue
+            reporte["targets"].append(res)
+            for r in res["runs"]:
+                self.stdout.write(
+                    f"{target:10} {r['concurrency']:>3} {r['throughput_rps']:>9.1f} "
+                    f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['errors']:>8}"
+                )
+
+        if opts["baseline"]:
+            try:
+                with open(opts["baseline"], encoding="utf-8") as f:
+                    base = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"No pude leer {opts['baseline']}: {e}")
+            reporte["baseline"] = opts["baseline"]
+            reporte["regressions"] = loadbench.compare(reporte, base)
+
+        out = Path(opts["out"] or Path(settings.BASE_DIR) / "bench" / f"intent-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+        self.stdout.write(f"\n Resultados guardados en {out}")
+
+        if reporte.get("regressions"):
+            for r in reporte["regressions"]:
+                self.stderr.write(f"REGRESIÓN {r}")
+            raise CommandError(f"{len(reporte['regressions'])} regresiones contra {opts['baseline']}")
@@ -0,0 +1,66 @@
+# core/management/commands/bench_render.py
+# Uso (desde la carpeta chatbot/):
+#   python manage.py bench_render
+#   python manage.py bench_render --runs 5000 --carnet 2021-0001I
+"""
+Tiempo de render por intención: JSONRenderer de DRF contra FastJSONRenderer.
+
+Las respuestas se arman con los mismos handlers que usa la vista, así que lo
+único que cambia entre columnas es el renderer.
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from core.data import _student_index_by_carnet, get_horario_estudiante, warm_up
+from core.handlers import HANDLERS, HandlerContext
+from core.renderers import FastJSONRenderer, orjson
+
+
+def _carnet_con_mas_horarios():
+    # El peor caso para el render: el estudiante con más grupos/horarios
+    mejor, total = None, -1
+    for carnet in _student_index_by_carnet():
+        info = get_horario_estudiante(carnet) or {}
+        n = sum(len(g.get("horarios") or []) for g in info.get("grupos") or [])
+        if n > total:
+            mejor, total = carnet, n
+    return mejor
+
+
+def _tiempo_us(render, payload, runs: int) -> float:
+    render(payload)  # calentamiento
+    t0 = time.perf_counter_ns()
+    for _ in range(runs):
+        render(payload)
+    return (time.perf_counter_ns() - t0) / runs / 1e3
+
+
+class Command(BaseCommand):
+    help = "Compara el tiempo de render JSON por intención (DRF vs rápido)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=2000)
+        parser.add_argument("--carnet", help="Carnet para las intenciones personales (por defecto el de más horarios)")
+
+    def handle(self, *args, **opts):
+        warm_up()
+        carnet = opts["carnet"] or _carnet_con_mas_horarios()
+        runs = opts["runs"]
+        drf = JSONRenderer().render
+        fast = FastJSONRenderer().render
+
+        self.stdout.write(f"backend rápido: {'orjson' if orjson is not None else 'json (stdlib)'}; carnet: {carnet}")
+        self.stdout.write(f"{'intent':20} {'bytes':>7} {'drf us':>9} {'rápido us':>10} {'x':>6}")
+        for intent, handler in HANDLERS.items():
+            ctx = HandlerContext(f"{intent} {carnet}", carnet=carnet, intent=intent)
+            payload = {"query": ctx.query, "intent": intent, "confidence": 0.9, "answer": handler(ctx)}
+            if json.loads(drf(payload)) != json.loads(fast(payload)):
+                raise CommandError(f"{intent}: los dos renderers no producen el mismo JSON")
+            t_drf = _tiempo_us(drf, payload, runs)
+            t_fast = _tiempo_us(fast, payload, runs)
+            self.stdout.write(
+                f"{intent:20} {len(fast(payload)):>7} {t_drf:>9.2f} {t_fast:>10.2f} {t_drf / t_fast:>6.1f}"
+            )
@@ -0,0 +1,124 @@
+# core/management/commands/bulk_load.py
+# Uso (desde la carpeta chatbot/):
+#   python manage.py bulk_load                                   # fixtures del proyecto (o NLP_DATA_DIR)
+#   python manage.py bulk_load --dir scale_fixtures/1m
+#   python manage.py bulk_load --dir scale_fixtures/1m --only students.student,becas.asignacionbeca
+#   python manage.py bulk_load --no-copy --batch-size 5000
+"""
+Carga fixtures grandes en la base sin pasar por loaddata: lectura en
+streaming, lotes con bulk_create/bulk_update (COPY en PostgreSQL) e
+idempotente por clave natural. Ver core/bulkload.py.
+
+Lo que solo hace falta para resolver FKs (modo "resolve") puede no estar
+en --dir (gen_fixtures no copia todo): se resuelve con el fixture del
+proyecto y, si tampoco está, con lo que ya hay en la base (modo "db").
+
+Reporta filas creadas/actualizadas por modelo y filas por segundo.
+"""
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import bulkload, data
+
+# De dónde resolver las dependencias que no están en --dir
+PROJECT_DIR = Path(settings.BASE_DIR)
+
+
+class Command(BaseCommand):
+    help = "Carga masiva de fixtures por lotes (idempotente por clave natural)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", help="Carpeta con <app>/fixtures/*.json (por defecto la de core/data.py)")
+        parser.add_argument("--only", help=f"Modelos separados por coma, de: {', '.join(bulkload.SPECS)}")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--max-batch-mb", type=int, default=64, help="Tope de bytes binarios por lote (horarios)")
+        parser.add_argument("--no-copy", action="store_true", help="bulk_create aunque la base sea PostgreSQL")
+        parser.add_argument("--json", help="Guardar el reporte en JSON")
+
+    def handle(self, *args, **opts):
+        if opts["batch_size"] < 1 or opts["max_batch_mb"] < 1:
+            raise CommandError("--batch-size y --max-batch-mb deben ser positivos")
+        base = Path(opts["dir"]) if opts["dir"] else data.DATA_DIR
+
+        pedidos = set(bulkload.SPECS)
+        if opts["only"]:
+            pedidos = {m.strip().lower() for m in opts["only"].split(",") if m.strip()}
+            desconocidos = pedidos - set(bulkload.SPECS)
+            if desconocidos:
+                raise CommandError(f"Modelos desconocidos: {', '.join(sorted(desconocidos))}")
+        necesarios = pedidos | bulkload.dependencies(pedidos)
+        # En el orden de SPECS (dependencias primero); lo no pedido solo se resuelve
+        modes = {label: ("write" if label in pedidos else "resolve") for label in bulkload.SPECS if label in necesarios}
+
+        rutas, desde_db = {}, []
+        for label, mode in modes.items():
+            path = base / bulkload.FIXTURE_OF[label]
+            if not path.exists() and mode == "resolve":
+                path = PROJECT_DIR / bulkload.FIXTURE_OF[label]
+                if not path.exists():
+                    desde_db.append(label)
+                    continue
+            rutas[label] = path
+        archivos = list(dict.fromkeys(rutas.values()))
+        faltan = [str(p) for p in archivos if not p.exists()]
+        if faltan:
+            raise CommandError(f"No existen: {', '.join(faltan)}")
+
+        use_copy = not opts["no_copy"] and bulkload.can_copy()
+        self.stdout.write(f"Cargando desde {base} ({'COPY' if use_copy else 'bulk_create'})")
+
+        reporte = {"dir": str(base), "copy": use_copy, "files": [], "models": {}}
+        total_filas = total_s = 0
+        ids = {label: bulkload.IdMap() for label in bulkload.REFERENCED}
+        for label in desde_db:
+            n = bulkload.ids_from_db(label, ids[label])
+            reporte["models"][label] = {"rows": n, "created": 0, "updated": 0, "skipped": 0, "mode": "db", "db_s": 0.0}
+            self.stdout.write(f"  {label}: sin fixture, {n} filas de la base con su propio id")
+        for path in archivos:
+            # Un loader por archivo: cada pasada solo guarda los modelos de ese archivo
+            presentes = {label: modes[label] for label, ruta in rutas.items() if ruta == path}
+            loader = bulkload.Loader(
+                presentes, batch_size=opts["batch_size"],
+                max_batch_bytes=opts["max_batch_mb"] << 20, use_copy=use_copy, ids=ids,
+            )
+            try:
+                _, segundos = bulkload.load_file(path, loader)
+            except ValueError as e:
+                raise CommandError(f"{path}: {e}")
+            filas = sum(s["rows"] for label, s in loader.stats.items() if presentes[label] == "write")
+            total_filas += filas
+            total_s += segundos
+            reporte["files"].append({
+                "path": str(path), "seconds": round(segundos, 3), "rows": filas,
+                "rows_per_s": round(filas / segundos, 1) if segundos else None,
+                "mb_per_s": round(path.stat().st_size / 1e6 / segundos, 2) if segundos else None,
+            })
+            for label, s in loader.stats.items():
+                reporte["models"][label] = {**s, "mode": presentes[label], "db_s": round(s["db_s"], 3)}
+            self.stdout.write(
+                f"  {path.relative_to(base) if path.is_relative_to(base) else path}: "
+                f"{filas} filas en {segundos:.2f} s ({filas / segundos if segundos else 0:,.0f} filas/s)"
+            )
+
+        self.stdout.write(f"\n{'modelo':24}{'modo':>9}{'filas':>10}{'creadas':>10}{'actualiz.':>10}{'omitidas':>10}{'db s':>8}")
+        for label, s in reporte["models"].items():
+            self.stdout.write(
+                f"{label:24}{s['mode']:>9}{s['rows']:>10}{s['created']:>10}{s['updated']:>10}"
+                f"{s['skipped']:>10}{s['db_s']:>8.2f}"
+            )
+        reporte["rows"] = total_filas
+        reporte["seconds"] = round(total_s, 3)
+        reporte["rows_per_s"] = round(total_filas / total_s, 1) if total_s else None
+        self.stdout.write(f"\nTotal: {total_filas} filas en {total_s:.2f} s ({reporte['rows_per_s'] or 0:,.0f} filas/s)")
+        omitidas = sum(s["skipped"] for s in reporte["models"].values())
+        if omitidas:
+            self.stderr.write(f"{omitidas} filas omitidas: apuntan a objetos que no están en los fixtures")
+
+        if opts["json"]:
+            Path(opts["json"]).parent.mkdir(parents=True, exist_ok=True)
+            with open(opts["json"], "w", encoding="utf-8") as f:
+                json.dump(reporte, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"\n Reporte guardado en {opts['json']}")
@@ -0,0 +1,163 @@
+# core/management/commands/cluster_fallbacks.py
+# Uso (desde la carpeta chatbot/):
+#   python manage.py cluster_fallbacks
+#   python manage.py cluster_fallbacks --log fallback_queries.jsonl --clusters 80 --top 20
+#   python manage.py cluster_fallbacks --json ml/data/fallback_clusters.json
+"""
+Agrupa las consultas del log de fallbacks para ver qué no estamos entendiendo.
+
+Lee el log en bloques (el actual y los rotados, planos o .gz) con la misma
+normalización del entrenamiento (y los carnets reemplazados por {carnet}),
+los pasa a n-gramas de caracteres con hashing (tamaño fijo, sin vocabulario)
+y ajusta MiniBatchKMeans con partial_fit bloque por bloque. Una segunda
+pasada asigna cada consulta a su grupo y cuenta.
+
+La memoria no depende del largo del log: centros (clusters x n_features) más,
+por grupo, un contador acotado de consultas frecuentes y de intenciones.
+"""
+import json
+import re
+from collections import Counter
+from functools import lru_cache
+from itertools import islice
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from ml.corpus import CARNET_PLACEHOLDER
+from ml.retrain_fallbacks import DEFAULT_LOG_PATH, iter_fallbacks, log_files
+from ml.text import normalize
+
+
+class TopK:
+    """
+    Consultas más frecuentes de un grupo con memoria fija (Misra-Gries):
+    guarda como mucho `k` textos; los conteos son cotas inferiores.
+    """
+    __slots__ = ("k", "counts")
+
+    def __init__(self, k: int):
+        self.k = k
+        self.counts = {}
+
+    def add(self, item):
+        if item in self.counts:
+            self.counts[item] += 1
+        elif len(self.counts) < self.k:
+            self.counts[item] = 1
+        else:
+            for key in list(self.counts):
+                self.counts[key] -= 1
+                if not self.counts[key]:
+                    del self.counts[key]
+
+    def most_common(self, n: int):
+        return sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:n]
+
+
+# Ya normalizado (minúsculas): cada carnet distinto no debe contar como otra consulta
+_CARNET_NORM = re.compile(r"\b20\d{2}-\d{4}i?\b")
+
+
+@lru_cache(maxsize=100_000)  # las consultas se repiten mucho; el caché está acotado
+def _normalize(query: str) -> str:
+    return _CARNET_NORM.sub(CARNET_PLACEHOLDER, normalize(query))
+
+
+def _iter_rows(paths):
+    for path in paths:
+        for entry in iter_fallbacks(path):
+            texto = _normalize(entry["query"])
+            if texto:
+                yield texto, entry.get("intent") or "", (entry.get("meta") or {}).get("reason") or ""
+
+
+def _chunks(it, size: int):
+    it = iter(it)
+    while True:
+        bloque = list(islice(it, size))
+        if not bloque:
+            return
+        yield bloque
+
+
+class Command(BaseCommand):
+    help = "Agrupa el log de fallbacks (MiniBatchKMeans sobre n-gramas con hashing)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--log", default=DEFAULT_LOG_PATH)
+        parser.add_argument("--current-only", action="store_true", help="Ignorar los logs rotados")
+        parser.add_argument("--clusters", type=int, default=50)
+        parser.add_argument("--chunk-size", type=int, default=10000)
+        parser.add_argument("--n-features", type=int, default=2 ** 14)
+        parser.add_argument("--top", type=int, default=15, help="Grupos a mostrar")
+        parser.add_argument("--samples", type=int, default=5, help="Consultas de ejemplo por grupo")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--json", help="Guardar el resultado en JSON")
+
+    def handle(self, *args, **opts):
+        paths = log_files(opts["log"], include_rotated=not opts["current_only"])
+        if not paths:
+            raise CommandError(f"No hay log de fallbacks en {opts['log']}")
+
+        vec = HashingVectorizer(
+            analyzer="char_wb", ngram_range=(3, 5), n_features=opts["n_features"],
+            alternate_sign=False, norm="l2",
+        )
+        chunk_size = max(opts["chunk_size"], opts["clusters"])
+
+        # 1) Ajuste incremental
+        km = None
+        for bloque in _chunks(_iter_rows(paths), chunk_size):
+            X = vec.transform([t for t, _, _ in bloque])
+            if km is None:
+                # Con un log chico no puede haber más grupos que consultas
+                k = min(opts["clusters"], X.shape[0])
+                km = MiniBatchKMeans(n_clusters=k, random_state=opts["seed"], n_init=3, batch_size=chunk_size)
+            km.partial_fit(X)
+        if km is None:
+            raise CommandError("El log no tiene consultas")
+
+        # 2) Asignación y conteo
+        k = km.n_clusters
+        totales = np.zeros(k, dtype=np.int64)
+        textos = [TopK(max(opts["samples"] * 4, 20)) for _ in range(k)]
+        intents = [Counter() for _ in range(k)]
+        razones = [Counter() for _ in range(k)]
+        for bloque in _chunks(_iter_rows(paths), chunk_size):
+            labels = km.predict(vec.transform([t for t, _, _ in bloque]))
+            totales += np.bincount(labels, minlength=k)
+            for (texto, intent, razon), c in zip(bloque, labels):
+                textos[c].add(texto)
+                intents[c][intent] += 1
+                razones[c][razon] += 1
+
+        total = int(totales.sum())
+        grupos = []
+        for c in np.argsort(-totales)[: opts["top"]]:
+            if not totales[c]:
+                break
+            grupos.append({
+                "cluster": int(c),
+                "count": int(totales[c]),
+                "share": round(float(totales[c]) / total, 4),
+                "intents": dict(intents[c].most_common(3)),
+                "reasons": dict(razones[c].most_common(3)),
+                "samples": [t for t, _ in textos[c].most_common(opts["samples"])],
+            })
+
+        self.stdout.write(f"{total} consultas en {len(paths)} archivo(s), {k} grupos")
+        for g in grupos:
+            self.stdout.write(
+                f"\n#{g['cluster']:<3} {g['count']:>8} ({g['share']:.1%})  intents: "
+                + ", ".join(f"{i or '-'}={n}" for i, n in g["intents"].items())
+            )
+            for t in g["samples"]:
+                self.stdout.write(f"      · {t}")
+
+        if opts["json"]:
+            with open(opts["json"], "w", encoding="utf-8") as f:
+                json.dump({"total": total, "files": paths, "clusters": grupos}, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"\n Resultado guardado en {opts['json']}")
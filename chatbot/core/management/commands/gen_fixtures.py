@@ -0,0 +1,50 @@
+# core/management/commands/gen_fixtures.py
+# Uso (desde la carpeta chatbot/):
+#   python manage.py gen_fixtures --scale 100k                     # -> scale_fixtures/100k/
+#   python manage.py gen_fixtures --students 250000 --periods 16 --out /tmp/fx
+#   NLP_DATA_DIR=scale_fixtures/100k python manage.py runserver     # servir ese juego
+"""
+Genera fixtures sintéticos consistentes a escala (core/fixturegen.py), con la
+misma estructura de carpetas que los reales para poder apuntar NLP_DATA_DIR
+ahí o pasarlos a bench_data.
+"""
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import fixturegen
+
+DEFAULT_OUT = Path(settings.BASE_DIR) / "scale_fixtures"
+
+
+class Command(BaseCommand):
+    help = "Genera students/asignaciones/horarios/trámites sintéticos a escala"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=sorted(fixturegen.SCALES), help="Tamaño predefinido")
+        parser.add_argument("--students", type=int, help="Cantidad exacta de estudiantes")
+        parser.add_argument("--periods", type=int, default=10, help="Períodos de horarios/historial de becas")
+        parser.add_argument("--tramites", type=int, default=200, help="Trámites sintéticos además de los reales")
+        parser.add_argument("--image-bytes", type=int, default=4096, help="Tamaño de la imagen de cada horario")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--out", help=f"Carpeta destino (por defecto {DEFAULT_OUT}/<escala>)")
+
+    def handle(self, *args, **opts):
+        if opts["students"] is None and opts["scale"] is None:
+            raise CommandError("Indica --scale o --students")
+        students = opts["students"] or fixturegen.SCALES[opts["scale"]]
+        out = Path(opts["out"] or DEFAULT_OUT / (opts["scale"] or str(students)))
+
+        t0 = time.perf_counter()
+        try:
+            conteos = fixturegen.generate(
+                out, students, periods=opts["periods"], tramites=opts["tramites"],
+                image_bytes=opts["image_bytes"], seed=opts["seed"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        for nombre, n in conteos.items():
+            self.stdout.write(f"{nombre:13} {n:>10}")
+        self.stdout.write(f"\n Fixtures en {out} ({time.perf_counter() - t0:.1f} s)")
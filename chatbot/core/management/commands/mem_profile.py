@@ -0,0 +1,262 @@
+# core/management/commands/mem_profile.py
+# Uso (desde la carpeta chatbot/):
+#   python manage.py mem_profile
+#   python manage.py mem_profile --rounds 50 --per-round 1000 --json bench/mem.json
+#   NLP_DATA_DIR=scale_fixtures/100k python manage.py mem_profile --top 30
+"""
+De qué está hecha la memoria de un worker en régimen estable.
+
+Corre bajo tracemalloc desde el arranque del intérprete (si no lo está, se
+vuelve a lanzar con -X tracemalloc) y toma fotos en cada fase:
+
+1. boot:   Django + imports
+2. warm:   fixtures e índices (core/data.warm_up) y el modelo cargado
+3. replay: rondas de la mezcla de consultas de core/loadbench por el
+           WSGIHandler de Django (como un servidor de verdad), con
+           conversation_id para que las sesiones también crezcan. No se usa
+           django.test.Client: deja ~4 weakref.finalize por request que no
+           suelta, y el detector terminaba midiendo al propio cliente
+
+Si el store de sesiones tiene tope, durante el replay se baja a lo que entra
+en una ronda: se llena en el calentamiento y las rondas estables pasan por el
+desalojo (que tiene que soltar lo que tenía). Con el tope de producción el
+store seguía llenándose todo el perfil y su crecimiento, acotado pero
+repartido entre varios archivos, parecía una fuga en el total trazado.
+
+Reporta bytes por subsistema (data por función, model, caches, logs, django)
+en cada fase, los sitios que más asignan y, con las rondas del replay, la
+pendiente del total trazado y de cada lru_cache del proyecto: si algo sigue
+creciendo después de las rondas de calentamiento, se marca como crecimiento
+sin límite (y el comando falla con --fail-on-growth).
+
+Las fotos completas (memprofile.breakdown, agrupado por traceback) son
+caras con cientos de miles de asignaciones vivas: se toman solo en boot,
+warm y al final. En cada ronda se guarda el total trazado
+(tracemalloc.get_traced_memory, gratis) y, si ese total sigue creciendo, se
+reparte por archivo comparando la foto del fin del calentamiento con la
+final (memprofile.by_file).
+"""
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import tracemalloc
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Alcanza para llegar de json/numpy/django hasta el frame del proyecto que asignó
+FRAMES = 16
+WARM_ROUNDS = 3
+# Crecimiento por ronda por debajo de esto se considera ruido
+GROWTH_SLACK_BYTES = 16 * 1024
+CONVERSATION_TURNS = 4
+INTENT_PATH = "/api/nlp/intent/"
+# Su crecimiento lo juzga el hallazgo "sessions", que conoce el tope
+SESSIONS_FILE = "core/sessions.py"
+
+
+def _post(handler, factory, body) -> int:
+    """
+    Un POST a /api/nlp/intent/ por el WSGIHandler; devuelve el código.
+    """
+    environ = factory.post(INTENT_PATH, json.dumps(body), content_type="application/json").environ
+    estado = []
+    response = handler(environ, lambda status, headers, exc_info=None: estado.append(status))
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()  # request_finished, como lo hace el servidor
+    return int(estado[0].split()[0])
+
+
+def _mb(n) -> str:
+    return f"{(n or 0) / 1024 / 1024:8.2f} MB"
+
+
+class Command(BaseCommand):
+    help = "Perfil de memoria del worker (tracemalloc) y detección de crecimiento sin límite"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=20, help="Rondas de replay")
+        parser.add_argument("--per-round", type=int, default=500, help="Consultas por ronda")
+        parser.add_argument("--top", type=int, default=20, help="Sitios de asignación a mostrar")
+        parser.add_argument("--seed", type=int, default=7)
+        parser.add_argument("--json", help="Guardar el reporte en JSON")
+        parser.add_argument("--fail-on-growth", action="store_true")
+
+    def handle(self, *args, **opts):
+        if not tracemalloc.is_tracing():
+            # Para ver lo que cuesta el arranque hay que trazar desde el inicio
+            self.stdout.write(f"Relanzando con -X tracemalloc={FRAMES} ...")
+            cmd = [sys.executable, "-X", f"tracemalloc={FRAMES}", *sys.argv]
+            code = subprocess.run(cmd, env=os.environ.copy()).returncode
+            if code:
+                raise CommandError(f"mem_profile terminó con código {code}")
+            return
+
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.test import RequestFactory
+
+        from core import memprofile
+        from core.data import _student_index_by_carnet, warm_up
+        from core.loadbench import query_mix
+        from core.nlp import predecir_intencion
+        from core.sessions import SESSIONS
+
+        fases = {}
+
+        def foto(nombre, snapshot=None):
+            subsistemas, sitios = memprofile.breakdown(snapshot or memprofile.take_snapshot())
+            fases[nombre] = {"subsystems": subsistemas, "traced": sum(subsistemas.values()),
+                             "rss": memprofile.rss_bytes()}
+            return sitios
+
+        foto("boot")
+        warm_up()
+        predecir_intencion("hola")
+        foto("warm")
+
+        handler = WSGIHandler()
+        factory = RequestFactory(HTTP_HOST="localhost")
+        queries = query_mix(opts["per_round"], seed=opts["seed"], carnets=_student_index_by_carnet())
+        rng = random.Random(opts["seed"])
+        # Por ronda solo el total trazado (gratis); por archivo, una foto al
+        # terminar el calentamiento y otra al final
+        totales, caches_hist, sesiones_hist = [], [], []
+        base = None
+        conv, turnos = None, 0
+        errores = 0
+        tope_original = tope = getattr(SESSIONS, "max_sessions", None)
+        if tope is not None:
+            tope = SESSIONS.max_sessions = max(1, min(tope, opts["per_round"] // CONVERSATION_TURNS))
+        try:
+            for ronda in range(opts["rounds"]):
+                rng.shuffle(queries)
+                for q in queries:
+                    if turnos == 0:
+                        conv, turnos = f"mem-{rng.getrandbits(64):016x}", rng.randint(1, CONVERSATION_TURNS)
+                    turnos -= 1
+                    errores += _post(handler, factory, {"query": q, "conversation_id": conv}) != 200
+                gc.collect()
+                totales.append(tracemalloc.get_traced_memory()[0])
+                caches_hist.append({k: v.currsize for k, v in memprofile.project_lru_caches().items()})
+                sesiones_hist.append(len(SESSIONS) if hasattr(SESSIONS, "__len__") else None)
+                if ronda == WARM_ROUNDS - 1:
+                    base = memprofile.by_file(memprofile.take_snapshot())
+        finally:
+            if tope is not None:
+                SESSIONS.max_sessions = tope_original
+
+        snapshot = memprofile.take_snapshot()
+        sitios = foto("final", snapshot)
+        final = fases.pop("final")
+        por_archivo = None
+        if base is not None:
+            por_archivo = (base, memprofile.by_file(snapshot), opts["rounds"] - WARM_ROUNDS)
+
+        crecimiento = self._growth(totales, por_archivo, caches_hist, sesiones_hist, tope)
+        reporte = {
+            "phases": fases,
+            "final": final,
+            "errors": errores,
+            "top_sites": [
+                {"subsystem": s, "site": site, "bytes": b, "blocks": c}
+                for (s, site), (b, c) in sorted(sitios.items(), key=lambda kv: -kv[1][0])[:opts["top"]]
+            ],
+            "lru_caches": {k: v._asdict() for k, v in memprofile.project_lru_caches().items()},
+            "sessions": sesiones_hist[-1] if sesiones_hist else None,
+            "sessions_max": tope,
+            "growth": crecimiento,
+        }
+        self._print(reporte)
+
+        if opts["json"]:
+            Path(opts["json"]).parent.mkdir(parents=True, exist_ok=True)
+            with open(opts["json"], "w", encoding="utf-8") as f:
+                json.dump(reporte, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"\n Reporte guardado en {opts['json']}")
+        if opts["fail_on_growth"] and crecimiento:
+            raise CommandError(f"{len(crecimiento)} posibles crecimientos sin límite")
+
+    def _growth(self, totales, por_archivo, caches_hist, sesiones_hist, tope_sesiones):
+        """
+        Lo que sigue subiendo después de las rondas de calentamiento. Si el
+        total trazado crece, se reparte por archivo con la diferencia entre la
+        foto del fin del calentamiento y la final. Un lru_cache o un store de
+        sesiones solo cuenta si no tiene tope (o lo pasó): lo que crece
+        core/sessions.py bajo el tope no es crecimiento sin límite.
+        """
+        from core import memprofile
+
+        estables = totales[WARM_ROUNDS:]
+        if len(estables) < 3:
+            return []
+        sesiones = [s for s in sesiones_hist[WARM_ROUNDS:] if s is not None]
+        sin_tope = tope_sesiones is None or bool(sesiones and sesiones[-1] > tope_sesiones)
+
+        por_ronda = {}
+        if por_archivo is not None:
+            base, final, rondas = por_archivo
+            for nombre in set(base) | set(final):
+                por_ronda[nombre] = (final.get(nombre, 0) - base.get(nombre, 0)) / rondas
+        acotado = 0.0
+        if not sin_tope:
+            for nombre in [n for n in por_ronda if n.replace("\\", "/").endswith(SESSIONS_FILE)]:
+                acotado += max(por_ronda.pop(nombre), 0.0)
+
+        hallazgos = []
+        m = memprofile.slope(estables) - acotado
+        if m > GROWTH_SLACK_BYTES and estables[-1] > estables[0]:
+            hallazgos.append({"kind": "traced", "name": "total trazado", "bytes_per_round": round(m)})
+            for nombre in sorted(por_ronda):
+                if por_ronda[nombre] > GROWTH_SLACK_BYTES:
+                    hallazgos.append({"kind": "file", "name": memprofile.short_path(nombre),
+                                      "subsystem": memprofile.file_subsystem(nombre),
+                                      "bytes_per_round": round(por_ronda[nombre])})
+        caches = caches_hist[WARM_ROUNDS:]
+        for nombre in sorted({k for c in caches for k in c}):
+            serie = [c.get(nombre, 0) for c in caches]
+            info = memprofile.project_lru_caches().get(nombre)
+            if info is not None and info.maxsize is None and serie[-1] > serie[0]:
+                hallazgos.append({"kind": "lru_cache", "name": nombre,
+                                  "entries_per_round": round(memprofile.slope(serie), 1)})
+        if len(sesiones) >= 3 and sin_tope and sesiones[-1] > sesiones[0]:
+            hallazgos.append({"kind": "sessions", "name": "SESSIONS",
+                              "entries_per_round": round(memprofile.slope(sesiones), 1)})
+        return hallazgos
+
+    def _print(self, r):
+        nombres = sorted({k for f in r["phases"].values() for k in f["subsystems"]} | set(r["final"]["subsystems"]))
+        fases = list(r["phases"]) + ["final"]
+        datos = {**r["phases"], "final": r["final"]}
+        self.stdout.write(f"{'subsistema':34}" + "".join(f"{f:>12}" for f in fases))
+        for n in nombres:
+            self.stdout.write(f"{n:34}" + "".join(_mb(datos[f]["subsystems"].get(n)) + " " for f in fases))
+        self.stdout.write(f"{'total trazado':34}" + "".join(_mb(datos[f]["traced"]) + " " for f in fases))
+        self.stdout.write(f"{'RSS':34}" + "".join(_mb(datos[f]["rss"]) + " " for f in fases))
+
+        self.stdout.write("\nSitios que más asignan (al final):")
+        for s in r["top_sites"]:
+            self.stdout.write(f"  {_mb(s['bytes'])} {s['blocks']:>9} bloques  {s['subsystem']:28} {s['site']}")
+
+        self.stdout.write("\nlru_cache del proyecto (entradas / máximo):")
+        for nombre, info in sorted(r["lru_caches"].items()):
+            self.stdout.write(f"  {info['currsize']:>7} / {str(info['maxsize']):>7}  {nombre}")
+        if r["sessions"] is not None:
+            self.stdout.write(f"  sesiones en memoria: {r['sessions']} / {r['sessions_max']}")
+        if r["errors"]:
+            self.stdout.write(f"\n{r['errors']} respuestas no-200 durante el replay")
+
+        if r["growth"]:
+            self.stdout.write("\nPOSIBLE CRECIMIENTO SIN LÍMITE:")
+            for g in r["growth"]:
+                por = g.get("bytes_per_round") or g.get("entries_per_round")
+                unidad = "bytes" if "bytes_per_round" in g else "entradas"
+                donde = f"{g['name']} ({g['subsystem']})" if "subsystem" in g else g["name"]
+                self.stdout.write(f"  {g['kind']:10} {donde}: +{por} {unidad}/ronda")
+        else:
+            self.stdout.write("\nSin crecimiento sostenido después del calentamiento.")
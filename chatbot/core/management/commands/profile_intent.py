@@ -0,0 +1,92 @@
+# core/management/commands/profile_intent.py
+# Uso (desde la carpeta chatbot/):
+#   python manage.py profile_intent consultas.txt
+#   python manage.py profile_intent consultas.txt --mode sample --repeat 20
+#   python manage.py profile_intent --token              # cabecera X-NLP-Profile para producción
+"""
+Perfila una lista de consultas (una por línea) por el mismo camino que
+/api/nlp/intent/: cada consulta es un POST armado con APIRequestFactory que
+pasa por la vista nlp_intent y su render, dentro de core.profiling.profile().
+
+Deja un .prof (cprofile) o .collapsed (sample) en NLP_PROFILE_DIR y muestra
+lo más caro y la latencia por consulta.
+"""
+import io
+import pstats
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+
+from core import profiling
+from core.data import warm_up
+from core.views import nlp_intent
+
+TOP = 25
+
+
+def _call(factory, q: str):
+    request = factory.post("/api/nlp/intent/", {"query": q}, format="json")
+    response = nlp_intent(request)
+    response.render()
+    return response
+
+
+class Command(BaseCommand):
+    help = "Perfila consultas por el camino de /api/nlp/intent/ (cProfile o muestreo)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", nargs="?", help="Consultas, una por línea")
+        parser.add_argument("--mode", choices=profiling.MODES, default="cprofile")
+        parser.add_argument("--repeat", type=int, default=1, help="Veces que se corre cada consulta")
+        parser.add_argument("--token", action="store_true", help="Solo imprimir un token para X-NLP-Profile")
+
+    def handle(self, *args, **opts):
+        if opts["token"]:
+            try:
+                token = profiling.make_token(opts["mode"])
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(f"{profiling.HEADER}: {token}")
+            self.stdout.write(f"(válido {profiling.TOKEN_MAX_AGE} s)")
+            return
+        if not opts["archivo"]:
+            raise CommandError("Falta el archivo de consultas (o --token)")
+        if opts["repeat"] < 1:
+            raise CommandError("--repeat debe ser positivo")
+        try:
+            with open(opts["archivo"], encoding="utf-8") as f:
+                consultas = [ln.strip() for ln in f if ln.strip()]
+        except OSError as e:
+            raise CommandError(str(e))
+        if not consultas:
+            raise CommandError("El archivo no tiene consultas")
+
+        factory = APIRequestFactory()
+        # Fuera del perfil: carga de fixtures y del modelo
+        warm_up()
+        _call(factory, consultas[0])
+
+        tiempos = {}
+        with profiling.profile(opts["mode"], "offline") as run:
+            for q in consultas:
+                t0 = time.perf_counter_ns()
+                for _ in range(opts["repeat"]):
+                    response = _call(factory, q)
+                tiempos[q] = ((time.perf_counter_ns() - t0) / opts["repeat"] / 1e6, response.status_code)
+
+        self.stdout.write(f"{'ms':>9}  {'status':>6}  consulta")
+        for q, (ms, code) in sorted(tiempos.items(), key=lambda kv: -kv[1][0]):
+            self.stdout.write(f"{ms:9.3f}  {code:>6}  {q}")
+
+        self.stdout.write("")
+        if run.mode == "cprofile":
+            out = io.StringIO()
+            pstats.Stats(str(run.path), stream=out).sort_stats("cumulative").print_stats(TOP)
+            self.stdout.write(out.getvalue())
+        else:
+            with open(run.path, encoding="utf-8") as f:
+                for linea in list(f)[:TOP]:
+                    pila, n = linea.rsplit(" ", 1)
+                    self.stdout.write(f"{n.strip():>6}  …{pila[-110:]}")
+        self.stdout.write(f"\n Perfil guardado en {run.path}")
@@ -0,0 +1,133 @@
+# core/management/commands/replay_capture.py
+# Uso (desde la carpeta chatbot/):
+#   NLP_CAPTURE=1 gunicorn ...                     # capturar en producción (core/capture.py)
+#   python manage.py replay_capture                # captura de NLP_CAPTURE_PATH a 1x contra WSGI local
+#   python manage.py replay_capture --speed 5 --workers 4 --duration 600
+#   python manage.py replay_capture capture/intent_capture.20250101-120000.jsonl.gz --target asgi
+#   python manage.py replay_capture --url 127.0.0.1:8000 --speed 10 --out bench/replay.json
+"""
+Reproduce tráfico capturado de /api/nlp/intent/ contra un servidor local en
+lazo abierto, a la velocidad original (--speed 1) o N veces más rápido, y
+reporta la distribución de latencia, errores por código y la línea de
+tiempo por segundo. Ver core/replay.py.
+"""
+import json
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import capture, loadbench, replay
+from core.data import _student_index_by_carnet, warm_up
+
+REPLAY_TARGETS = ("wsgi", "asgi", "client")
+
+
+class Command(BaseCommand):
+    help = "Replay de una captura de /api/nlp/intent/ en lazo abierto a 1x/Nx"
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="*", help="Capturas .jsonl/.jsonl.gz (por defecto NLP_CAPTURE_PATH y sus rotaciones)")
+        parser.add_argument("--speed", type=float, default=1.0, help="1 = ritmo original, 5 = cinco veces más rápido")
+        parser.add_argument("--target", default="wsgi", help=f"De {', '.join(REPLAY_TARGETS)}")
+        parser.add_argument("--url", help="host:puerto de un servidor ya levantado (en vez de --target)")
+        parser.add_argument("--workers", type=int, default=1, help="Workers del servidor local")
+        parser.add_argument("--max-in-flight", type=int, default=64, help="Requests simultáneos como máximo")
+        parser.add_argument("--warmup", type=int, default=200, help="Requests sin medir antes de empezar")
+        parser.add_argument("--limit", type=int, help="Solo los primeros N requests")
+        parser.add_argument("--duration", type=float, help="Solo los primeros N segundos de la captura")
+        parser.add_argument("--out", help="JSON de salida")
+        parser.add_argument("--max-error-rate", type=float, help="Fallar si la tasa de errores la supera (0-1)")
+
+    def handle(self, *args, **opts):
+        if opts["target"] not in REPLAY_TARGETS:
+            raise CommandError(f"Objetivo desconocido: {opts['target']}")
+        if opts["speed"] <= 0 or opts["max_in_flight"] < 1:
+            raise CommandError("--speed y --max-in-flight deben ser positivos")
+        if opts["warmup"] < 0:
+            raise CommandError("--warmup no puede ser negativo")
+
+        archivos = [Path(f) for f in opts["files"]] or capture.capture_files()
+        faltan = [str(f) for f in archivos if not f.exists()]
+        if faltan:
+            raise CommandError(f"No existen: {', '.join(faltan)}")
+        registros = capture.read_capture(archivos)
+        if not registros:
+            raise CommandError("La captura está vacía (¿se corrió con NLP_CAPTURE=1?)")
+
+        warm_up()
+        pasos = replay.plan(
+            registros, speed=opts["speed"], carnets=_student_index_by_carnet(),
+            limit=opts["limit"], duration=opts["duration"],
+        )
+        capturados = registros[:len(pasos)]
+        self.stdout.write(
+            f"{len(pasos)} requests de {len(archivos)} archivo(s), "
+            f"{pasos[-1][0]:.1f} s a {opts['speed']}x"
+        )
+
+        if opts["url"]:
+            host, _, port = opts["url"].rpartition(":")
+            if not host or not port.isdigit():
+                raise CommandError("--url debe ser host:puerto")
+            servidor = opts["url"]
+            res = replay.run(lambda: loadbench.HTTPSender(host, int(port), loadbench.INTENT_PATH),
+                             pasos, opts["max_in_flight"], opts["warmup"])
+        elif opts["target"] == "client":
+            servidor = "django.test.Client"
+            res = replay.run(loadbench.DjangoClientSender, pasos, opts["max_in_flight"], opts["warmup"])
+        else:
+            try:
+                with loadbench.LocalServer(opts["target"], opts["workers"]) as srv:
+                    servidor = srv.server
+                    res = replay.run(srv.sender, pasos, opts["max_in_flight"], opts["warmup"])
+            except RuntimeError as e:
+                raise CommandError(str(e))
+
+        reporte = {
+            "environment": loadbench.environment(),
+            "config": {
+                "files": [str(f) for f in archivos], "speed": opts["speed"], "target": opts["target"],
+                "server": servidor, "workers": opts["workers"], "max_in_flight": opts["max_in_flight"],
+                "warmup": opts["warmup"],
+            },
+            "captured": {
+                "requests": len(capturados),
+                "seconds": round(capturados[-1]["t"] - capturados[0]["t"], 3),
+                "status": dict(Counter(str(r.get("status")) for r in capturados)),
+                "latency": replay._dist([r["latency_ms"] for r in capturados if "latency_ms" in r]),
+            },
+            "replay": res,
+        }
+        self._print(reporte)
+
+        out = Path(opts["out"] or Path(settings.BASE_DIR) / "bench" / f"replay-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+        self.stdout.write(f"\n Resultados guardados en {out}")
+
+        if opts["max_error_rate"] is not None and res["error_rate"] > opts["max_error_rate"]:
+            raise CommandError(f"Tasa de errores {res['error_rate']:.2%} > {opts['max_error_rate']:.2%}")
+
+    def _print(self, r):
+        res, cap = r["replay"], r["captured"]
+        self.stdout.write(
+            f"\nofrecido {res['offered_rps'] or 0:.1f} rps, logrado {res['achieved_rps']:.1f} rps "
+            f"({res['requests']} requests en {res['seconds']:.1f} s)"
+        )
+        self.stdout.write(f"{'':14}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'p99.9':>9}{'max':>9}  (ms)")
+        for nombre, d in (("latencia", res["latency"]), ("servicio", res["service"]),
+                          ("lag", res["lag"]), ("capturada", cap["latency"])):
+            self.stdout.write(
+                f"{nombre:14}{d['p50_ms']:>9.2f}{d['p90_ms']:>9.2f}{d['p95_ms']:>9.2f}"
+                f"{d['p99_ms']:>9.2f}{d['p999_ms']:>9.2f}{d['max_ms']:>9.2f}"
+            )
+        self.stdout.write(f"\nerrores: {res['errors']} ({res['error_rate']:.2%})  códigos: {res['status']}")
+        peores = sorted(res["timeline"], key=lambda s: -s["p95_ms"])[:5]
+        if peores:
+            self.stdout.write("segundos con peor p95: " + ", ".join(
+                f"t={s['second']}s {s['p95_ms']:.1f} ms ({s['requests']} req, {s['errors']} err)" for s in peores
+            ))
@@ -0,0 +1,133 @@
+# core/management/commands/reporte_estudiantes.py
+# Uso (desde la carpeta chatbot/):
+#   python manage.py reporte_estudiantes                              # texto, todos los becados
+#   python manage.py reporte_estudiantes --format csv --output becados.csv
+#   python manage.py reporte_estudiantes --format jsonl --periodo "I Semestre 2025" --beca alimenticia
+"""
+Estudiantes con becas activas (reemplaza al script reporte_estudiantes.py).
+
+Una sola consulta: las asignaciones activas con el estudiante y la beca por
+JOIN (values_list), ordenadas por carnet y leídas con .iterator(chunk_size)
+para no cargar todo en memoria. Las filas de un mismo estudiante llegan
+seguidas, así que se agrupan al vuelo y cada estudiante se escribe apenas
+termina: la memoria no depende de cuántos estudiantes haya.
+"""
+import csv
+import json
+import time
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from becas.models import AsignacionBeca, Beca
+
+FORMATS = ("text", "csv", "jsonl")
+CSV_HEADER = ["carnet", "nombre", "anio_actual", "tipos_beca", "periodos", "monto_mensual_total"]
+
+# Orden de las columnas de values_list
+_CARNET, _NOMBRE, _ANIO, _TIPO, _PERIODO, _MONTO = range(6)
+
+
+def _filas(periodo=None, becas=None, chunk_size: int = 2000):
+    qs = AsignacionBeca.objects.filter(activo=True)
+    if periodo:
+        qs = qs.filter(periodo=periodo)
+    if becas is not None:
+        qs = qs.filter(beca_id__in=becas)
+    return (
+        qs.order_by("student__carnet", "beca__tipo", "periodo")
+        .values_list("student__carnet", "student__nombre", "student__anio_actual",
+                     "beca__tipo", "periodo", "monto_mensual")
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def estudiantes(periodo=None, becas=None, chunk_size: int = 2000):
+    """
+    Un dict por estudiante becado, en orden de carnet.
+    """
+    for carnet, filas in groupby(_filas(periodo, becas, chunk_size), key=itemgetter(_CARNET)):
+        filas = list(filas)  # las asignaciones de UN estudiante
+        montos = [f[_MONTO] for f in filas if f[_MONTO] is not None]
+        yield {
+            "carnet": carnet,
+            "nombre": filas[0][_NOMBRE],
+            "anio_actual": filas[0][_ANIO],
+            "tipos_beca": sorted({f[_TIPO] for f in filas}),
+            "periodos": sorted({f[_PERIODO] for f in filas}),
+            "monto_mensual_total": str(sum(montos)) if montos else None,
+        }
+
+
+class Command(BaseCommand):
+    help = "Reporte de estudiantes con becas activas (CSV, JSONL o texto)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=FORMATS, default="text")
+        parser.add_argument("--output", help="Archivo de salida (por defecto stdout)")
+        parser.add_argument("--periodo", help='Solo asignaciones de este período, p. ej. "I Semestre 2025"')
+        parser.add_argument("--beca", action="append",
+                            help="Tipo (o parte única del tipo, o id) de beca; se puede repetir")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--limit", type=int, help="Cortar después de N estudiantes")
+
+    def handle(self, *args, **opts):
+        if opts["chunk_size"] < 1:
+            raise CommandError("--chunk-size debe ser positivo")
+        becas = self._becas(opts["beca"]) if opts["beca"] else None
+
+        out = open(opts["output"], "w", encoding="utf-8", newline="") if opts["output"] else self.stdout
+        t0 = time.perf_counter()
+        n = 0
+        try:
+            escribir = self._writer(opts["format"], out)
+            for est in estudiantes(opts["periodo"], becas, opts["chunk_size"]):
+                escribir(est)
+                n += 1
+                if opts["limit"] and n >= opts["limit"]:
+                    break
+        finally:
+            if opts["output"]:
+                out.close()
+        self.stderr.write(f"{n} estudiantes en {time.perf_counter() - t0:.2f} s")
+
+    def _becas(self, valores):
+        """
+        ids de beca a partir de tipos o ids. Un tipo se busca exacto (sin
+        distinguir mayúsculas) y, si no está, como parte del nombre
+        ("alimenticia" -> "Beca alimenticia"), siempre que no haya más de uno.
+        """
+        ids = set()
+        for v in valores:
+            v = v.strip()
+            encontrados = list(Beca.objects.filter(tipo__iexact=v).values_list("id", "tipo"))
+            if not encontrados and v.isdigit():
+                encontrados = list(Beca.objects.filter(pk=int(v)).values_list("id", "tipo"))
+            if not encontrados and v:
+                encontrados = list(Beca.objects.filter(tipo__icontains=v).order_by("tipo").values_list("id", "tipo"))
+                if len(encontrados) > 1:
+                    opciones = ", ".join(repr(t) for _, t in encontrados)
+                    raise CommandError(f"La beca {v!r} es ambigua: {opciones}")
+            if not encontrados:
+                raise CommandError(f"No existe la beca {v!r}")
+            ids.update(pk for pk, _ in encontrados)
+        return sorted(ids)
+
+    def _writer(self, formato, out):
+        if formato == "csv":
+            w = csv.writer(out, lineterminator="\n")
+            w.writerow(CSV_HEADER)
+
+            def escribir(est):
+                w.writerow([est["carnet"], est["nombre"], est["anio_actual"], "; ".join(est["tipos_beca"]),
+                            "; ".join(est["periodos"]), est["monto_mensual_total"] or ""])
+        elif formato == "jsonl":
+            def escribir(est):
+                out.write(json.dumps(est, ensure_ascii=False) + "\n")
+        else:
+            def escribir(est):
+                out.write(f"Estudiante: {est['nombre']} ({est['carnet']})\n")
+                out.write(f"Tipos de beca: {', '.join(est['tipos_beca'])}\n")
+                out.write("-" * 40 + "\n")
+        return escribir
@@ -0,0 +1,82 @@
+# core/management/commands/telemetry_summary.py
+# Uso (desde la carpeta chatbot/):
+#   python manage.py telemetry_summary                 # hoy (UTC)
+#   python manage.py telemetry_summary --day 20250101 --json resumen.json
+"""
+Resumen de un día de telemetría (core/telemetry.py): mezcla de intenciones
+y caminos, percentiles de confianza y de latencia, aciertos de caché.
+Todo con NumPy sobre las columnas, sin pasar fila por fila.
+"""
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from core import telemetry
+
+PERCENTILES = (50, 90, 99)
+
+
+def _percentiles(values: np.ndarray) -> dict:
+    if not values.size:
+        return {}
+    return {f"p{p}": round(float(v), 1) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+def _mix(values: np.ndarray) -> dict:
+    nombres, conteos = np.unique(values, return_counts=True)
+    orden = np.argsort(-conteos)
+    return {str(nombres[i]): int(conteos[i]) for i in orden}
+
+
+class Command(BaseCommand):
+    help = "Resume un día de telemetría de /api/nlp/intent/"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--day", help="AAAAMMDD (por defecto hoy, UTC)")
+        parser.add_argument("--dir", default=str(telemetry.TELEMETRY_DIR))
+        parser.add_argument("--json", help="Guardar el resumen en JSON")
+
+    def handle(self, *args, **opts):
+        day = opts["day"] or datetime.now(timezone.utc).strftime("%Y%m%d")
+        try:
+            cols = telemetry.load_day(day, opts["dir"])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        total = int(cols["ts_ms"].size)
+        if not total:
+            raise CommandError(f"No hay telemetría para {day} en {opts['dir']}")
+
+        modelo = cols["path"] != "rule"
+        resumen = {
+            "day": day,
+            "rows": total,
+            "unique_queries": int(np.unique(cols["query_hash"]).size),
+            "intents": _mix(cols["intent"]),
+            "paths": _mix(cols["path"]),
+            "confidence": _percentiles(cols["confidence"][modelo]),
+            "latency_us": {
+                "total": _percentiles(cols["total_us"]),
+                "model": _percentiles(cols["model_us"][modelo]),
+                "handler": _percentiles(cols["handler_us"][modelo]),
+            },
+            "session_hit_ratio": round(float(cols["session_hit"].mean()), 4),
+            "fragment_hit_ratio": round(float(cols["fragment_hit"].mean()), 4),
+        }
+
+        self.stdout.write(f"{day}: {total} filas, {resumen['unique_queries']} consultas distintas")
+        self.stdout.write("caminos:      " + ", ".join(f"{k}={v}" for k, v in resumen["paths"].items()))
+        self.stdout.write("intenciones:  " + ", ".join(f"{k}={v}" for k, v in resumen["intents"].items()))
+        self.stdout.write(f"confianza:    {resumen['confidence']}")
+        for etapa, p in resumen["latency_us"].items():
+            self.stdout.write(f"{etapa + ' (us):':<14}{p}")
+        self.stdout.write(
+            f"aciertos:     sesión {resumen['session_hit_ratio']:.1%}, "
+            f"respuesta pre-codificada {resumen['fragment_hit_ratio']:.1%}"
+        )
+
+        if opts["json"]:
+            with open(opts["json"], "w", encoding="utf-8") as f:
+                json.dump(resumen, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"\n Resumen guardado en {opts['json']}")
@@ -0,0 +1,242 @@
+# core/memprofile.py
+"""
+Clasificación de la memoria de un worker (lo usa `manage.py mem_profile`).
+
+Cada asignación que ve tracemalloc se atribuye a un subsistema mirando su
+traceback desde el frame más nuevo hacia afuera: el primer frame que cae en
+una de las rutas de SUBSYSTEMS decide. Así el json.load de un fixture
+cuenta como "data" (core/data.py lo llamó) y no como json/decoder.py.
+
+Lo que asigna core/data.py se separa además por función
+("data:_load_horarios_raw"), para ver cuánto pesa cada fixture o índice.
+
+Los frames de importlib se saltan: lo que asigna un import (módulo, code
+objects) cuenta para quien lo importó, que para un paquete es el mismo
+paquete (sklearn importando sklearn.base es "model"). "imports" queda solo
+para lo que no tiene ningún frame conocido fuera de importlib.
+
+breakdown() agrupa por traceback completo y es caro (un grupo por pila
+distinta); by_file() agrupa por el archivo del frame más nuevo y alcanza
+para seguir el crecimiento ronda a ronda.
+"""
+import ast
+import functools
+import gc
+import os
+import sys
+import tracemalloc
+from collections import defaultdict
+
+# (subsistema, fragmentos de ruta). Se prueba frame por frame, del más nuevo al más viejo.
+SUBSYSTEMS = (
+    ("data", ("core/data.py",)),
+    ("caches", ("core/sessions.py", "core/renderers.py", "core/handlers.py", "core/views.py")),
+    ("logs", ("core/fallback_log.py", "core/telemetry.py", "core/metrics.py", "core/timing.py", "/logging/")),
+    ("model", ("/sklearn/", "/joblib/", "/scipy/", "/numpy/", "core/nlp.py", "/ml/")),
+    ("django", ("/django/", "/rest_framework/", "/asgiref/", "/corsheaders/")),
+)
+IMPORTLIB = "<frozen importlib"
+IMPORTS = "imports"
+OTHER = "other"
+# Lo que asigna el propio perfilado no cuenta
+_OWN_FILES = (tracemalloc.__file__, __file__)
+
+
+@functools.lru_cache(maxsize=None)
+def _functions(filename: str):
+    """
+    [(primera línea, última línea, nombre)] de las funciones de un archivo.
+    """
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError, ValueError):
+        return ()
+    return tuple(
+        (n.lineno, n.end_lineno, n.name)
+        for n in ast.walk(tree)
+        if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))
+    )
+
+
+def _function_at(filename: str, lineno: int):
+    mejor = None
+    for first, last, name in _functions(filename):
+        if first <= lineno <= last and (mejor is None or first > mejor[0]):
+            mejor = (first, name)
+    return mejor[1] if mejor else None
+
+
+@functools.lru_cache(maxsize=65536)
+def _classify_frame(filename: str, lineno: int):
+    path = filename.replace("\\", "/")
+    for subsystem, fragmentos in SUBSYSTEMS:
+        if any(f in path for f in fragmentos):
+            if subsystem == "data":
+                func = _function_at(filename, lineno)
+                if func:
+                    return f"data:{func}"
+            return subsystem
+    return None
+
+
+def classify(traceback):
+    """
+    (subsistema, "archivo:línea" del frame que decidió) de un traceback.
+    """
+    # tracemalloc.Traceback itera del más viejo al más nuevo
+    return _classify_frames(tuple((f.filename, f.lineno) for f in reversed(traceback)))
+
+
+def _classify_frames(frames):
+    """
+    classify() sobre frames crudos ((archivo, línea), ...), del más nuevo al más viejo.
+    """
+    importlib = None
+    for filename, lineno in frames:
+        if filename.startswith(IMPORTLIB):
+            importlib = importlib or (filename, lineno)
+            continue
+        subsystem = _classify_frame(filename, lineno)
+        if subsystem is not None:
+            return subsystem, f"{short_path(filename)}:{lineno}"
+    if importlib is not None:
+        return IMPORTS, f"{short_path(importlib[0])}:{importlib[1]}"
+    return OTHER, f"{short_path(frames[0][0])}:{frames[0][1]}" if frames else "?"
+
+
+def file_subsystem(filename: str) -> str:
+    """
+    Subsistema de un archivo sin mirar la pila (para by_file()).
+    """
+    if filename.startswith(IMPORTLIB):
+        return IMPORTS
+    subsystem = _classify_frame(filename, 0) or OTHER
+    return subsystem.split(":")[0]
+
+
+def short_path(filename: str) -> str:
+    path = filename.replace("\\", "/")
+    for marca in ("/site-packages/", "/chatbot/", "/lib/python"):
+        if marca in path:
+            return path.split(marca, 1)[1]
+    return path
+
+
+def _raw_ok(traces) -> bool:
+    # (dominio, bytes, ((archivo, línea), ...), ...) como en CPython 3.9-3.13
+    if not isinstance(traces, (list, tuple)):
+        return False
+    if not traces:
+        return True
+    t = traces[0]
+    return (isinstance(t, tuple) and len(t) >= 3 and isinstance(t[1], int)
+            and isinstance(t[2], tuple) and all(isinstance(f, tuple) and len(f) == 2 for f in t[2][:1]))
+
+
+def _by_stack(snapshot: tracemalloc.Snapshot) -> dict:
+    """
+    {frames del más nuevo al más viejo: [bytes, bloques]}.
+
+    Snapshot.statistics("traceback") arma un Trace y un Traceback por
+    asignación; con cientos de miles vivas y tracemalloc trazando esos
+    mismos objetos tarda más de un minuto por foto. Por eso se leen las
+    tuplas crudas (snapshot.traces._traces) si tienen la forma esperada, y
+    si otra versión de Python la cambia se vuelve a la API pública.
+    """
+    raw = getattr(snapshot.traces, "_traces", None)
+    por_pila = defaultdict(lambda: [0, 0])
+    if _raw_ok(raw):
+        for trace in raw:
+            acc = por_pila[trace[2]]
+            acc[0] += trace[1]
+            acc[1] += 1
+        return por_pila
+    for stat in snapshot.statistics("traceback"):
+        # Traceback itera del más viejo al más nuevo
+        acc = por_pila[tuple((f.filename, f.lineno) for f in reversed(stat.traceback))]
+        acc[0] += stat.size
+        acc[1] += stat.count
+    return por_pila
+
+
+def breakdown(snapshot: tracemalloc.Snapshot):
+    """
+    ({subsistema: bytes}, {(subsistema, sitio): [bytes, bloques]}).
+    """
+    por_subsistema = defaultdict(int)
+    por_sitio = defaultdict(lambda: [0, 0])
+    for frames, (size, count) in _by_stack(snapshot).items():
+        if frames and frames[0][0] in _OWN_FILES:
+            continue
+        subsystem, sitio = _classify_frames(frames)
+        por_subsistema[subsystem] += size
+        acc = por_sitio[(subsystem, sitio)]
+        acc[0] += size
+        acc[1] += count
+    return dict(por_subsistema), dict(por_sitio)
+
+
+def by_file(snapshot: tracemalloc.Snapshot) -> dict:
+    """
+    {ruta del archivo: bytes} por el frame más nuevo de cada asignación.
+    """
+    out = defaultdict(int)
+    for frames, (size, _) in _by_stack(snapshot).items():
+        if frames:
+            out[frames[0][0]] += size
+    for own in _OWN_FILES:
+        out.pop(own, None)
+    return dict(out)
+
+
+def take_snapshot() -> tracemalloc.Snapshot:
+    # Sin filter_traces: es un fnmatch por asignación. Lo propio se descarta al agrupar.
+    gc.collect()
+    return tracemalloc.take_snapshot()
+
+
+def rss_bytes():
+    """
+    RSS actual (Linux) o el pico del proceso si no hay /proc.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if sys.platform == "darwin" else pico * 1024
+
+
+def project_lru_caches(prefixes=("core", "ml")):
+    """
+    {"modulo.funcion": cache_info} de todos los lru_cache del proyecto.
+    """
+    out = {}
+    for obj in gc.get_objects():
+        # type() y no isinstance(): isinstance mira __class__, y en un
+        # SimpleLazyObject de Django eso lo evalúa (compila regex perezosas, etc.)
+        if type(obj) is functools._lru_cache_wrapper:
+            mod = getattr(obj, "__module__", "") or ""
+            if mod.split(".")[0] in prefixes and mod != __name__:
+                out[f"{mod}.{obj.__qualname__}"] = obj.cache_info()
+    return out
+
+
+def slope(values) -> float:
+    """
+    Pendiente por mínimos cuadrados (unidades por ronda).
+    """
+    n = len(values)
+    if n < 2:
+        return 0.0
+    xm = (n - 1) / 2
+    ym = sum(values) / n
+    num = sum((i - xm) * (v - ym) for i, v in enumerate(values))
+    den = sum((i - xm) ** 2 for i in range(n))
+    return num / den
@@ -0,0 +1,426 @@
+# core/metrics.py
+"""
+Métricas en formato Prometheus para /api/metrics/, sumadas entre workers.
+
+Cada proceso escribe en archivos de NLP_METRICS_DIR (mmap), y el worker que
+atiende el scrape lee todos los archivos y suma:
+
+- contadores e histogramas: un archivo por (proceso, hilo), así cada
+  archivo tiene UN solo escritor y inc()/observe() no toman ningún lock
+  (counter_<pid>_<hilo>.db). Los de procesos muertos se siguen sumando.
+- gauges: un archivo por proceso (gauge_<pid>.db); se exportan con la
+  etiqueta pid y solo los de procesos vivos.
+
+Formato de cada archivo: u64 bytes usados, luego entradas
+    u32 largo + clave (JSON [nombre, etiquetas]) rellena a 8 bytes | f64 valor
+El escritor completa la entrada y recién después actualiza el encabezado,
+así un lector nunca ve una entrada a medias.
+
+La carpeta se debe vaciar al desplegar (p. ej. en on_starting de gunicorn),
+igual que PROMETHEUS_MULTIPROC_DIR.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+ENABLED = getattr(settings, "NLP_METRICS", True)
+METRICS_DIR = Path(getattr(settings, "NLP_METRICS_DIR", Path(settings.BASE_DIR) / "metrics"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+INITIAL_SIZE = 64 * 1024
+_HEADER = struct.Struct("<Q")
+_KEYLEN = struct.Struct("<I")
+_VALUE = struct.Struct("<d")
+
+
+def _key(name: str, labels) -> str:
+    return json.dumps([name, labels], ensure_ascii=False, separators=(",", ":"))
+
+
+def _entries(data, used: int):
+    pos = _HEADER.size
+    while pos < used:
+        (n,) = _KEYLEN.unpack_from(data, pos)
+        key = bytes(data[pos + 4:pos + 4 + n]).decode("utf-8")
+        pos += 4 + n
+        pos += (-pos) % 8
+        (value,) = _VALUE.unpack_from(data, pos)
+        yield key, pos, value
+        pos += _VALUE.size
+
+
+class _MmapFile:
+    """
+    Un archivo de valores. No es thread-safe: cada instancia tiene un solo
+    escritor (un hilo, o el lock de los gauges).
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = open(path, "a+b")
+        if os.fstat(self._f.fileno()).st_size < INITIAL_SIZE:
+            self._f.truncate(INITIAL_SIZE)
+        self._mm = mmap.mmap(self._f.fileno(), 0)
+        self.used = _HEADER.unpack_from(self._mm, 0)[0] or _HEADER.size
+        # Un pid reusado puede encontrar su archivo viejo: se sigue sumando ahí
+        self.offsets, self.values = {}, {}
+        for key, off, value in _entries(self._mm, self.used):
+            self.offsets[key] = off
+            self.values[key] = value
+
+    def add(self, key: str, amount: float):
+        if key not in self.offsets:
+            self._allocate(key)
+        value = self.values[key] + amount
+        self.values[key] = value
+        _VALUE.pack_into(self._mm, self.offsets[key], value)
+
+    def set(self, key: str, value: float):
+        if key not in self.offsets:
+            self._allocate(key)
+        self.values[key] = value
+        _VALUE.pack_into(self._mm, self.offsets[key], value)
+
+    def _allocate(self, key: str):
+        raw = key.encode("utf-8")
+        start = self.used
+        off = start + _KEYLEN.size + len(raw)
+        off += (-off) % 8
+        end = off + _VALUE.size
+        if end > len(self._mm):
+            self._grow(end)
+        _KEYLEN.pack_into(self._mm, start, len(raw))
+        self._mm[start + 4:start + 4 + len(raw)] = raw
+        _VALUE.pack_into(self._mm, off, 0.0)
+        self.offsets[key] = off
+        self.values[key] = 0.0
+        self.used = end
+        _HEADER.pack_into(self._mm, 0, end)
+
+    def _grow(self, needed: int):
+        size = len(self._mm)
+        while size < needed:
+            size *= 2
+        self._mm.close()
+        self._f.truncate(size)
+        self._mm = mmap.mmap(self._f.fileno(), 0)
+
+
+class _Lease:
+    """
+    Presta un archivo a un hilo; cuando el hilo termina (se borra su
+    threading.local) el archivo vuelve al pool del proceso. Así runserver,
+    que abre un hilo por request, no deja un archivo por request.
+    """
+    __slots__ = ("store", "file", "pid")
+
+    def __init__(self, store, file, pid):
+        self.store = store
+        self.file = file
+        self.pid = pid
+
+    def __del__(self):
+        if self.pid == os.getpid():
+            self.store._free.append(self.file)
+
+
+class _Store:
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._local = threading.local()
+        self._free = []
+        self._free_pid = None
+        self._lock = threading.Lock()
+        self._gauges = None
+        self._gauge_pid = None
+
+    def _shard(self) -> _MmapFile:
+        lease = getattr(self._local, "lease", None)
+        # Por pid: tras un fork el hilo del hijo hereda el threading.local del padre
+        if lease is None or lease.pid != os.getpid():
+            lease = self._local.lease = self._lease()
+        return lease.file
+
+    def _lease(self) -> _Lease:
+        # Solo la primera vez que un hilo escribe
+        with self._lock:
+            pid = os.getpid()
+            if self._free_pid != pid:
+                self._free, self._free_pid = [], pid
+            if self._free:
+                file = self._free.pop()
+            else:
+                file = _MmapFile(self.directory / f"counter_{pid}_{threading.get_native_id()}.db")
+            return _Lease(self, file, pid)
+
+    def add(self, key: str, amount: float):
+        self._shard().add(key, amount)
+
+    def set_gauge(self, key: str, value: float):
+        with self._lock:
+            pid = os.getpid()
+            if self._gauge_pid != pid:
+                self._gauges = _MmapFile(self.directory / f"gauge_{pid}.db")
+                self._gauge_pid = pid
+            self._gauges.set(key, value)
+
+    def collect(self):
+        """
+        (sumas de contadores/histogramas, {clave: {pid: valor}} de gauges vivos)
+        """
+        sums = defaultdict(float)
+        gauges = defaultdict(dict)
+        for path in sorted(self.directory.glob("*.db")):
+            kind, pid = path.stem.split("_")[:2]
+            if kind == "gauge" and not _alive(int(pid)):
+                continue
+            try:
+                data = path.read_bytes()
+            except OSError:
+                continue
+            if len(data) < _HEADER.size:
+                continue
+            used = min(_HEADER.unpack_from(data, 0)[0], len(data))
+            for key, _, value in _entries(data, used):
+                if kind == "gauge":
+                    gauges[key][pid] = value
+                else:
+                    sums[key] += value
+        return sums, gauges
+
+
+def _alive(pid: int) -> bool:
+    if os.name == "nt":
+        # En Windows os.kill(pid, 0) no es una consulta
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_STORE = _Store(METRICS_DIR)
+
+
+# ─────────────────────────────────────────────
+# Tipos de métrica
+# ─────────────────────────────────────────────
+
+class _Metric:
+    type = None
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        REGISTRY.append(self)
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            labels = [[n, str(v)] for n, v in zip(self.labelnames, values)]
+            child = self._children[values] = self._child(labels)
+        return child
+
+
+class _CounterChild:
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def inc(self, amount: float = 1.0):
+        if ENABLED:
+            _STORE.add(self.key, amount)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _child(self, labels):
+        return _CounterChild(_key(self.name + "_total", labels))
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+
+class _GaugeChild:
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def set(self, value: float):
+        if ENABLED:
+            _STORE.set_gauge(self.key, value)
+
+
+class Gauge(_Metric):
+    """
+    Un valor por proceso (se exporta con la etiqueta pid).
+    """
+    type = "gauge"
+
+    def _child(self, labels):
+        return _GaugeChild(_key(self.name, labels))
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "bucket_keys", "sum_key", "count_key")
+
+    def __init__(self, name, labels, bounds):
+        self.bounds = bounds
+        # Cada bucket guarda solo lo suyo; se acumula al exportar
+        self.bucket_keys = [
+            _key(name + "_bucket", labels + [["le", _fmt(b)]]) for b in (*bounds, float("inf"))
+        ]
+        self.sum_key = _key(name + "_sum", labels)
+        self.count_key = _key(name + "_count", labels)
+
+    def observe(self, value: float):
+        if ENABLED:
+            _STORE.add(self.bucket_keys[bisect_left(self.bounds, value)], 1.0)
+            _STORE.add(self.sum_key, value)
+            _STORE.add(self.count_key, 1.0)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _child(self, labels):
+        return _HistogramChild(self.name, labels, self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+
+REGISTRY = []
+
+
+# ─────────────────────────────────────────────
+# Métricas de la API
+# ─────────────────────────────────────────────
+
+REQUESTS = Counter(
+    "nlp_requests", "Consultas atendidas por endpoint, intención y camino",
+    ("endpoint", "intent", "path"),
+)
+REQUEST_LATENCY = Histogram(
+    "nlp_request_duration_seconds", "Latencia de la vista por endpoint e intención (batch: intent=mixed)",
+    ("endpoint", "intent"),
+)
+INFERENCE_LATENCY = Histogram(
+    "nlp_model_inference_seconds", "Tiempo de predict_proba por llamada", ("endpoint",),
+)
+FALLBACKS = Counter("nlp_fallbacks", "Respuestas de fallback por motivo", ("reason",))
+CACHE = Counter(
+    "nlp_cache_requests", "Búsquedas en cachés (session, fragment) por resultado", ("cache", "result"),
+)
+MODEL_LOADS = Counter("nlp_model_loads", "Cargas del modelo (initial, swap, error)", ("kind",))
+DATA_LOADS = Counter("nlp_data_loads", "Lecturas de fixtures del snapshot de datos", ("fixture",))
+MODEL_LOADED_AT = Gauge("nlp_model_loaded_timestamp_seconds", "Cuándo cargó su modelo cada proceso")
+DATA_LOADED_AT = Gauge("nlp_data_loaded_timestamp_seconds", "Cuándo cargó sus fixtures cada proceso")
+
+# Gauges de "timestamp" que además se exportan como antigüedad en el scrape
+AGE_OF = {
+    "nlp_model_loaded_timestamp_seconds": "nlp_model_age_seconds",
+    "nlp_data_loaded_timestamp_seconds": "nlp_data_age_seconds",
+}
+
+
+def cache_result(cache: str, hit: bool):
+    CACHE.labels(cache, "hit" if hit else "miss").inc()
+
+
+# ─────────────────────────────────────────────
+# Exposición
+# ─────────────────────────────────────────────
+
+def _fmt(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    if float(v).is_integer():
+        return f"{v:.1f}"
+    return repr(float(v))
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render() -> str:
+    sums, gauges = _STORE.collect()
+    por_nombre = defaultdict(list)
+    for key, value in sums.items():
+        name, labels = json.loads(key)
+        por_nombre[name].append((labels, value))
+    gauges_por_nombre = defaultdict(list)
+    for key, per_pid in gauges.items():
+        name, labels = json.loads(key)
+        for pid, value in per_pid.items():
+            gauges_por_nombre[name].append((labels + [["pid", pid]], value))
+
+    now = time.time()
+    lines = []
+    for m in REGISTRY:
+        lines.append(f"# HELP {m.name} {m.documentation}")
+        lines.append(f"# TYPE {m.name} {m.type}")
+        if m.type == "counter":
+            for labels, value in sorted(por_nombre[m.name + "_total"]):
+                lines.append(f"{m.name}_total{_labels(labels)} {_fmt(value)}")
+        elif m.type == "gauge":
+            for labels, value in sorted(gauges_por_nombre[m.name]):
+                lines.append(f"{m.name}{_labels(labels)} {_fmt(value)}")
+        else:
+            _render_histogram(m, por_nombre, lines)
+
+    for ts_name, age_name in AGE_OF.items():
+        lines.append(f"# TYPE {age_name} gauge")
+        for labels, value in sorted(gauges_por_nombre[ts_name]):
+            lines.append(f"{age_name}{_labels(labels)} {_fmt(round(now - value, 3))}")
+    return "\n".join(lines) + "\n"
+
+
+def _render_histogram(m: Histogram, por_nombre, lines):
+    buckets = defaultdict(dict)
+    for labels, value in por_nombre[m.name + "_bucket"]:
+        base = tuple(tuple(p) for p in labels if p[0] != "le")
+        le = next(v for k, v in labels if k == "le")
+        buckets[base][le] = value
+    sums = {tuple(tuple(p) for p in labels): v for labels, v in por_nombre[m.name + "_sum"]}
+    counts = {tuple(tuple(p) for p in labels): v for labels, v in por_nombre[m.name + "_count"]}
+    for base in sorted(buckets):
+        acumulado = 0.0
+        for bound in (*m.buckets, float("inf")):
+            le = _fmt(bound)
+            acumulado += buckets[base].get(le, 0.0)
+            lines.append(f"{m.name}_bucket{_labels([*base, ('le', le)])} {_fmt(acumulado)}")
+        lines.append(f"{m.name}_sum{_labels(base)} {_fmt(sums.get(base, 0.0))}")
+        lines.append(f"{m.name}_count{_labels(base)} {_fmt(counts.get(base, 0.0))}")
@@ -1,8 +1,15 @@
-from joblib import load
+from django.conf import settings
+from pathlib import Path
+import logging
 import os
 import re, unicodedata
+import threading
+import time
 
-from core.data import get_becas, buscar_beca_por_tipo, tiene_beca, detalle_beca, find_student_by_carnet
+from ml import registry
+from core import metrics
+
+logger = logging.getLogger(__name__)
 
 def normalize(s: str) -> str:
     s = s.lower()
@@ -11,16 +18,128 @@ def normalize(s: str) -> str:
     s = re.sub(r"\s+", " ", s).strip()
     return s
 
-MODEL_PATH = os.path.join("ml","models","intent_mlp.joblib")
-_pipeline = None
+# Modelo "suelto" (ruta absoluta): solo se usa si el registro aún no tiene CURRENT
+MODEL_PATH = Path(settings.BASE_DIR) / "ml" / "models" / "intent_mlp.joblib"
+REGISTRY_DIR = str(getattr(settings, "NLP_MODEL_REGISTRY_DIR", registry.REGISTRY_DIR))
+# Cada cuánto se revisa CURRENT (segundos). 0 desactiva el hot swap.
+MODEL_POLL_SECONDS = float(getattr(settings, "NLP_MODEL_POLL_SECONDS", 30))
+
+# Consultas para "calentar" un modelo recién cargado antes de exponerlo
+WARMUP_QUERIES = [
+    "qué tipos de becas hay",
+    "tengo beca 2021-0001I",
+    "cuál es mi horario 2021-0001I",
+    "requisitos para el título universitario",
+]
 
 CARNET_REGEX = re.compile(r"\b(20\d{2}-\d{4}I)\b", re.IGNORECASE)  # ajusta si hay otros formatos
 
+
+class _LoadedModel:
+    """
+    Lo que se intercambia de forma atómica: el pipeline y de dónde salió.
+    Se reemplaza el objeto entero, nunca se muta.
+    """
+    __slots__ = ("pipeline", "version", "loaded_at")
+
+    def __init__(self, pipeline, version, loaded_at):
+        self.pipeline = pipeline
+        self.version = version
+        self.loaded_at = loaded_at
+
+
+_model = None
+_load_lock = threading.Lock()
+_poller = None
+_poller_pid = None  # proceso que lanzó _poller
+_poller_lock = threading.Lock()
+
+
+def _load_version(version):
+    """
+    Carga y calienta un modelo. `version=None` = MODEL_PATH suelto.
+    """
+    # joblib trae sklearn/scipy/numpy: se importan recién acá, no al cargar la URLconf
+    from joblib import load
+
+    path = registry.model_path(version, REGISTRY_DIR) if version else MODEL_PATH
+    pipe = load(path)
+    pipe.predict_proba(WARMUP_QUERIES)
+    loaded = _LoadedModel(pipe, version, time.time())
+    metrics.MODEL_LOADED_AT.set(loaded.loaded_at)
+    return loaded
+
+
+def _poll_registry():
+    """
+    Hilo de fondo: si CURRENT cambió, carga el modelo nuevo aquí (fuera del
+    request) y recién entonces lo publica con una sola asignación.
+    """
+    global _model
+    while True:
+        time.sleep(MODEL_POLL_SECONDS)
+        try:
+            version = registry.current_version(REGISTRY_DIR)
+            if version and (_model is None or version != _model.version):
+                nuevo = _load_version(version)
+                _model = nuevo
+                metrics.MODEL_LOADS.labels("swap").inc()
+                logger.info("Modelo de intenciones actualizado a %s", version)
+        except Exception:
+            # Un artefacto roto no debe tumbar al que ya está sirviendo
+            metrics.MODEL_LOADS.labels("error").inc()
+            logger.exception("No se pudo cargar el modelo de CURRENT; se mantiene el actual")
+
+
+def _start_poller():
+    # Por pid, como core/fallback_log.py: con gunicorn --preload warm_up()
+    # corre en el master y los workers heredan _poller pero no el hilo
+    global _poller, _poller_pid
+    if MODEL_POLL_SECONDS <= 0 or _poller_pid == os.getpid():
+        return
+    with _poller_lock:
+        if _poller_pid == os.getpid():
+            return
+        _poller = threading.Thread(target=_poll_registry, name="nlp-model-poller", daemon=True)
+        _poller.start()
+        _poller_pid = os.getpid()
+
+
 def _get_pipeline():
-    global _pipeline
-    if _pipeline is None:
-        _pipeline = load(MODEL_PATH)
-    return _pipeline
+    global _model
+    model = _model
+    if model is None:
+        # Normalmente ya lo cargó warm_up() al arrancar el worker; si no
+        # (NLP_WARMUP_ON_BOOT=0, manage.py), se carga aquí una sola vez
+        with _load_lock:
+            if _model is None:
+                _model = _load_version(registry.current_version(REGISTRY_DIR))
+                metrics.MODEL_LOADS.labels("initial").inc()
+            model = _model
+    if _poller_pid != os.getpid():
+        _start_poller()
+    return model.pipeline
+
+
+def warm_up():
+    """
+    Carga fixtures y modelo ya (imports de sklearn incluidos) en vez de en el
+    primer request. Lo llaman wsgi.py/asgi.py salvo con NLP_WARMUP_ON_BOOT=0.
+    """
+    from core.data import warm_up as warm_up_data
+
+    warm_up_data()
+    _get_pipeline()
+
+
+def get_model_info() -> dict:
+    """
+    Versión y antigüedad del modelo en memoria (None si aún no se cargó).
+    """
+    model = _model
+    if model is None:
+        return {"version": None, "loaded_at": None}
+    return {"version": model.version or "legacy", "loaded_at": model.loaded_at}
 
 def _extract_carnet(text: str):
     if not text:
@@ -29,15 +148,24 @@ def _extract_carnet(text: str):
     return m.group(1).upper() if m else None
 
 def predecir_intencion(texto: str, umbral: float = 0.55):
+    return predecir_intenciones([texto], umbral=umbral)[0]
+
+def predecir_intenciones(textos, umbral: float = 0.55):
+    """
+    Igual que predecir_intencion pero para varias consultas con UN solo
+    predict_proba (la vectorización y el MLP trabajan por lotes).
+    """
     pipe = _get_pipeline()
-    proba = pipe.predict_proba([texto])[0]
+    probas = pipe.predict_proba(list(textos))
     clases = pipe.classes_
-    idx = proba.argmax()
-    intent = clases[idx]
-    conf = float(proba[idx])
-    if conf < umbral:
-        return {"intent":"desconocido","confidence":conf}
-    return {"intent":intent,"confidence":conf}
+    resultados = []
+    for idx, conf in zip(probas.argmax(axis=1), probas.max(axis=1)):
+        conf = float(conf)
+        if conf < umbral:
+            resultados.append({"intent":"desconocido","confidence":conf})
+        else:
+            resultados.append({"intent":clases[idx],"confidence":conf})
+    return resultados
 
 # --- NUEVO: una función de "manejo" para usar desde tu endpoint ---
 def responder(texto: str, umbral: float = 0.55) -> dict:
@@ -50,6 +178,8 @@ def responder(texto: str, umbral: float = 0.55) -> dict:
       "data": {... opcional ...}
     }
     """
+    from core.data import get_becas, buscar_beca_por_tipo, tiene_beca, detalle_beca, find_student_by_carnet
+
     texto_norm = normalize(texto or "")
     pred = predecir_intencion(texto_norm, umbral=umbral)
     intent = pred["intent"]; conf = pred["confidence"]
@@ -0,0 +1,201 @@
+# core/profiling.py
+"""
+Perfilado bajo demanda de UN request de /api/nlp/intent/.
+
+Solo con NLP_PROFILE_ENABLED=1. El request se perfila si trae la cabecera
+X-NLP-Profile con:
+- un token firmado con NLP_PROFILE_SECRET (python manage.py profile_intent
+  --token [--mode sample]), válido NLP_PROFILE_TOKEN_MAX_AGE segundos, o
+- "cprofile" / "sample" a secas, si el usuario autenticado es staff.
+
+Modos:
+- cprofile: cProfile, se guarda en formato pstats (.prof, para snakeviz o
+  `python -m pstats`). Solo puede haber uno activo por proceso; si otro
+  request ya se está perfilando, este cae al modo sample.
+- sample: un hilo aparte mira la pila del hilo del request cada
+  SAMPLE_INTERVAL y guarda pilas colapsadas (.collapsed, para
+  flamegraph.pl / speedscope). No toca a los demás hilos.
+
+El archivo queda en NLP_PROFILE_DIR y su nombre vuelve en X-NLP-Profile-Id;
+ahí se guardan los NLP_PROFILE_MAX_FILES más nuevos y el resto se borra.
+Los demás requests no pasan por acá más que para leer la cabecera.
+"""
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+ENABLED = getattr(settings, "NLP_PROFILE_ENABLED", False)
+SECRET = getattr(settings, "NLP_PROFILE_SECRET", "")
+PROFILE_DIR = Path(getattr(settings, "NLP_PROFILE_DIR", Path(settings.BASE_DIR) / "profiles"))
+TOKEN_MAX_AGE = getattr(settings, "NLP_PROFILE_TOKEN_MAX_AGE", 300)
+MAX_FILES = getattr(settings, "NLP_PROFILE_MAX_FILES", 200)
+PROFILE_SUFFIXES = (".prof", ".collapsed")
+SAMPLE_INTERVAL = 0.001
+
+HEADER = "X-NLP-Profile"
+MODES = ("cprofile", "sample")
+
+# Sin NLP_PROFILE_SECRET no hay tokens: SECRET_KEY es pública
+_SIGNER = signing.TimestampSigner(key=SECRET, salt="core.profiling") if SECRET else None
+# Un cProfile a la vez (desde 3.12 usa sys.monitoring, que es de todo el proceso)
+_CPROFILE_LOCK = threading.Lock()
+
+
+def make_token(mode: str = "cprofile") -> str:
+    if _SIGNER is None:
+        raise ValueError("NLP_PROFILE_SECRET no está configurado: no se pueden firmar tokens")
+    return _SIGNER.sign(mode)
+
+
+def requested_mode(request):
+    """
+    Modo pedido por el request, o None si no hay que perfilarlo.
+    """
+    if not ENABLED:
+        return None
+    value = request.headers.get(HEADER)
+    if not value:
+        return None
+    if value in MODES:
+        user = getattr(request, "user", None)
+        return value if user is not None and user.is_staff else None
+    if _SIGNER is None:
+        return None
+    try:
+        mode = _SIGNER.unsign(value, max_age=TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return mode if mode in MODES else None
+
+
+class _Sampler:
+    """
+    Cuenta pilas del hilo `thread_id` en formato colapsado:
+    "modulo.py:func;modulo.py:func 12".
+    """
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="nlp-profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            pila = []
+            while frame is not None:
+                code = frame.f_code
+                pila.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if pila:
+                self.stacks[";".join(reversed(pila))] += 1
+
+    def write(self, path: Path):
+        with open(path, "w", encoding="utf-8") as f:
+            for pila, n in self.stacks.most_common():
+                f.write(f"{pila} {n}\n")
+
+
+class ProfileRun:
+    __slots__ = ("mode", "path", "profiler", "sampler")
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.path = None
+        self.profiler = None
+        self.sampler = None
+
+
+@contextmanager
+def profile(mode: str, label: str):
+    """
+    Perfila el bloque en este hilo y guarda el resultado en PROFILE_DIR.
+    run.path queda con el archivo al salir.
+    """
+    if mode == "cprofile" and not _CPROFILE_LOCK.acquire(blocking=False):
+        mode = "sample"
+    run = ProfileRun(mode)
+    try:
+        if mode == "cprofile":
+            run.profiler = cProfile.Profile()
+            run.profiler.enable()
+        else:
+            run.sampler = _Sampler(threading.get_ident())
+            run.sampler.start()
+        try:
+            yield run
+        finally:
+            if run.profiler is not None:
+                run.profiler.disable()
+            else:
+                run.sampler.stop()
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            nombre = f"{label}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{threading.get_ident() % 100000}"
+            if run.profiler is not None:
+                run.path = PROFILE_DIR / f"{nombre}.prof"
+                run.profiler.dump_stats(run.path)
+            else:
+                run.path = PROFILE_DIR / f"{nombre}.collapsed"
+                run.sampler.write(run.path)
+            _prune(PROFILE_DIR, MAX_FILES)
+    finally:
+        if mode == "cprofile":
+            _CPROFILE_LOCK.release()
+
+
+def _prune(directory: Path, max_files: int):
+    """
+    Deja los `max_files` perfiles más nuevos de `directory` (0 = todos).
+    Varios workers pueden estar borrando a la vez: lo que ya no está se ignora.
+    """
+    if max_files <= 0:
+        return
+    archivos = []
+    for path in directory.iterdir():
+        if path.suffix in PROFILE_SUFFIXES:
+            try:
+                archivos.append((path.stat().st_mtime, path.name, path))
+            except FileNotFoundError:
+                continue
+    archivos.sort()
+    for _, _, path in archivos[:-max_files]:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def profiled(label: str):
+    """
+    Decorador para una vista: si el request lo pide, la corre perfilada.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            mode = requested_mode(request)
+            if mode is None:
+                return view(request, *args, **kwargs)
+            with profile(mode, label) as run:
+                response = view(request, *args, **kwargs)
+            response[f"{HEADER}-Id"] = run.path.name
+            return response
+        return wrapper
+    return decorator
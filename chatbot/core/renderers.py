@@ -0,0 +1,158 @@
+# core/renderers.py
+"""
+Render JSON rápido para la API de core.
+
+- Si orjson está instalado se usa (serializa directo a bytes UTF-8);
+  si no, json de la stdlib con separadores compactos.
+- PreEncoded: un dict que ya trae su JSON calculado. Las respuestas que no
+  dependen de la consulta (catálogos, mensajes fijos) se codifican UNA vez
+  y el render solo empalma esos bytes (orjson.Fragment en orjson >= 3.9,
+  marcadores en la versión stdlib).
+
+PreEncoded sigue siendo un dict, así que cualquier otro renderer
+(JSONRenderer de DRF, JsonResponse) lo serializa normal.
+"""
+import json
+import secrets
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from rest_framework.renderers import BaseRenderer
+
+from . import timing
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional
+    orjson = None
+
+FAST_JSON_ENABLED = getattr(settings, "NLP_FAST_JSON", True)
+
+# Marcador que ocupa el lugar de un fragmento mientras se serializa el resto.
+# Lleva un nonce por proceso para que un texto del usuario no pueda imitarlo.
+_NONCE = secrets.token_hex(8)
+
+# orjson >= 3.9 sabe empalmar bytes ya codificados (orjson.Fragment) sin marcadores
+_Fragment = getattr(orjson, "Fragment", None)
+
+
+def _token(i: int) -> str:
+    return f"\x00{_NONCE}:{i}\x00"
+
+
+# Un solo encoder: json.dumps con argumentos arma uno nuevo en cada llamada
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def _stdlib_dumps(obj) -> bytes:
+    return _ENCODER.encode(obj).encode("utf-8")
+
+
+def _plain_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return _stdlib_dumps(obj)
+
+
+class PreEncoded(dict):
+    """
+    dict inmutable por convención cuyo JSON se calcula al crearlo.
+    """
+    __slots__ = ("raw", "fragment")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.raw = _plain_dumps(dict(self))
+        self.fragment = _Fragment(self.raw) if _Fragment is not None else None
+
+
+def _splice(encoded: bytes, fragments) -> bytes:
+    for i, frag in enumerate(fragments):
+        encoded = encoded.replace(_token_bytes(i), frag.raw, 1)
+    return encoded
+
+
+_TOKEN_BYTES = []
+
+
+def _token_bytes(i: int) -> bytes:
+    while len(_TOKEN_BYTES) <= i:
+        _TOKEN_BYTES.append(_plain_dumps(_token(len(_TOKEN_BYTES))))
+    return _TOKEN_BYTES[i]
+
+
+def _orjson_default(obj):
+    if isinstance(obj, PreEncoded):
+        return obj.fragment
+    # OPT_PASSTHROUGH_SUBCLASS manda aquí cualquier subclase: se degrada al tipo base
+    for base in (dict, list, str, int):
+        if isinstance(obj, base):
+            return base(obj)
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+def _swap_fragments(obj, fragments, depth: int = 3):
+    """
+    Versión stdlib: json no deja interceptar subclases de dict, así que se
+    reemplazan los PreEncoded por su marcador antes de serializar. Solo se
+    baja hasta `depth` niveles ({"results": [{"answer": ...}]} en batch) y
+    solo se copian los contenedores que cambian.
+    """
+    if isinstance(obj, PreEncoded):
+        fragments.append(obj)
+        return _token(len(fragments) - 1)
+    if depth == 0:
+        return obj
+    if isinstance(obj, dict):
+        out = obj
+        for k, v in obj.items():
+            nv = _swap_fragments(v, fragments, depth - 1)
+            if nv is not v:
+                if out is obj:
+                    out = dict(obj)
+                out[k] = nv
+        return out
+    if isinstance(obj, list):
+        out = obj
+        for i, v in enumerate(obj):
+            nv = _swap_fragments(v, fragments, depth - 1)
+            if nv is not v:
+                if out is obj:
+                    out = list(obj)
+                out[i] = nv
+        return out
+    return obj
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        if _Fragment is None:
+            # Sin Fragment, empalmar sale más caro que dejar que orjson
+            # serialice el dict: PreEncoded se trata como dict normal
+            return orjson.dumps(obj)
+        return orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_PASSTHROUGH_SUBCLASS)
+    fragments = []
+    encoded = _stdlib_dumps(_swap_fragments(obj, fragments))
+    return _splice(encoded, fragments) if fragments else encoded
+
+
+class FastJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        with timing.stage("render"):
+            return dumps(data)
+
+
+def json_response(payload, status: int = 200):
+    """
+    Para las vistas Django puras (la async): mismo render que la API DRF.
+    """
+    with timing.stage("render"):
+        if FAST_JSON_ENABLED:
+            return HttpResponse(dumps(payload), status=status, content_type="application/json")
+        return JsonResponse(payload, status=status, json_dumps_params={"ensure_ascii": False})
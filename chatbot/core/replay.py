@@ -0,0 +1,190 @@
+# core/replay.py
+"""
+Replay de una captura de tráfico (core/capture.py) contra un servidor local,
+a la velocidad original o acelerada (lo usa `manage.py replay_capture`).
+
+Lazo abierto: cada request sale a su hora (llegada original / speed), sin
+esperar a que terminen los anteriores. Si el servidor se atrasa, los
+requests se acumulan en vez de frenar la carga, como pasa en la semana de
+inscripción. Por eso la latencia se mide desde la hora PLANIFICADA, no
+desde que un hilo pudo enviarlo (si no, un servidor lento esconde su cola).
+
+Los hilos que envían son un pool fijo (max_in_flight); "lag" en el reporte
+es cuánto esperó un request a tener hilo libre. Si el lag crece, el cuello
+de botella es el pool del replay y hay que subir --max-in-flight.
+
+Antes del t0 se mandan `warmup` requests sin medir (repartidos entre los
+clientes, así cada uno abre su conexión): si no, los primeros segundos
+miden la carga del modelo y no el servidor.
+"""
+import hashlib
+import json
+import queue
+import threading
+import time
+from collections import Counter, defaultdict
+
+from .loadbench import ASYNC_INTENT_PATH, INTENT_PATH, _percentile, _summary
+from .nlp import CARNET_REGEX
+
+# "endpoint" de core/capture.py -> ruta a la que se reenvía
+ENDPOINT_PATHS = {"intent": INTENT_PATH, "async": ASYNC_INTENT_PATH}
+
+_STOP = object()
+
+
+def _pick(carnet: str, reales: list) -> str:
+    h = int.from_bytes(hashlib.blake2b(carnet.encode("utf-8"), digest_size=8).digest(), "little")
+    return reales[h % len(reales)]
+
+
+def plan(registros, speed: float = 1.0, carnets=(), limit: int | None = None,
+         duration: float | None = None) -> list:
+    """
+    [(segundos desde el inicio, consulta, conversation_id, ruta)] listos para
+    enviar; la ruta sale del "endpoint" capturado (sin él, /api/nlp/intent/).
+
+    Los carnets sintéticos que en la captura eran de estudiantes reales se
+    cambian por carnets de `carnets` (siempre el mismo para el mismo
+    sintético); los demás se dejan, así siguen sin existir.
+    """
+    if speed <= 0:
+        raise ValueError("speed debe ser mayor que 0")
+    reales = sorted(carnets)
+    salida = []
+    t0 = registros[0]["t"] if registros else 0.0
+    for r in registros:
+        offset = r["t"] - t0
+        if duration is not None and offset > duration:
+            break
+        conocidos = r.get("carnets") or {}
+
+        def cambiar(m):
+            c = m.group(1).upper()
+            return _pick(c, reales) if reales and conocidos.get(c) else c
+
+        ruta = ENDPOINT_PATHS.get(r.get("endpoint"), INTENT_PATH)
+        salida.append((offset / speed, CARNET_REGEX.sub(cambiar, r["query"]), r.get("conversation_id"), ruta))
+        if limit is not None and len(salida) >= limit:
+            break
+    return salida
+
+
+def _dist(vals) -> dict:
+    lat = sorted(vals)
+    return {
+        **_summary(lat),
+        "p90_ms": round(_percentile(lat, 90), 3),
+        "p999_ms": round(_percentile(lat, 99.9), 3),
+        "max_ms": round(lat[-1], 3) if lat else 0.0,
+    }
+
+
+def run(make_sender, pasos, max_in_flight: int = 64, warmup: int = 200) -> dict:
+    """
+    Envía `pasos` (de plan()) a su hora con un pool de `max_in_flight` hilos,
+    después de `warmup` requests sin medir.
+    """
+    cola = queue.Queue()
+    resultados = []  # (segundo planificado, latencia ms, servicio ms, lag ms, código, intent)
+    lock = threading.Lock()
+
+    def worker(sender):
+        propios = []
+        try:
+            while True:
+                item = cola.get()
+                if item is _STOP:
+                    break
+                planificado_ns, offset, q, conv, ruta = item
+                inicio = time.perf_counter_ns()
+                try:
+                    code, body = sender.send(q, conv, path=ruta)
+                except Exception:
+                    code, body = 0, b""
+                fin = time.perf_counter_ns()
+                intent = None
+                if code == 200:
+                    try:
+                        intent = json.loads(body).get("intent", "?")
+                    except ValueError:
+                        code = -1  # 200 con cuerpo que no es JSON
+                propios.append((
+                    int(offset), (fin - planificado_ns) / 1e6, (fin - inicio) / 1e6,
+                    (inicio - planificado_ns) / 1e6, code, intent,
+                ))
+        finally:
+            sender.close()
+            with lock:
+                resultados.extend(propios)
+
+    # Los clientes se crean antes de arrancar: si falla uno, no se envía nada
+    senders = [make_sender() for _ in range(max_in_flight)]
+    _warm(senders, pasos, warmup)
+    hilos = [threading.Thread(target=worker, args=(s,), name=f"replay-{i}", daemon=True)
+             for i, s in enumerate(senders)]
+    for h in hilos:
+        h.start()
+
+    t0 = time.perf_counter_ns()
+    for offset, q, conv, ruta in pasos:
+        objetivo = t0 + int(offset * 1e9)
+        espera = (objetivo - time.perf_counter_ns()) / 1e9
+        if espera > 0:
+            time.sleep(espera)
+        cola.put((objetivo, offset, q, conv, ruta))
+    for _ in hilos:
+        cola.put(_STOP)
+    for h in hilos:
+        h.join()
+    elapsed = (time.perf_counter_ns() - t0) / 1e9
+
+    return report(resultados, pasos, elapsed)
+
+
+def _warm(senders, pasos, warmup: int):
+    """
+    Al menos un request por cliente, con las consultas del principio del
+    plan y sin conversation_id (no toca las sesiones que el replay va a usar).
+    """
+    if not pasos:
+        return
+    for i in range(max(warmup, len(senders))):
+        _, q, _, ruta = pasos[i % len(pasos)]
+        try:
+            senders[i % len(senders)].send(q, path=ruta)
+        except Exception:
+            pass  # los errores se cuentan en el replay, no acá
+
+
+def report(resultados, pasos, elapsed: float) -> dict:
+    ofrecido = pasos[-1][0] if pasos else 0.0
+    codigos = Counter(r[4] for r in resultados)
+    errores = sum(n for c, n in codigos.items() if c != 200)
+    por_intent = defaultdict(list)
+    por_segundo = defaultdict(lambda: [0, 0, []])
+    for segundo, lat, _, _, code, intent in resultados:
+        if intent is not None:
+            por_intent[intent].append(lat)
+        s = por_segundo[segundo]
+        s[0] += 1
+        s[1] += code != 200
+        s[2].append(lat)
+    return {
+        "requests": len(resultados),
+        "errors": errores,
+        "error_rate": round(errores / len(resultados), 4) if resultados else 0.0,
+        "status": {str(c): n for c, n in sorted(codigos.items())},
+        "offered_seconds": round(ofrecido, 3),
+        "offered_rps": round(len(pasos) / ofrecido, 1) if ofrecido else None,
+        "seconds": round(elapsed, 3),
+        "achieved_rps": round(len(resultados) / elapsed, 1) if elapsed else 0.0,
+        "latency": _dist([r[1] for r in resultados]),
+        "service": _dist([r[2] for r in resultados]),
+        "lag": _dist([r[3] for r in resultados]),
+        "by_intent": {k: _summary(v) for k, v in sorted(por_intent.items())},
+        "timeline": [
+            {"second": s, "requests": v[0], "errors": v[1], "p95_ms": round(_percentile(sorted(v[2]), 95), 3)}
+            for s, v in sorted(por_segundo.items())
+        ],
+    }
@@ -0,0 +1,136 @@
+# core/sessions.py
+"""
+Contexto de conversación para /api/nlp/intent/.
+
+El cliente manda un `conversation_id` (en el body o en el header
+X-Conversation-ID) y aquí se guarda lo mínimo para el turno siguiente:
+el carnet ya resuelto, un snapshot chico del estudiante y la última
+intención. Así "y mi horario?" después de "tengo beca? 2021-0001I" no
+vuelve a pedir el carnet ni a buscar al estudiante.
+
+Dos backends, elegidos con NLP_SESSION_BACKEND:
+- "memory": dict LRU con TTL en el proceso (por defecto).
+- "cache":  el cache de Django (NLP_SESSION_CACHE_ALIAS), para compartir
+            entre workers si hay Redis/Memcached.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+SESSION_TTL_SECONDS = getattr(settings, "NLP_SESSION_TTL_SECONDS", 1800)
+SESSION_MAX = getattr(settings, "NLP_SESSION_MAX", 10000)
+
+# IDs opacos del cliente: cortos y sin caracteres raros (también son claves de cache)
+CONVERSATION_ID_REGEX = re.compile(r"^[A-Za-z0-9_.:-]{1,64}$")
+# Campos del estudiante que se copian al snapshot; el resto del fixture no
+STUDENT_FIELDS = ("nombre", "carnet")
+
+
+class SessionContext:
+    """
+    Tamaño acotado por construcción: carnet, un snapshot de pocos campos y
+    la última intención.
+    """
+    __slots__ = ("carnet", "student", "last_intent")
+
+    def __init__(self, carnet=None, student=None, last_intent=None):
+        self.carnet = carnet
+        self.student = student
+        self.last_intent = last_intent
+
+    @staticmethod
+    def student_snapshot(student: dict) -> dict:
+        fields = student.get("fields", {}) or {}
+        return {
+            "pk": student.get("pk"),
+            "fields": {k: fields.get(k) for k in STUDENT_FIELDS},
+        }
+
+    def to_dict(self) -> dict:
+        return {"carnet": self.carnet, "student": self.student, "last_intent": self.last_intent}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data.get("carnet"), data.get("student"), data.get("last_intent"))
+
+
+class InMemorySessionStore:
+    def __init__(self, max_sessions: int = SESSION_MAX, ttl: float = SESSION_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # conversation_id -> (expira, SessionContext)
+
+    def get(self, conversation_id: str):
+        with self._lock:
+            item = self._data.get(conversation_id)
+            if item is None:
+                return None
+            expira, ctx = item
+            if expira < time.monotonic():
+                del self._data[conversation_id]
+                return None
+            self._data.move_to_end(conversation_id)
+            return ctx
+
+    def set(self, conversation_id: str, ctx: SessionContext):
+        with self._lock:
+            self._data[conversation_id] = (time.monotonic() + self.ttl, ctx)
+            self._data.move_to_end(conversation_id)
+            while len(self._data) > self.max_sessions:
+                self._data.popitem(last=False)
+
+    async def aget(self, conversation_id: str):
+        return self.get(conversation_id)
+
+    async def aset(self, conversation_id: str, ctx: SessionContext):
+        self.set(conversation_id, ctx)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CacheSessionStore:
+    KEY_PREFIX = "nlp:conv:"
+
+    def __init__(self, alias: str = "default", ttl: float = SESSION_TTL_SECONDS):
+        from django.core.cache import caches
+
+        self.cache = caches[alias]
+        self.ttl = ttl
+
+    def get(self, conversation_id: str):
+        data = self.cache.get(self.KEY_PREFIX + conversation_id)
+        return SessionContext.from_dict(data) if data else None
+
+    def set(self, conversation_id: str, ctx: SessionContext):
+        self.cache.set(self.KEY_PREFIX + conversation_id, ctx.to_dict(), self.ttl)
+
+    async def aget(self, conversation_id: str):
+        data = await self.cache.aget(self.KEY_PREFIX + conversation_id)
+        return SessionContext.from_dict(data) if data else None
+
+    async def aset(self, conversation_id: str, ctx: SessionContext):
+        await self.cache.aset(self.KEY_PREFIX + conversation_id, ctx.to_dict(), self.ttl)
+
+
+def clean_conversation_id(value):
+    """
+    El ID tal cual si es válido; None si no vino o no sirve como clave.
+    """
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    return value if CONVERSATION_ID_REGEX.match(value) else None
+
+
+def _build_store():
+    if getattr(settings, "NLP_SESSION_BACKEND", "memory") == "cache":
+        return CacheSessionStore(getattr(settings, "NLP_SESSION_CACHE_ALIAS", "default"))
+    return InMemorySessionStore()
+
+
+SESSIONS = _build_store()
@@ -0,0 +1,309 @@
+# core/telemetry.py
+"""
+Telemetría muestreada de /api/nlp/intent/ en formato columnar.
+
+Una fracción NLP_TELEMETRY_SAMPLE_RATE de las consultas deja un registro:
+hash de la consulta normalizada, intención, confianza, camino (regla,
+neurona, degradada), tiempos de neurona / handler / total y si hubo
+acierto de caché (sesión, respuesta pre-codificada).
+
+Los registros se juntan en memoria por columnas y se escriben cada
+NLP_TELEMETRY_FLUSH_ROWS filas o a los NLP_TELEMETRY_FLUSH_SECONDS segundos
+de la primera fila (un hilo de fondo vigila el plazo aunque no lleguen más
+consultas), a telemetry/<AAAAMMDD>/<pid>-<hora>-<n>.(parquet|nlpt):
+
+- Parquet si pyarrow está instalado (y para leerlos también hace falta)
+- si no, .nlpt: columnas binarias con prefijo de largo (ver _write_nlpt)
+
+load_day("20250101") devuelve un dict columna -> np.ndarray con todo el día.
+"""
+import atexit
+import hashlib
+import json
+import os
+import random
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from functools import lru_cache
+
+from django.conf import settings
+
+from ml.text import normalize
+
+SAMPLE_RATE = getattr(settings, "NLP_TELEMETRY_SAMPLE_RATE", 0.01)
+TELEMETRY_DIR = Path(getattr(settings, "NLP_TELEMETRY_DIR", Path(settings.BASE_DIR) / "telemetry"))
+FLUSH_ROWS = getattr(settings, "NLP_TELEMETRY_FLUSH_ROWS", 5000)
+FLUSH_SECONDS = getattr(settings, "NLP_TELEMETRY_FLUSH_SECONDS", 60)
+
+# (columna, dtype de NumPy). "cat" = texto codificado con diccionario.
+COLUMNS = (
+    ("ts_ms", "<i8"),
+    ("query_hash", "<u8"),
+    ("intent", "cat"),
+    ("confidence", "<f4"),
+    ("path", "cat"),
+    ("model_us", "<f4"),
+    ("handler_us", "<f4"),
+    ("total_us", "<f4"),
+    ("session_hit", "u1"),
+    ("fragment_hit", "u1"),
+)
+NLPT_MAGIC = b"NLPT1\n"
+
+
+def sampled() -> bool:
+    """
+    ¿Esta consulta entra en la muestra? Con la tasa en 0 no cuesta nada más.
+    """
+    return SAMPLE_RATE > 0 and (SAMPLE_RATE >= 1 or random.random() < SAMPLE_RATE)
+
+
+def query_hash(q: str) -> int:
+    return int.from_bytes(hashlib.blake2b(normalize(q).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+@lru_cache(maxsize=None)
+def _arrow():
+    """
+    (pyarrow, pyarrow.parquet) o None. NumPy y pyarrow se importan recién al
+    escribir o leer, no al cargar la URLconf.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:  # pyarrow es opcional
+        return None
+    return pa, pq
+
+
+# ─────────────────────────────────────────────
+# Formato .nlpt (sin pyarrow)
+# ─────────────────────────────────────────────
+# NLPT_MAGIC, luego por columna:
+#   u16 largo + nombre | u16 largo + dtype | u64 largo + bytes
+# Las columnas "cat" se guardan como códigos <u2 y su diccionario va como
+# una columna extra "<nombre>.dict" con dtype "json".
+
+def _encode_columns(cols: dict):
+    import numpy as np
+
+    for name, dtype in COLUMNS:
+        values = cols[name]
+        if dtype == "cat":
+            dictionary = sorted(set(values))
+            index = {v: i for i, v in enumerate(dictionary)}
+            yield name, "<u2", np.fromiter((index[v] for v in values), dtype="<u2", count=len(values)).tobytes()
+            yield f"{name}.dict", "json", json.dumps(dictionary, ensure_ascii=False).encode("utf-8")
+        else:
+            yield name, dtype, np.asarray(values, dtype=dtype).tobytes()
+
+
+def _write_nlpt(cols: dict, path: Path):
+    partes = [NLPT_MAGIC]
+    for name, dtype, raw in _encode_columns(cols):
+        for s in (name.encode("utf-8"), dtype.encode("ascii")):
+            partes.append(struct.pack("<H", len(s)) + s)
+        partes.append(struct.pack("<Q", len(raw)))
+        partes.append(raw)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(b"".join(partes))
+    os.replace(tmp, path)
+
+
+def _read_nlpt(path: Path) -> dict:
+    import numpy as np
+
+    data = path.read_bytes()
+    if not data.startswith(NLPT_MAGIC):
+        raise ValueError(f"{path} no es un archivo de telemetría")
+    pos = len(NLPT_MAGIC)
+    raw_cols = {}
+    while pos < len(data):
+        campos = []
+        for _ in range(2):
+            (n,) = struct.unpack_from("<H", data, pos)
+            campos.append(data[pos + 2:pos + 2 + n].decode("utf-8"))
+            pos += 2 + n
+        (n,) = struct.unpack_from("<Q", data, pos)
+        pos += 8
+        raw_cols[campos[0]] = (campos[1], data[pos:pos + n])
+        pos += n
+
+    out = {}
+    for name, dtype in COLUMNS:
+        col_dtype, raw = raw_cols[name]
+        arr = np.frombuffer(raw, dtype=col_dtype)
+        if dtype == "cat":
+            dictionary = np.array(json.loads(raw_cols[f"{name}.dict"][1]) or [""])
+            arr = dictionary[arr]
+        out[name] = arr
+    return out
+
+
+def _write_parquet(cols: dict, path: Path):
+    import numpy as np
+
+    pa, pq = _arrow()
+    arrays = {}
+    for name, dtype in COLUMNS:
+        if dtype == "cat":
+            arrays[name] = pa.array(cols[name], type=pa.string()).dictionary_encode()
+        else:
+            arrays[name] = pa.array(np.asarray(cols[name], dtype=dtype))
+    tmp = path.with_name(path.name + ".tmp")
+    pq.write_table(pa.table(arrays), tmp, compression="zstd")
+    os.replace(tmp, path)
+
+
+def _read_parquet(path: Path) -> dict:
+    import numpy as np
+
+    if _arrow() is None:
+        raise RuntimeError(f"{path} es Parquet: hace falta pyarrow para leerlo")
+    pa, pq = _arrow()
+    table = pq.read_table(path)
+    out = {}
+    for name, dtype in COLUMNS:
+        col = table.column(name)
+        if dtype == "cat":
+            out[name] = np.array(col.cast(pa.string()).to_pylist())
+        else:
+            out[name] = col.to_numpy().astype(dtype, copy=False)
+    return out
+
+
+# ─────────────────────────────────────────────
+# Buffer por proceso
+# ─────────────────────────────────────────────
+
+class _Buffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._timer_pid = None
+        self._pending = threading.Event()  # hay filas esperando el plazo
+        self._reset()
+
+    def _reset(self):
+        self.cols = {name: [] for name, _ in COLUMNS}
+        self.started = None  # time.monotonic() de la primera fila
+
+    def append(self, row: dict):
+        with self._lock:
+            for name, _ in COLUMNS:
+                self.cols[name].append(row[name])
+            if self.started is None:
+                self.started = time.monotonic()
+                self._ensure_timer()
+                self._pending.set()
+            lleno = len(self.cols["ts_ms"]) >= FLUSH_ROWS or time.monotonic() - self.started >= FLUSH_SECONDS
+            if not lleno:
+                return
+            cols, seq = self._take()
+        threading.Thread(target=self._write, args=(cols, seq), name="telemetry-flush", daemon=True).start()
+
+    def _ensure_timer(self):
+        # Por pid, como core/fallback_log.py: tras un fork el hilo del padre no existe
+        if self._timer_pid == os.getpid():
+            return
+        self._timer_pid = os.getpid()
+        threading.Thread(target=self._timer, name="telemetry-timer", daemon=True).start()
+
+    def _timer(self):
+        """
+        Escribe las filas que llevan FLUSH_SECONDS esperando, aunque no haya
+        llegado otra consulta que dispare el flush en append().
+        """
+        while True:
+            self._pending.wait()
+            with self._lock:
+                if self.started is None:
+                    self._pending.clear()
+                    continue
+                espera = self.started + FLUSH_SECONDS - time.monotonic()
+                if espera <= 0:
+                    cols, seq = self._take()
+                    self._pending.clear()
+            if espera > 0:
+                time.sleep(espera)
+            else:
+                self._write(cols, seq)
+
+    def _take(self):
+        cols = self.cols
+        self._reset()
+        self._seq += 1
+        return cols, self._seq
+
+    def flush(self):
+        with self._lock:
+            if not self.cols["ts_ms"]:
+                return
+            cols, seq = self._take()
+        self._write(cols, seq)
+
+    def _write(self, cols: dict, seq: int):
+        try:
+            primero = datetime.fromtimestamp(cols["ts_ms"][0] / 1000, timezone.utc)
+            carpeta = TELEMETRY_DIR / primero.strftime("%Y%m%d")
+            carpeta.mkdir(parents=True, exist_ok=True)
+            nombre = f"{os.getpid()}-{primero.strftime('%H%M%S')}-{seq}"
+            if _arrow() is not None:
+                _write_parquet(cols, carpeta / f"{nombre}.parquet")
+            else:
+                _write_nlpt(cols, carpeta / f"{nombre}.nlpt")
+        except Exception:
+            # La telemetría nunca debe romper la API
+            pass
+
+
+_BUFFER = _Buffer()
+atexit.register(_BUFFER.flush)
+
+
+def record(q: str, payload: dict, path: str, model_ns: int = 0, handler_ns: int = 0,
+           total_ns: int = 0, session_hit: bool = False, fragment_hit: bool = False):
+    """
+    Agrega una fila. Se llama solo si sampled() dijo que sí.
+    """
+    try:
+        _BUFFER.append({
+            "ts_ms": int(time.time() * 1000),
+            "query_hash": query_hash(q),
+            "intent": payload.get("intent") or "",
+            "confidence": float(payload.get("confidence") or 0.0),
+            "path": path,
+            "model_us": model_ns / 1e3,
+            "handler_us": handler_ns / 1e3,
+            "total_us": total_ns / 1e3,
+            "session_hit": int(session_hit),
+            "fragment_hit": int(fragment_hit),
+        })
+    except Exception:
+        pass
+
+
+def flush():
+    _BUFFER.flush()
+
+
+def load_day(day: str, base_dir: Path = TELEMETRY_DIR) -> dict:
+    """
+    Todas las filas de un día (AAAAMMDD) como columnas NumPy. RuntimeError
+    si hay archivos .parquet y pyarrow no está instalado.
+    """
+    import numpy as np
+
+    carpeta = Path(base_dir) / day
+    partes = []
+    if carpeta.is_dir():
+        partes += [_read_parquet(p) for p in sorted(carpeta.glob("*.parquet"))]
+        partes += [_read_nlpt(p) for p in sorted(carpeta.glob("*.nlpt"))]
+    if not partes:
+        return {name: np.array([], dtype=(str if dtype == "cat" else dtype)) for name, dtype in COLUMNS}
+    return {name: np.concatenate([p[name] for p in partes]) for name, _ in COLUMNS}
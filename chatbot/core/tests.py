@@ -1,3 +1,1117 @@
-from django.test import TestCase
+import base64
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core import signing
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase
+
+from core import (
+    bulkload, capture, data, fallback_log, fixturegen, loadbench, memprofile, metrics, profiling, replay, telemetry, views,
+)
+from core.admission import Overloaded
+from core.handlers import FALLBACK_MENSAJE, HANDLERS
+
+# Ninguno de estos debe cargarse para `manage.py check` ni para la URLconf:
+# llegan con el primer predict (core/nlp.py) o con NLP_WARMUP_ON_BOOT.
+HEAVY_MODULES = ("sklearn", "joblib", "scipy", "numpy", "pyarrow")
+
+
+def importtime(*args):
+    """
+    ({módulo de primer nivel: microsegundos acumulados}, {todos los importados})
+    de `python -X importtime <args>` en un proceso nuevo.
+    """
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": "chatbot.settings", "NLP_WARMUP_ON_BOOT": "0"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=Path(settings.BASE_DIR), env=env, capture_output=True, text=True, timeout=120,
+    )
+    if proc.returncode:
+        raise AssertionError(f"{' '.join(args)} falló:\n{proc.stderr[-2000:]}")
+    top, todos = {}, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        todos.add(name.strip())
+        # Los imports anidados vienen indentados; los de primer nivel ya incluyen a sus hijos
+        if not name[1:].startswith(" "):
+            top[name.strip()] = int(cumulative)
+    return top, todos
+
+
+class ImportTimeBudgetTests(SimpleTestCase):
+    budget_ms = getattr(settings, "NLP_IMPORT_BUDGET_MS", 1500)
+
+    def assert_within_budget(self, args):
+        top, todos = importtime(*args)
+        pesados = sorted({m.split(".")[0] for m in todos} & set(HEAVY_MODULES))
+        self.assertEqual(pesados, [], f"{' '.join(args)} importa {', '.join(pesados)}")
+        total_ms = sum(top.values()) / 1000
+        peores = ", ".join(f"{m} {us / 1000:.0f} ms" for m, us in sorted(top.items(), key=lambda kv: -kv[1])[:5])
+        self.assertLessEqual(
+            total_ms, self.budget_ms,
+            f"{' '.join(args)}: {total_ms:.0f} ms de imports > {self.budget_ms:.0f} ms ({peores})",
+        )
+
+    def test_manage_check(self):
+        self.assert_within_budget(["manage.py", "check"])
+
+    def test_urlconf(self):
+        self.assert_within_budget(["-c", "import django; django.setup(); import chatbot.urls"])
+
+
+def _poller_en_hijo(cola):
+    from core import nlp
+
+    nlp._get_pipeline()
+    cola.put((nlp._poller_pid == os.getpid(), nlp._poller.is_alive()))
+
+
+class ModelPollerTests(SimpleTestCase):
+    def test_poller_restarts_after_fork(self):
+        from core import nlp
+
+        parado = threading.Event()
+        modelo = nlp._LoadedModel(object(), "v1", time.time())
+        with mock.patch.multiple(nlp, MODEL_POLL_SECONDS=30, _model=modelo, _poller=None, _poller_pid=None,
+                                 _poll_registry=parado.wait):
+            try:
+                nlp._get_pipeline()
+                self.assertEqual(nlp._poller_pid, os.getpid())
+                padre = nlp._poller
+                nlp._get_pipeline()
+                self.assertIs(nlp._poller, padre)  # uno solo por proceso
+
+                # Como gunicorn --preload: el worker hereda _poller sin el hilo
+                ctx = multiprocessing.get_context("fork")
+                cola = ctx.Queue()
+                hijo = ctx.Process(target=_poller_en_hijo, args=(cola,))
+                hijo.start()
+                self.assertEqual(cola.get(timeout=30), (True, True))
+                hijo.join(30)
+            finally:
+                parado.set()
+
+
+class ApiTestCase(SimpleTestCase):
+    """
+    Contra la API real (fixtures en memoria y el modelo del registro), con
+    el log de fallbacks en una carpeta temporal.
+    """
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        writer = fallback_log._Writer(self.tmp / "fallback_queries.jsonl")
+        self.addCleanup(writer.drain)
+        patcher = mock.patch.object(fallback_log, "_WRITER", writer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = Client()
+
+    def intent(self, query, path="/api/nlp/intent/", **extra):
+        return self.client.post(path, {"query": query, **extra}, content_type="application/json")
+
+    def batch(self, queries):
+        return self.client.post("/api/nlp/intent/batch/", {"queries": queries}, content_type="application/json")
+
+
+class BatchTests(ApiTestCase):
+    queries = [
+        "hola",
+        "que tipos de becas hay",
+        "cuales son los requisitos de la beca alimenticia",
+        "tengo beca 2021-0001I",
+        "cual es mi horario 2021-0002I",
+        "requisitos para el titulo universitario",
+        "que beca tengo",
+        "asdf qwer zxcv",
+    ]
+
+    def test_same_results_as_single_endpoint(self):
+        res = self.batch(self.queries)
+        self.assertEqual(res.status_code, 200)
+        resultados = res.json()["results"]
+        self.assertEqual(len(resultados), len(self.queries))
+        for q, r in zip(self.queries, resultados):
+            with self.subTest(q=q):
+                self.assertEqual(r, self.intent(q).json())
+
+    def test_empty_query_is_reported_in_place(self):
+        res = self.batch(["hola", "  ", "que tipos de becas hay"])
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["results"][1], {"detail": "query requerido"})
+        self.assertEqual(res.json()["results"][2], self.intent("que tipos de becas hay").json())
+
+    def test_limits(self):
+        self.assertEqual(self.batch([]).status_code, 400)
+        self.assertEqual(self.batch(["hola"] * (settings.NLP_BATCH_MAX_QUERIES + 1)).status_code, 400)
+
+
+class HandlerRegistryTests(ApiTestCase):
+    """
+    Las respuestas del registro (core/handlers.py) son las mismas que armaba
+    la cadena de if/elif de views.py.
+    """
+    def answer(self, intent, q, session=None):
+        payload = views._intent_payload(q, {"intent": intent, "confidence": 0.9}, log=None, session=session)
+        self.assertEqual(payload["intent"], intent)
+        return dict(payload["answer"])
+
+    def test_every_domain_intent_has_a_handler(self):
+        self.assertEqual(set(views.DOMAIN_INTENTS) - set(HANDLERS), set())
+        self.assertEqual(HANDLERS["desconocido"](views.HandlerContext("x")), {"mensaje": FALLBACK_MENSAJE})
+
+    def test_becas(self):
+        tipos = [b["tipo"] or (b.get("nombre") or "Beca") for b in data.get_becas()]
+        self.assertEqual(self.answer("tipos_becas", "que tipos de becas hay"), {
+            "mensaje": "Tenemos disponibles los siguientes tipos de becas:", "tipos_becas": tipos,
+        })
+        self.assertEqual(self.answer("requisitos_becas", "requisitos de la beca"), {
+            "mensaje": "No entendí qué beca específica deseas. Te muestro los tipos disponibles:",
+            "requisitos_por_beca": {b["tipo"]: b["requisitos"] for b in data.get_becas()},
+        })
+        self.assertEqual(self.answer("aplicar_beca", "como aplico a una beca"), {
+            "mensaje": "¿Por cuál beca te gustaría aplicar? Elige una:", "tipos_becas": tipos,
+        })
+        self.assertEqual(self.answer("donde_recibo_beca", "donde recibo mi beca"), {
+            "mensaje": "La beca se recibe según tu asignación (pago en Caja o depósito bancario).",
+            "metodos_entrega": ["Caja", "Depósito"],
+        })
+        beca = data.get_becas()[0]
+        self.assertEqual(self.answer("requisitos_becas", f"requisitos de la beca {beca['tipo']}")["becas"][0],
+                         {"tipo": beca["tipo"], "requisitos": beca["requisitos"]})
+
+    def test_estado_y_detalle_beca(self):
+        for carnet in ("2021-0001I", "2021-0002I"):
+            st = data.find_student_by_carnet(carnet)
+            info = data.detalle_beca(carnet)
+            nombre = st["fields"]["nombre"]
+            for intent, q in (("estado_beca", f"tengo beca {carnet}"), ("detalle_beca", f"que beca tengo {carnet}")):
+                with self.subTest(intent=intent, carnet=carnet):
+                    answer = self.answer(intent, q)
+                    self.assertEqual(answer[intent]["tiene_beca"], bool(info))
+                    self.assertEqual(answer[intent]["nombre"], nombre)
+                    if info:
+                        self.assertEqual(answer[intent]["beca"], info.get("beca"))
+                    else:
+                        self.assertEqual(answer["mensaje"], f"{nombre} ({carnet}), no tienes una beca asignada.")
+        self.assertEqual(self.answer("estado_beca", "tengo beca 2099-9999I"),
+                         {"mensaje": "No encontré el carnet 2099-9999I en el sistema."})
+
+    def test_needs_carnet(self):
+        for intent, h in HANDLERS.items():
+            if h.needs_carnet:
+                with self.subTest(intent=intent):
+                    self.assertEqual(h(views.HandlerContext("sin carnet", intent=intent)),
+                                     {"mensaje": h.missing_carnet_message})
+
+    def test_horario(self):
+        info = data.get_horario_estudiante("2021-0001I")
+        answer = self.answer("horario_estudiante", "cual es mi horario 2021-0001I")
+        self.assertEqual(answer["horario"]["carnet"], info["carnet"])
+        self.assertEqual(answer["horario"]["grupos"], info["grupos"])
+
+    def test_tramites(self):
+        titulo = data.get_tramite_titulo_universitario()
+        self.assertEqual(self.answer("tramite_titulo", "requisitos para el titulo"), {
+            "mensaje": "Estos son los requisitos para el trámite de título universitario.",
+            "tramite": "titulo_universitario",
+            **{k: titulo[k] for k in ("titulo", "slug", "descripcion", "requisitos")},
+        })
+        baja = data.get_tramite_baja_universidad()
+        self.assertEqual(self.answer("tramite_baja", "como me doy de baja")["slug"], baja["slug"])
+        monografia = self.answer("tramite_monografia", "tramite de monografia")
+        self.assertEqual([t["slug"] for t in monografia["tramites"]],
+                         [t["slug"] for t in data.get_tramites_monografia()])
+
+    def test_low_confidence_goes_to_fallback(self):
+        payload = views._intent_payload("que tipos de becas hay", {"intent": "tipos_becas", "confidence": 0.2}, log=None)
+        self.assertEqual(payload["intent"], "desconocido")
+        self.assertEqual(payload["answer"], {"mensaje": FALLBACK_MENSAJE})
+        payload = views._intent_payload("cuentame un chiste", {"intent": "tipos_becas", "confidence": 0.9}, log=None)
+        self.assertEqual(payload["intent"], "desconocido")
+
+
+class CatalogTests(ApiTestCase):
+    def test_etag_and_304(self):
+        res = self.client.get("/api/nlp/catalog/tipos_becas/")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["answer"], dict(HANDLERS["tipos_becas"](views.HandlerContext(""))))
+        etag = res["ETag"]
+        self.assertIn("public", res["Cache-Control"])
+        self.assertIn(f"max-age={views.NLP_CATALOG_MAX_AGE}", res["Cache-Control"])
+
+        res = self.client.get("/api/nlp/catalog/tipos_becas/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res["ETag"], etag)
+        self.assertIn("public", res["Cache-Control"])
+
+        otro = self.client.get("/api/nlp/catalog/tramite_titulo/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(otro.status_code, 200)
+        self.assertNotEqual(otro["ETag"], etag)
+
+    def test_same_answer_as_intent_endpoint(self):
+        res = self.client.get("/api/nlp/catalog/tramite_titulo/")
+        payload = views._intent_payload("requisitos para el titulo", {"intent": "tramite_titulo", "confidence": 0.9}, log=None)
+        self.assertEqual(res.json()["answer"], dict(payload["answer"]))
+
+    def test_unknown_intent_is_not_cacheable(self):
+        for intent in ("estado_beca", "no_existe"):
+            with self.subTest(intent=intent):
+                res = self.client.get(f"/api/nlp/catalog/{intent}/")
+                self.assertEqual(res.status_code, 404)
+                self.assertEqual(res.json()["intents"], list(views.CATALOG_INTENTS))
+                self.assertFalse(res.has_header("ETag"))
+                self.assertNotIn("public", res.get("Cache-Control", ""))
+
+
+    def test_data_version_hashes_fixtures_in_chunks(self):
+        esperado = hashlib.sha256()
+        for p in data.DATA_FIXTURES:
+            esperado.update(p.name.encode("utf-8"))
+            if p.exists():
+                esperado.update(p.read_bytes())
+        data.get_data_version.cache_clear()
+        self.addCleanup(data.get_data_version.cache_clear)
+        with mock.patch.object(data, "HASH_CHUNK_BYTES", 7):
+            self.assertEqual(data.get_data_version(), esperado.hexdigest()[:16])
+
+class ShedTests(ApiTestCase):
+    """
+    Con ADMISSION lleno: respuesta por palabras clave o 503 (core/admission.py).
+    """
+    def setUp(self):
+        super().setUp()
+
+        def lleno(*args, **kwargs):
+            raise Overloaded("queue_full")
+
+        for patcher in (mock.patch.object(views.ADMISSION, "admit", lleno),
+                        mock.patch.object(views, "predecir_intencion", side_effect=AssertionError("sin neurona")),
+                        mock.patch.object(views, "predecir_intenciones", side_effect=AssertionError("sin neurona"))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_degrade_by_keyword(self):
+        res = self.intent("cuales son los requisitos para una beca")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["intent"], "requisitos_becas")
+        self.assertEqual(res.json()["degraded"], "queue_full")
+
+    def test_rules_still_answer(self):
+        res = self.intent("hola")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["intent"], "saludo")
+        self.assertNotIn("degraded", res.json())
+
+    def test_no_keyword_is_503(self):
+        res = self.intent("asdf qwer zxcv")
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res["Retry-After"], str(views.NLP_RETRY_AFTER_SECONDS))
+        self.assertEqual(res.json()["reason"], "queue_full")
+
+    def test_reject_mode(self):
+        with mock.patch.object(views, "NLP_SHED_MODE", "reject"):
+            self.assertEqual(self.intent("cuales son los requisitos para una beca").status_code, 503)
+
+    def test_batch(self):
+        res = self.batch(["hola", "que tipos de becas hay"])
+        self.assertEqual(res.status_code, 200)
+        saludo, tipos = res.json()["results"]
+        self.assertEqual(saludo["intent"], "saludo")
+        self.assertEqual((tipos["intent"], tipos["degraded"]), ("tipos_becas", "queue_full"))
+
+        # Sin respuesta por palabras clave: se marca en su lugar y el resto se contesta
+        res = self.batch(["hola", "asdf qwer", ""])
+        self.assertEqual(res.status_code, 200)
+        saludo, sobrecarga, vacia = res.json()["results"]
+        self.assertEqual(saludo["intent"], "saludo")
+        self.assertEqual(sobrecarga, {"detail": views.OVERLOADED_MENSAJE, "reason": "queue_full"})
+        self.assertEqual(vacia, {"detail": "query requerido"})
+
+        res = self.batch(["asdf qwer", ""])
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res["Retry-After"], str(views.NLP_RETRY_AFTER_SECONDS))
+
+    def test_degraded_fallback_is_not_logged(self):
+        with mock.patch.object(metrics.FALLBACKS, "labels") as contador:
+            res = self.intent("donde queda la cafeteria")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual((res.json()["intent"], res.json()["degraded"]), ("desconocido", "queue_full"))
+        contador.assert_not_called()
+        fallback_log.flush()
+        self.assertEqual(fallback_log.stats()["written"], 0)
+        self.assertFalse((self.tmp / "fallback_queries.jsonl").exists())
+
+
+class SessionFollowUpTests(ApiTestCase):
+    """
+    Turnos con conversation_id (core/sessions.py). La neurona se reemplaza
+    por una tabla para que el test no dependa del modelo entrenado.
+    """
+    predicciones = {
+        "tengo beca 2021-0001I": "estado_beca",
+        "que tipos de becas hay": "tipos_becas",
+        "como aplico a una beca": "aplicar_beca",
+        "donde recibo mi beca": "donde_recibo_beca",
+        "cual es mi horario": "horario_estudiante",
+        "y que beca tengo": "detalle_beca",
+    }
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(
+            views, "predecir_intencion",
+            lambda q: {"intent": self.predicciones.get(q, "desconocido"), "confidence": 0.9},
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.conv = f"test-{self._testMethodName}"
+
+    def turno(self, q):
+        res = self.intent(q, conversation_id=self.conv)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["conversation_id"], self.conv)
+        return res.json()
+
+    def test_beca_questions_after_carnet_turn(self):
+        self.assertEqual(self.turno("tengo beca 2021-0001I")["intent"], "estado_beca")
+        for q in ("que tipos de becas hay", "como aplico a una beca", "donde recibo mi beca"):
+            with self.subTest(q=q):
+                payload = self.turno(q)
+                self.assertEqual(payload["intent"], self.predicciones[q])
+                self.assertNotIn("2021-0001I", json.dumps(payload["answer"]))
+
+    def test_carnet_is_remembered_for_personal_intents(self):
+        self.turno("tengo beca 2021-0001I")
+        horario = self.turno("cual es mi horario")
+        self.assertEqual(horario["intent"], "horario_estudiante")
+        self.assertEqual(horario["answer"]["horario"]["carnet"], "2021-0001I")
+        detalle = self.turno("y que beca tengo")
+        self.assertEqual(detalle["answer"]["detalle_beca"]["carnet"], "2021-0001I")
+
+    def test_without_conversation_the_carnet_is_asked_again(self):
+        self.intent("tengo beca 2021-0001I")
+        res = self.intent("cual es mi horario").json()
+        self.assertEqual(res["answer"], {"mensaje": HANDLERS["horario_estudiante"].missing_carnet_message})
+
+    def test_personal_answers_are_not_cached(self):
+        res = self.intent("tengo beca 2021-0001I", conversation_id=self.conv)
+        self.assertIn("no-store", res["Cache-Control"])
+        res = self.intent("cual es mi horario", conversation_id=self.conv)
+        self.assertIn("no-store", res["Cache-Control"])
+
+
+class FallbackLogTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "fallback_queries.jsonl"
+
+    def entries(self, n, start=0):
+        return [{"query": f"consulta {i}", "intent": "desconocido"} for i in range(start, start + n)]
+
+    def read_all(self):
+        filas = []
+        for f in sorted(self.path.parent.glob("fallback_queries*")):
+            if f.suffix == ".lock":
+                continue
+            opener = gzip.open if f.suffix == ".gz" else open
+            with opener(f, "rt", encoding="utf-8") as fh:
+                filas.extend(json.loads(line) for line in fh)
+        return filas
+
+    def test_drain_writes_pending(self):
+        writer = fallback_log._Writer(self.path)
+        for e in self.entries(500):
+            writer.put(e)
+        writer.drain()
+        self.assertEqual(writer.stats(), {"pending": 0, "written": 500, "dropped": 0})
+        self.assertEqual([e["query"] for e in self.read_all()], [f"consulta {i}" for i in range(500)])
+        # Después de drain el hilo se vuelve a crear con el próximo put
+        writer.put(self.entries(1, 500)[0])
+        writer.drain()
+        self.assertEqual(len(self.read_all()), 501)
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        with mock.patch.object(fallback_log, "QUEUE_SIZE", 10):
+            writer = fallback_log._Writer(self.path)
+        with mock.patch.object(writer, "_ensure_started"):
+            for e in self.entries(15):
+                writer.put(e)
+        self.assertEqual(writer.dropped, 5)
+        self.assertEqual(writer.queue.qsize(), 10)
+
+    def test_rotation_by_size_and_compression(self):
+        with mock.patch.object(fallback_log, "MAX_BYTES", 2000), \
+                mock.patch.object(fallback_log, "COMPRESS_DELAY", 0):
+            writer = fallback_log._Writer(self.path)
+            for i in range(5):
+                writer._write(self.entries(40, i * 40))
+            writer.drain()
+        rotados = sorted(self.path.parent.glob("fallback_queries.*.jsonl*"))
+        self.assertGreaterEqual(len(rotados), 1)
+        for f in rotados:
+            # La compresión corre en un threading.Timer
+            gz = f if f.suffix == ".gz" else Path(str(f) + ".gz")
+            for _ in range(100):
+                if gz.exists() and not gz.with_suffix("").exists():
+                    break
+                time.sleep(0.05)
+            self.assertTrue(gz.exists(), gz)
+        self.assertEqual(sorted(e["query"] for e in self.read_all()),
+                         sorted(e["query"] for e in self.entries(200)))
+
+    def test_daily_rotation(self):
+        writer = fallback_log._Writer(self.path)
+        writer._write(self.entries(3))
+        ayer = time.time() - 86400
+        os.utime(self.path, (ayer, ayer))
+        with mock.patch.object(fallback_log, "ROTATE_DAILY", True), \
+                mock.patch.object(fallback_log, "COMPRESS_DELAY", 60):
+            writer._write(self.entries(2, 3))
+        self.assertEqual(len(self.path.read_text(encoding="utf-8").splitlines()), 2)
+        self.assertEqual(len(list(self.path.parent.glob("fallback_queries.*.jsonl"))), 1)
+
+
+class TelemetryTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def rows(self, n):
+        return [{
+            "ts_ms": 1735732800000 + i,  # 2025-01-01 12:00 UTC
+            "query_hash": telemetry.query_hash(f"consulta {i}"),
+            "intent": ("tipos_becas", "estado_beca", "")[i % 3],
+            "confidence": i / n,
+            "path": ("rule", "model")[i % 2],
+            "model_us": 1.5 * i,
+            "handler_us": 0.25,
+            "total_us": 2.0 * i,
+            "session_hit": i % 2,
+            "fragment_hit": 1 - i % 2,
+        } for i in range(n)]
+
+    def columns(self, rows):
+        return {name: [r[name] for r in rows] for name, _ in telemetry.COLUMNS}
+
+    def assert_same(self, cols, rows):
+        for name, dtype in telemetry.COLUMNS:
+            with self.subTest(col=name):
+                esperado = [r[name] for r in rows]
+                if dtype in ("cat", "<i8", "<u8", "u1"):
+                    self.assertEqual(cols[name].tolist(), esperado)
+                else:
+                    for a, b in zip(cols[name].tolist(), esperado):
+                        self.assertAlmostEqual(a, b, places=4)
+
+    def test_nlpt_round_trip(self):
+        rows = self.rows(50)
+        path = self.dir / "x.nlpt"
+        telemetry._write_nlpt(self.columns(rows), path)
+        self.assert_same(telemetry._read_nlpt(path), rows)
+
+    def test_nlpt_rejects_other_files(self):
+        path = self.dir / "x.nlpt"
+        path.write_bytes(b"PAR1")
+        with self.assertRaises(ValueError):
+            telemetry._read_nlpt(path)
+
+    def test_load_day_concatenates_files(self):
+        rows = self.rows(30)
+        carpeta = self.dir / "20250101"
+        carpeta.mkdir()
+        telemetry._write_nlpt(self.columns(rows[:10]), carpeta / "1-120000-1.nlpt")
+        telemetry._write_nlpt(self.columns(rows[10:]), carpeta / "2-120000-1.nlpt")
+        self.assert_same(telemetry.load_day("20250101", self.dir), rows)
+        self.assertEqual(telemetry.load_day("20250102", self.dir)["ts_ms"].size, 0)
+
+    def test_parquet_without_pyarrow_is_a_clear_error(self):
+        carpeta = self.dir / "20250101"
+        carpeta.mkdir()
+        (carpeta / "1-120000-1.parquet").write_bytes(b"PAR1")
+        with mock.patch.object(telemetry, "_arrow", lambda: None):
+            with self.assertRaisesRegex(RuntimeError, "pyarrow"):
+                telemetry.load_day("20250101", self.dir)
+
+    def test_timer_flushes_without_new_rows(self):
+        with mock.patch.object(telemetry, "TELEMETRY_DIR", self.dir), \
+                mock.patch.object(telemetry, "FLUSH_SECONDS", 0.2), \
+                mock.patch.object(telemetry, "_arrow", lambda: None):
+            buffer = telemetry._Buffer()
+            for row in self.rows(3):
+                buffer.append(row)
+            for _ in range(100):
+                if list(self.dir.glob("*/*.nlpt")):
+                    break
+                time.sleep(0.05)
+            self.assert_same(telemetry.load_day("20250101", self.dir), self.rows(3))
+            self.assertIsNone(buffer.started)
+
+
+def _metrics_worker(n):
+    # Corre en un proceso hijo (fork): escribe en el _STORE parcheado del padre
+    metrics.REQUESTS.labels("intent", "saludo", "rule").inc(n)
+    metrics.REQUEST_LATENCY.labels("intent", "saludo").observe(0.003)
+    metrics.MODEL_LOADED_AT.set(1000.0 + n)
+
+
+class MetricsAggregationTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        for patcher in (mock.patch.object(metrics, "_STORE", metrics._Store(self.dir)),
+                        mock.patch.object(metrics, "ENABLED", True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def line(self, texto, prefijo):
+        return [line for line in texto.splitlines() if line.startswith(prefijo)]
+
+    @skipUnless(hasattr(os, "fork"), "necesita fork")
+    def test_counters_and_histograms_sum_across_processes(self):
+        ctx = multiprocessing.get_context("fork")
+        procesos = [ctx.Process(target=_metrics_worker, args=(n,)) for n in (1, 2, 3)]
+        for p in procesos:
+            p.start()
+        for p in procesos:
+            p.join(30)
+            self.assertEqual(p.exitcode, 0)
+        _metrics_worker(4)
+        self.assertEqual(len(list(self.dir.glob("counter_*.db"))), 4)
+
+        texto = metrics.render()
+        self.assertEqual(self.line(texto, "nlp_requests_total{"),
+                         ['nlp_requests_total{endpoint="intent",intent="saludo",path="rule"} 10.0'])
+        labels = 'endpoint="intent",intent="saludo"'
+        self.assertIn(f'nlp_request_duration_seconds_bucket{{{labels},le="0.001"}} 0.0', texto)
+        self.assertIn(f'nlp_request_duration_seconds_bucket{{{labels},le="0.005"}} 4.0', texto)
+        self.assertIn(f'nlp_request_duration_seconds_bucket{{{labels},le="+Inf"}} 4.0', texto)
+        self.assertIn(f"nlp_request_duration_seconds_count{{{labels}}} 4.0", texto)
+        # Gauges: solo los de procesos vivos, con su pid
+        self.assertEqual(self.line(texto, "nlp_model_loaded_timestamp_seconds{"),
+                         [f'nlp_model_loaded_timestamp_seconds{{pid="{os.getpid()}"}} 1004.0'])
+
+    def test_threads_write_their_own_files(self):
+        hilos = [threading.Thread(target=metrics.FALLBACKS.labels("final_fallback").inc) for _ in range(4)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        sums, _ = metrics._STORE.collect()
+        self.assertEqual(sums[metrics._key("nlp_fallbacks_total", [["reason", "final_fallback"]])], 4.0)
+
+    def test_reopened_file_keeps_counting(self):
+        path = self.dir / "counter_999999_1.db"
+        f = metrics._MmapFile(path)
+        f.add("a", 2.0)
+        f.add("b", 1.0)
+        f = metrics._MmapFile(path)
+        f.add("a", 3.0)
+        sums, _ = metrics._STORE.collect()
+        self.assertEqual(dict(sums), {"a": 5.0, "b": 1.0})
+
+    def test_file_grows_past_initial_size(self):
+        f = metrics._MmapFile(self.dir / "counter_999999_1.db")
+        keys = [metrics._key("m", [["i", str(i)]]) for i in range(5000)]
+        for k in keys:
+            f.add(k, 1.0)
+        sums, _ = metrics._STORE.collect()
+        self.assertEqual(len(sums), 5000)
+        self.assertGreater((self.dir / "counter_999999_1.db").stat().st_size, metrics.INITIAL_SIZE)
+
+
+class ProfilingTests(SimpleTestCase):
+    def request(self, value):
+        request = RequestFactory().post("/api/nlp/intent/", HTTP_X_NLP_PROFILE=value)
+        request.user = mock.Mock(is_staff=False)
+        return request
+
+    def test_disabled_by_default(self):
+        self.assertFalse(settings.NLP_PROFILE_ENABLED)
+
+    def test_tokens_need_their_own_secret(self):
+        with mock.patch.object(profiling, "ENABLED", True), mock.patch.object(profiling, "_SIGNER", None):
+            with self.assertRaises(ValueError):
+                profiling.make_token()
+            # Firmado con SECRET_KEY (la del repo): no vale
+            forjado = signing.TimestampSigner(salt="core.profiling").sign("cprofile")
+            self.assertIsNone(profiling.requested_mode(self.request(forjado)))
+        signer = signing.TimestampSigner(key="otro-secreto", salt="core.profiling")
+        with mock.patch.object(profiling, "ENABLED", True), mock.patch.object(profiling, "_SIGNER", signer):
+            self.assertEqual(profiling.requested_mode(self.request(profiling.make_token("sample"))), "sample")
+            self.assertIsNone(profiling.requested_mode(self.request("cprofile")))  # no es staff
+        with mock.patch.object(profiling, "_SIGNER", signer):
+            self.assertIsNone(profiling.requested_mode(self.request(profiling.make_token())))
+
+    def test_prune_keeps_newest(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            for i in range(6):
+                p = base / f"nlp_intent-{i}.{'prof' if i % 2 else 'collapsed'}"
+                p.write_text("x")
+                os.utime(p, (1000 + i, 1000 + i))
+            (base / "notas.txt").write_text("x")
+            profiling._prune(base, 4)
+            self.assertEqual(sorted(p.name for p in base.iterdir()), [
+                "nlp_intent-2.collapsed", "nlp_intent-3.prof",
+                "nlp_intent-4.collapsed", "nlp_intent-5.prof", "notas.txt",
+            ])
+            profiling._prune(base, 0)
+            self.assertEqual(len(list(base.iterdir())), 5)
+
+    def test_offline_repeat_must_be_positive(self):
+        for repeat in ("0", "-2"):
+            with self.subTest(repeat=repeat), self.assertRaisesMessage(CommandError, "--repeat"):
+                call_command("profile_intent", __file__, "--repeat", repeat, stdout=StringIO())
+
+
+class LoadBenchCompareTests(SimpleTestCase):
+    def result(self, **por_nivel):
+        """
+        {"targets": [...]} como el JSON de bench_intent; por_nivel: c1={...}, c4={...}.
+        """
+        runs = []
+        for nivel, valores in por_nivel.items():
+            runs.append({"concurrency": int(nivel[1:]), "p95_ms": 10.0, "p99_ms": 20.0,
+                         "throughput_rps": 100.0, "errors": 0, **valores})
+        return {"targets": [{"target": "wsgi", "runs": runs}]}
+
+    def test_no_regression(self):
+        base = self.result(c1={}, c4={})
+        self.assertEqual(loadbench.compare(base, base), [])
+        mejor = self.result(c1={"p95_ms": 5.0, "throughput_rps": 300.0}, c4={})
+        self.assertEqual(loadbench.compare(mejor, base), [])
+
+    def test_latency_regression_needs_ratio_and_absolute_slack(self):
+        base = self.result(c1={"p95_ms": 1.0, "p99_ms": 1.0}, c4={})
+        # 1.4x pero solo 0.4 ms: ruido
+        self.assertEqual(loadbench.compare(self.result(c1={"p95_ms": 1.4, "p99_ms": 1.0}, c4={}), base), [])
+        regresiones = loadbench.compare(
+            self.result(c1={"p95_ms": 1.0, "p99_ms": 1.0}, c4={"p95_ms": 13.0, "p99_ms": 31.0}), base,
+        )
+        self.assertEqual(len(regresiones), 2)
+        self.assertTrue(regresiones[0].startswith("wsgi c=4 p95_ms: 13.0 > 1.25 x 10.0"))
+        self.assertTrue(regresiones[1].startswith("wsgi c=4 p99_ms"))
+
+    def test_throughput_and_errors(self):
+        base = self.result(c1={})
+        regresiones = loadbench.compare(self.result(c1={"throughput_rps": 79.0, "errors": 2}), base)
+        self.assertEqual(regresiones, [
+            "wsgi c=1 throughput: 79.0 rps < 0.8 x 100.0",
+            "wsgi c=1 errores: 2 (antes 0)",
+        ])
+        self.assertEqual(loadbench.compare(self.result(c1={"throughput_rps": 81.0}), base), [])
+
+    def test_thresholds_override(self):
+        base = self.result(c1={})
+        actual = self.result(c1={"p95_ms": 12.0})
+        self.assertEqual(loadbench.compare(actual, base), [])
+        self.assertEqual(len(loadbench.compare(actual, base, {"p95_ms": 1.1})), 1)
+
+    def test_only_matching_target_and_level(self):
+        base = self.result(c1={})
+        otro_nivel = self.result(c16={"p95_ms": 999.0})
+        self.assertEqual(loadbench.compare(otro_nivel, base), [])
+        otro_objetivo = {"targets": [{**self.result(c1={"p95_ms": 999.0})["targets"][0], "target": "asgi"}]}
+        self.assertEqual(loadbench.compare(otro_objetivo, base), [])
+        self.assertEqual(loadbench.compare(self.result(c1={}), {}), [])
+
+    def test_summary_percentiles(self):
+        resumen = loadbench._summary(range(1, 101))
+        self.assertEqual(resumen, {"count": 100, "p50_ms": 51, "p95_ms": 95, "p99_ms": 99})
+        self.assertEqual(loadbench._summary([])["p95_ms"], 0.0)
+
+
+class FixtureGenTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.dir = Path(cls._tmp.name)
+        cls.conteos = fixturegen.generate(cls.dir, students=3000, periods=6, tramites=20, image_bytes=64)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp.cleanup()
+        super().tearDownClass()
+
+    def load(self, name):
+        with open(data.fixture_path(name, self.dir), encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_counts(self):
+        self.assertEqual(self.conteos["students"], 3000)
+        self.assertEqual(len(self.load("students")), 3000)
+        self.assertEqual(self.conteos["horarios"], 6 * len(fixturegen.group_codes()))
+        self.assertEqual(self.load("becas"), json.loads(data.fixture_path("becas", settings.BASE_DIR).read_text("utf-8")))
+
+    def test_unique_carnets(self):
+        carnets = [s["fields"]["carnet"] for s in self.load("students")]
+        self.assertEqual(len(set(carnets)), len(carnets))
+        self.assertTrue(all(views.CARNET_REGEX.fullmatch(c) for c in carnets))
+
+    def test_carnets_unique_at_every_scale(self):
+        for n in (1, 5 * 9_999, 5 * 9_999 + 1, 123_457, fixturegen.MAX_STUDENTS):
+            with self.subTest(n=n):
+                carnets = {fixturegen._carnet(i, n)[0] for i in range(n)}
+                self.assertEqual(len(carnets), n)
+                # Las cohortes de los carnets sintéticos de una captura nunca existen
+                self.assertFalse({c for c in carnets if int(c[:4]) in capture.SYNTHETIC_COHORTS})
+        self.assertTrue(all(views.CARNET_REGEX.fullmatch(c) for c in carnets))
+        with self.assertRaises(ValueError):
+            fixturegen.generate(self.dir / "x", students=fixturegen.MAX_STUDENTS + 1)
+
+    def test_tiene_beca_matches_latest_assignment(self):
+        ultima = {}
+        for a in self.load("asignaciones"):
+            f = a["fields"]
+            if f["student"] not in ultima or f["fecha_asignacion"] > ultima[f["student"]]["fecha_asignacion"]:
+                ultima[f["student"]] = f
+        self.assertTrue(ultima)
+        for st in self.load("students"):
+            actual = ultima.get(st["pk"])
+            with self.subTest(carnet=st["fields"]["carnet"]):
+                self.assertEqual(st["fields"]["tiene_beca"], actual is not None and actual["estado"] == "activa")
+
+    def test_references_and_groups(self):
+        students = {s["pk"]: s["fields"] for s in self.load("students")}
+        becas = {b["pk"] for b in self.load("becas")}
+        for a in self.load("asignaciones"):
+            self.assertIn(a["fields"]["student"], students)
+            self.assertIn(a["fields"]["beca"], becas)
+            self.assertEqual(a["fields"]["activo"], a["fields"]["estado"] in ("activa", "asignada"))
+        for f in students.values():
+            self.assertEqual(f["grupo_principal"][0], str(f["anio_actual"]))
+            if f["grupo_secundario"]:
+                self.assertEqual(int(f["grupo_secundario"][0]), f["anio_actual"] - 1)
+
+    def test_deterministic(self):
+        otro = self.dir / "otra"
+        fixturegen.generate(otro, students=3000, periods=6, tramites=20, image_bytes=64)
+        for name in ("students", "asignaciones", "horarios", "tramites"):
+            self.assertEqual(data.fixture_path(name, otro).read_bytes(), data.fixture_path(name, self.dir).read_bytes())
+
+
+class MemProfileClassifyTests(SimpleTestCase):
+    def tb(self, *frames):
+        # tracemalloc.Traceback recibe los frames del más nuevo al más viejo
+        return tracemalloc.Traceback(tuple(frames))
+
+    def test_importlib_frames_count_for_the_importer(self):
+        sklearn = "/venv/lib/site-packages/sklearn/base.py"
+        nuevo = self.tb(("<frozen importlib._bootstrap_external>", 750),
+                        ("<frozen importlib._bootstrap>", 488), (sklearn, 17),
+                        ("/srv/chatbot/core/nlp.py", 60))
+        self.assertEqual(memprofile.classify(nuevo), ("model", "sklearn/base.py:17"))
+        django = self.tb(("<frozen importlib._bootstrap>", 488), ("/venv/lib/site-packages/django/apps/config.py", 5))
+        self.assertEqual(memprofile.classify(django)[0], "django")
+        solo = self.tb(("<frozen importlib._bootstrap>", 488), ("<string>", 1))
+        self.assertEqual(memprofile.classify(solo)[0], memprofile.IMPORTS)
+
+    def test_newest_known_frame_decides(self):
+        tb = self.tb(("/usr/lib/python3.12/json/decoder.py", 353),
+                     (str(Path(data.__file__)), 1), ("/srv/chatbot/core/views.py", 10))
+        self.assertTrue(memprofile.classify(tb)[0].startswith("data"))
+        self.assertEqual(memprofile.classify(self.tb(("/usr/lib/python3.12/json/decoder.py", 353)))[0],
+                         memprofile.OTHER)
+
+    def test_file_subsystem(self):
+        self.assertEqual(memprofile.file_subsystem(str(Path(data.__file__))), "data")
+        self.assertEqual(memprofile.file_subsystem("/venv/lib/site-packages/numpy/core/x.py"), "model")
+        self.assertEqual(memprofile.file_subsystem("<frozen importlib._bootstrap>"), memprofile.IMPORTS)
+
+
+    def test_raw_traces_match_public_api(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(8)
+            self.addCleanup(tracemalloc.stop)
+        datos = [bytearray(1000 + i) for i in range(50)]  # noqa: F841 (vivos en la foto)
+        snap = tracemalloc.take_snapshot()
+        rapido = memprofile.breakdown(snap), memprofile.by_file(snap)
+        with mock.patch.object(memprofile, "_raw_ok", return_value=False):
+            self.assertEqual((memprofile.breakdown(snap), memprofile.by_file(snap)), rapido)
+        self.assertGreaterEqual(rapido[1].get(__file__, 0), 50 * 1000)
+
+
+class MemProfileGrowthTests(ApiTestCase):
+    def growth(self, por_archivo, sesiones, tope):
+        from core.management.commands.mem_profile import WARM_ROUNDS, Command
+
+        rondas = WARM_ROUNDS + 4
+        totales = [1_000_000 + 100_000 * r for r in range(rondas)]
+        return Command()._growth(totales, (*por_archivo, 4), [{}] * rondas, sesiones[:rondas], tope)
+
+    def test_capped_sessions_are_not_unbounded_growth(self):
+        base = {"/srv/chatbot/core/sessions.py": 0, "/srv/chatbot/core/views.py": 1000}
+        final = {"/srv/chatbot/core/sessions.py": 400_000, "/srv/chatbot/core/views.py": 1000}
+        sesiones = [100 * (r + 1) for r in range(10)]
+        self.assertEqual(self.growth((base, final), sesiones, tope=10_000), [])
+        # Sin tope (o pasado) sí cuenta, y se ve el archivo
+        for tope in (None, 500):
+            kinds = [(g["kind"], g["name"]) for g in self.growth((base, final), sesiones, tope)]
+            self.assertIn(("file", "core/sessions.py"), kinds)
+            self.assertIn(("sessions", "SESSIONS"), kinds)
+
+    def test_other_growth_still_reported(self):
+        base = {"/srv/chatbot/core/sessions.py": 0, "/srv/chatbot/core/handlers.py": 0}
+        final = {"/srv/chatbot/core/sessions.py": 200_000, "/srv/chatbot/core/handlers.py": 200_000}
+        hallazgos = self.growth((base, final), [10] * 10, tope=10_000)
+        self.assertEqual([(g["kind"], g["name"]) for g in hallazgos],
+                         [("traced", "total trazado"), ("file", "core/handlers.py")])
+
+    def test_replay_goes_through_wsgi_handler(self):
+        import weakref
+
+        from django.core.handlers.wsgi import WSGIHandler
+
+        from core.management.commands.mem_profile import _post
+
+        handler, factory = WSGIHandler(), RequestFactory()
+        self.assertEqual(_post(handler, factory, {"query": "hola"}), 200)
+        antes = len(weakref.finalize._registry)
+        for i in range(20):
+            self.assertEqual(_post(handler, factory, {"query": "hola", "conversation_id": f"m{i}"}), 200)
+        self.assertEqual(len(weakref.finalize._registry), antes)
+        self.assertEqual(_post(handler, factory, {}), 400)
+
+class _FakeSender:
+    def __init__(self, log):
+        self.log = log
+
+    def send(self, q, conversation_id=None, path=None):
+        self.log.append((q, conversation_id, path))
+        return 200, json.dumps({"intent": "x"}).encode()
+
+    def close(self):
+        pass
+
+
+class ReplayTests(SimpleTestCase):
+    KEY = b"k" * 32
+
+    def real_carnet(self):
+        return next(iter(data._student_index_by_carnet()))
+
+    def test_anonymize_maps_carnets_to_synthetic_cohorts(self):
+        real = self.real_carnet()
+        q, carnets, conv = capture.anonymize(f"beca de {real.lower()} y 2019-9999I", "conv-1", key=self.KEY)
+        sinteticos = capture.CARNET_REGEX.findall(q)
+        self.assertEqual(len(sinteticos), 2)
+        self.assertNotIn(real, q.upper())
+        for c in sinteticos:
+            self.assertIn(int(c[:4]), capture.SYNTHETIC_COHORTS)
+        self.assertEqual(carnets, {sinteticos[0]: True, sinteticos[1]: False})
+        self.assertNotEqual(conv, "conv-1")
+        # Misma clave, mismo sintético y mismo conversation_id; sin conversación, None
+        self.assertEqual(capture.anonymize(real, "conv-1", key=self.KEY)[0], sinteticos[0])
+        self.assertEqual(capture.anonymize(real, "conv-1", key=self.KEY)[2], conv)
+        self.assertIsNone(capture.anonymize(real, None, key=self.KEY)[2])
+        self.assertNotEqual(capture.anonymize(real, key=b"z" * 32)[0], sinteticos[0])
+
+    def test_plan_maps_known_synthetic_carnets_to_real_ones(self):
+        real = self.real_carnet()
+        anon_q, carnets, _ = capture.anonymize(f"horario {real}", key=self.KEY)
+        falso_q, falsos, _ = capture.anonymize("horario 2019-9999I", key=self.KEY)
+        registros = [
+            {"t": 100.0, "query": anon_q, "carnets": carnets, "endpoint": "intent"},
+            {"t": 101.0, "query": falso_q, "carnets": falsos, "endpoint": "async", "conversation_id": "c1"},
+            {"t": 104.0, "query": anon_q, "carnets": carnets},
+        ]
+        reales = ["2021-0001I", "2021-0002I", "2021-0003I"]
+        pasos = replay.plan(registros, speed=2, carnets=reales)
+        self.assertEqual([p[0] for p in pasos], [0.0, 0.5, 2.0])
+        self.assertIn(pasos[0][1].split()[-1], reales)
+        self.assertEqual(pasos[0][1], pasos[2][1])
+        self.assertEqual(pasos[1][1], falso_q)  # no existía: sigue sin existir
+        self.assertEqual(pasos[1][2], "c1")
+        self.assertEqual([p[3] for p in pasos],
+                         [loadbench.INTENT_PATH, loadbench.ASYNC_INTENT_PATH, loadbench.INTENT_PATH])
+        self.assertEqual(len(replay.plan(registros, limit=2)), 2)
+        self.assertEqual(len(replay.plan(registros, duration=1.5)), 2)
+        self.assertEqual(replay.plan(registros)[0][1], anon_q)  # sin carnets reales no se cambia
+        with self.assertRaises(ValueError):
+            replay.plan(registros, speed=0)
+
+    def test_run_warms_up_before_measuring_and_routes_by_endpoint(self):
+        log = []
+        pasos = [(0.0, "hola", None, loadbench.INTENT_PATH),
+                 (0.01, "becas", "c1", loadbench.ASYNC_INTENT_PATH)]
+        res = replay.run(lambda: _FakeSender(log), pasos, max_in_flight=3, warmup=5)
+        calentamiento, medidos = log[:5], log[5:]
+        self.assertTrue(all(conv is None for _, conv, _ in calentamiento))
+        self.assertEqual(res["requests"], 2)
+        self.assertEqual(res["errors"], 0)
+        self.assertEqual(sorted(medidos), [("becas", "c1", loadbench.ASYNC_INTENT_PATH),
+                                           ("hola", None, loadbench.INTENT_PATH)])
+        self.assertEqual(res["by_intent"]["x"]["count"], 2)
+
+
+class ReporteEstudiantesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from becas.models import AsignacionBeca, Beca
+        from categorias.models import Categoria
+        from students.models import Student
+
+        cat = Categoria.objects.create(nombre="Becas")
+        cls.becas = {t: Beca.objects.create(categoria=cat, tipo=t, requisitos="-")
+                     for t in ("Beca alimenticia", "Beca monetaria", "Beca interna")}
+        est = {c: Student.objects.create(nombre=f"Est {c}", carnet=c, grupo_principal="G1", anio_actual=2)
+               for c in ("2024-0002I", "2024-0001I", "2024-0003I")}
+        filas = [
+            ("2024-0001I", "Beca monetaria", "I Semestre 2025", "100.00", True),
+            ("2024-0001I", "Beca alimenticia", "I Semestre 2025", "50.50", True),
+            ("2024-0001I", "Beca interna", "II Semestre 2024", None, True),
+            ("2024-0002I", "Beca alimenticia", "II Semestre 2024", "40.00", True),
+            ("2024-0003I", "Beca interna", "I Semestre 2025", "10.00", False),
+        ]
+        for carnet, tipo, periodo, monto, activo in filas:
+            AsignacionBeca.objects.create(student=est[carnet], beca=cls.becas[tipo], periodo=periodo,
+                                          monto_mensual=monto, activo=activo)
+
+    def run_jsonl(self, *args):
+        out = StringIO()
+        call_command("reporte_estudiantes", "--format", "jsonl", *args, stdout=out, stderr=StringIO())
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_groups_active_assignments_per_student(self):
+        from core.management.commands.reporte_estudiantes import estudiantes
+
+        filas = list(estudiantes(chunk_size=1))
+        self.assertEqual([e["carnet"] for e in filas], ["2024-0001I", "2024-0002I"])
+        primero = filas[0]
+        self.assertEqual(primero["tipos_beca"], ["Beca alimenticia", "Beca interna", "Beca monetaria"])
+        self.assertEqual(primero["periodos"], ["I Semestre 2025", "II Semestre 2024"])
+        self.assertEqual(primero["monto_mensual_total"], "150.50")
+        self.assertEqual(self.run_jsonl(), filas)
+
+    def test_periodo_and_beca_filters(self):
+        por_periodo = self.run_jsonl("--periodo", "II Semestre 2024")
+        self.assertEqual([(e["carnet"], e["tipos_beca"]) for e in por_periodo],
+                         [("2024-0001I", ["Beca interna"]), ("2024-0002I", ["Beca alimenticia"])])
+        # El ejemplo del uso: parte única del tipo, sin distinguir mayúsculas
+        alimenticia = self.run_jsonl("--beca", "ALIMENTICIA")
+        self.assertEqual([e["carnet"] for e in alimenticia], ["2024-0001I", "2024-0002I"])
+        self.assertEqual(alimenticia[0]["monto_mensual_total"], "50.50")
+        pk = str(self.becas["Beca monetaria"].pk)
+        varias = self.run_jsonl("--beca", pk, "--beca", "beca interna")
+        self.assertEqual([e["tipos_beca"] for e in varias], [["Beca interna", "Beca monetaria"]])
+
+    def test_unknown_or_ambiguous_beca(self):
+        with self.assertRaisesMessage(CommandError, "No existe"):
+            self.run_jsonl("--beca", "deportiva")
+        with self.assertRaisesMessage(CommandError, "ambigua"):
+            self.run_jsonl("--beca", "beca")
+
+
+class BulkLoadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.dir = Path(cls.tmp.name) / "fx"
+        cls.conteos = fixturegen.generate(cls.dir, students=300, periods=2, tramites=20, image_bytes=3000, seed=5)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    def bulk_load(self, *args, base=None):
+        reporte = Path(self.tmp.name) / "reporte.json"
+        call_command("bulk_load", "--dir", str(base or self.dir), "--batch-size", "64", "--no-copy",
+                     "--json", str(reporte), *args, stdout=StringIO(), stderr=StringIO())
+        return json.loads(reporte.read_text("utf-8"))
+
+    def counts(self):
+        return {label: spec.model.objects.count() for label, spec in bulkload.SPECS.items()}
+
+    def test_loads_gen_fixtures_output_and_is_idempotent(self):
+        from horarios.models import Horario
+        from students.models import Student
+
+        primera = self.bulk_load()
+        self.assertEqual(primera["models"]["students.student"]["created"], self.conteos["students"])
+        self.assertEqual(primera["models"]["categorias.categoria"]["mode"], "write")
+        self.assertEqual(sum(m["skipped"] for m in primera["models"].values()), 0)
+        antes = self.counts()
+        self.assertEqual(antes["becas.asignacionbeca"], self.conteos["asignaciones"])
+        imagenes = dict(Horario.objects.values_list("group_code", "imagen")[:5])
+
+        segunda = self.bulk_load()
+        self.assertEqual(self.counts(), antes)
+        self.assertTrue(all(m["created"] == 0 for m in segunda["models"].values()))
+        self.assertEqual(segunda["models"]["students.student"]["updated"], self.conteos["students"])
+        self.assertEqual(dict(Horario.objects.values_list("group_code", "imagen")[:5]), imagenes)
+        self.assertEqual(Student.objects.filter(tiene_beca=True).count(),
+                         sum(1 for s in json.loads(data.fixture_path("students", self.dir).read_text("utf-8"))
+                             if s["fields"]["tiene_beca"]))
+
+    def test_missing_dependency_resolved_from_project_fixture_or_db(self):
+        self.bulk_load("--only", "categorias.categoria")
+        sin_categorias = Path(self.tmp.name) / "sin_categorias"
+        (sin_categorias / "tramites" / "fixtures").mkdir(parents=True)
+        data.fixture_path("tramites", sin_categorias).write_bytes(data.fixture_path("tramites", self.dir).read_bytes())
+
+        r = self.bulk_load("--only", "tramites.tramite", base=sin_categorias)
+        self.assertEqual(r["models"]["categorias.categoria"]["mode"], "resolve")
+        self.assertEqual(r["models"]["tramites.tramite"]["created"], self.conteos["tramites"])
+
+        with mock.patch("core.management.commands.bulk_load.PROJECT_DIR", sin_categorias):
+            r = self.bulk_load("--only", "tramites.tramite", base=sin_categorias)
+        self.assertEqual(r["models"]["categorias.categoria"]["mode"], "db")
+        self.assertEqual(r["models"]["tramites.tramite"]["updated"], self.conteos["tramites"])
+        self.assertEqual(r["models"]["tramites.tramite"]["skipped"], 0)
+
+        with self.assertRaisesMessage(CommandError, "No existen"):
+            self.bulk_load("--only", "becas.beca", base=sin_categorias)
+
+
+class StreamingBase64Tests(SimpleTestCase):
+    def test_blob_split_across_chunks(self):
+        blobs = [os.urandom(n) for n in (0, 1, 57, 1000)]
+        objetos = [{"pk": i, "fields": {"nombre": f'h{i} "x"', "imagen": base64.encodebytes(b).decode()}}
+                   for i, b in enumerate(blobs)]
+        # Como lo escriben algunos serializadores: "/" escapado y saltos de línea cada 76
+        texto = json.dumps(objetos).replace("/", "\\/")
+        for chunk in (1, 3, 7, 64, 1 << 16):
+            with self.subTest(chunk=chunk):
+                leidos = list(bulkload.JSONArrayReader(StringIO(texto), blob_fields=["imagen"], chunk_chars=chunk))
+                self.assertEqual([o["fields"]["imagen"] for o in leidos], blobs)
+                self.assertEqual([o["fields"]["nombre"] for o in leidos], [o["fields"]["nombre"] for o in objetos])
+
+    def test_b64_stream_keeps_partial_quads_and_escapes(self):
+        crudo = base64.b64encode(b"hola mundo, en pedazos").decode().replace("/", "\\/")
+        stream = bulkload._B64Stream()
+        for i in range(0, len(crudo), 3):
+            stream.feed(crudo[i:i + 3])
+        self.assertEqual(stream.finish(), b"hola mundo, en pedazos")
+        roto = bulkload._B64Stream()
+        roto.feed("aGVsbG8")
+        with self.assertRaises(ValueError):
+            roto.finish()
+
+    def test_not_a_list(self):
+        with self.assertRaises(ValueError):
+            list(bulkload.JSONArrayReader(StringIO('{"a": 1}')))
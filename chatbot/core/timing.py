@@ -0,0 +1,202 @@
+# core/timing.py
+"""
+Tiempos por etapa de cada request (NLP_SERVER_TIMING=1).
+
+ServerTimingMiddleware abre un cronómetro por request; el código mide sus
+etapas con
+
+    with timing.stage("model"):
+        pred = predecir_intencion(q)
+
+y al final la respuesta lleva
+
+    Server-Timing: parse;dur=0.041, rules;dur=0.012, model;dur=3.87, ..., total;dur=4.6
+
+(milisegundos) y cada etapa suma a un histograma del proceso, por vista
+(stage_stats(), expuesto en /api/nlp/stats/).
+
+Apagado, el middleware ni se instala (MiddlewareNotUsed) y stage() es una
+lectura de ContextVar que devuelve un context manager vacío ya creado.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+ENABLED = getattr(settings, "NLP_SERVER_TIMING", False)
+
+# Límites superiores de los buckets, en ms (el último bucket es +Inf)
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_CURRENT = ContextVar("nlp_request_timer", default=None)
+_NULL = nullcontext()
+
+
+class RequestTimer:
+    """
+    Etapas de UN request, en el orden en que aparecieron. Si una etapa se
+    repite (un handler por consulta en el batch), los tiempos se suman.
+    """
+    __slots__ = ("started", "stages")
+
+    def __init__(self):
+        self.started = time.perf_counter_ns()
+        self.stages = {}
+
+    def add(self, name: str, elapsed_ns: int):
+        self.stages[name] = self.stages.get(name, 0) + elapsed_ns
+
+    def header(self, total_ns: int) -> str:
+        partes = [f"{name};dur={ns / 1e6:.3f}" for name, ns in self.stages.items()]
+        partes.append(f"total;dur={total_ns / 1e6:.3f}")
+        return ", ".join(partes)
+
+
+class _Stage:
+    __slots__ = ("timer", "name", "t0")
+
+    def __init__(self, timer: RequestTimer, name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter_ns() - self.t0)
+        return False
+
+
+def stage(name: str):
+    """
+    Context manager que mide una etapa del request actual (o no hace nada).
+    """
+    timer = _CURRENT.get()
+    if timer is None:
+        return _NULL
+    return _Stage(timer, name)
+
+
+def add(name: str, elapsed_ns: int):
+    """
+    Para el código que ya midió por su cuenta (los handlers).
+    """
+    timer = _CURRENT.get()
+    if timer is not None:
+        timer.add(name, elapsed_ns)
+
+
+# ─────────────────────────────────────────────
+# Histogramas del proceso
+# ─────────────────────────────────────────────
+
+class Histogram:
+    def __init__(self, bounds=BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def quantile(self, q: float) -> float:
+        # Cota superior del bucket donde cae el cuantil (max para el último)
+        objetivo = q * self.count
+        acumulado = 0
+        for i, n in enumerate(self.counts):
+            acumulado += n
+            if acumulado >= objetivo and n:
+                return self.bounds[i] if i < len(self.bounds) else self.max_ms
+        return 0.0
+
+    def stats(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 4),
+            "p50_ms": self.quantile(0.5),
+            "p90_ms": self.quantile(0.9),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max_ms, 4),
+        }
+
+
+_LOCK = threading.Lock()
+_HISTOGRAMS = {}  # (vista, etapa) -> Histogram
+
+
+def _observe(view: str, timer: RequestTimer, total_ns: int):
+    with _LOCK:
+        for name, ns in (*timer.stages.items(), ("total", total_ns)):
+            h = _HISTOGRAMS.get((view, name))
+            if h is None:
+                h = _HISTOGRAMS[(view, name)] = Histogram()
+            h.observe(ns / 1e6)
+
+
+def stage_stats() -> dict:
+    with _LOCK:
+        out = {}
+        for (view, name), h in _HISTOGRAMS.items():
+            out.setdefault(view, {})[name] = h.stats()
+    return out
+
+
+# ─────────────────────────────────────────────
+# Middleware
+# ─────────────────────────────────────────────
+
+class ServerTimingMiddleware:
+    """
+    Va primero en MIDDLEWARE para que "total" incluya al resto de la cadena.
+    Sirve tanto bajo WSGI como bajo ASGI (la vista async comparte el contexto).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = RequestTimer()
+        token = _CURRENT.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            _CURRENT.reset(token)
+        return self._finish(request, response, timer)
+
+    async def __acall__(self, request):
+        timer = RequestTimer()
+        token = _CURRENT.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _CURRENT.reset(token)
+        return self._finish(request, response, timer)
+
+    def _finish(self, request, response, timer: RequestTimer):
+        total_ns = time.perf_counter_ns() - timer.started
+        response["Server-Timing"] = timer.header(total_ns)
+        match = getattr(request, "resolver_match", None)
+        _observe(match.url_name if match and match.url_name else "other", timer, total_ns)
+        return response
@@ -1,6 +1,11 @@
 from django.urls import path
-from .views import nlp_intent
+from .views import metrics_view, nlp_catalog, nlp_intent, nlp_intent_async, nlp_intent_batch, nlp_stats
 
 urlpatterns = [
     path("nlp/intent/", nlp_intent, name="nlp_intent"),
+    path("nlp/intent/batch/", nlp_intent_batch, name="nlp_intent_batch"),
+    path("nlp/intent/async/", nlp_intent_async, name="nlp_intent_async"),
+    path("nlp/stats/", nlp_stats, name="nlp_stats"),
+    path("nlp/catalog/<slug:intent>/", nlp_catalog, name="nlp_catalog"),
+    path("metrics/", metrics_view, name="metrics"),
 ]
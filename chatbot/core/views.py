@@ -1,29 +1,38 @@
 # core/views.py
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from .fallback_log import log_fallback
-
-
+from rest_framework.settings import api_settings
+from django.conf import settings
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_GET, require_POST
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from .fallback_log import log_fallback, stats as fallback_log_stats
+
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+import asyncio
+import hashlib
 import json, re
+import time
 
-from .nlp import predecir_intencion
-from .data import (
-    get_becas,
-    buscar_beca_por_tipo,
-    find_student_by_carnet,
-    tiene_beca,
-    detalle_beca,
-    get_tramites_monografia,
-    get_tramite_titulo_universitario,
-    get_tramite_baja_universidad,
-    get_horario_estudiante,
-)
+from .nlp import predecir_intencion, predecir_intenciones
+from .data import find_student_by_carnet, get_data_version, warm_up as warm_up_data
+from .handlers import HANDLERS, SALUDO, FALLBACK, HandlerContext, handler_stats
+from .renderers import FAST_JSON_ENABLED, FastJSONRenderer, PreEncoded, json_response
+from .admission import ADMISSION, Overloaded
+from .sessions import SESSIONS, SessionContext, clean_conversation_id
+from . import capture, metrics, profiling, telemetry, timing
 
 CARNET_REGEX = re.compile(r"\b(20\d{2}-\d{4}I)\b", re.IGNORECASE)
 INTENT_MIN_CONFIDENCE = 0.55  # umbral para considerar confiable una intención
 
+# NLP_FAST_JSON=0 vuelve a los renderers por defecto de DRF
+API_RENDERERS = [FastJSONRenderer] if FAST_JSON_ENABLED else api_settings.DEFAULT_RENDERER_CLASSES
+
 
 def _extract_carnet(text: str):
     if not text:
@@ -32,6 +41,41 @@ def _extract_carnet(text: str):
     return m.group(1).upper() if m else None
 
 
+def _turn_carnet(q: str, session=None):
+    """
+    Carnet del texto; si el turno no trae, el que ya resolvió la conversación.
+    """
+    carnet = _extract_carnet(q)
+    if carnet is None and session is not None:
+        return session.carnet
+    return carnet
+
+
+def _turn_student(carnet, session=None):
+    # Snapshot guardado en la sesión, solo si es del mismo carnet
+    if session is not None and carnet and session.carnet == carnet:
+        return session.student
+    return None
+
+
+def _conversation_id(request, data):
+    return clean_conversation_id(
+        (data or {}).get("conversation_id") or request.headers.get("X-Conversation-ID")
+    )
+
+
+def _next_session(q: str, session, payload) -> SessionContext:
+    """
+    Lo que se guarda para el turno siguiente: carnet, estudiante e intención.
+    """
+    carnet = _turn_carnet(q, session)
+    student = _turn_student(carnet, session)
+    if carnet and student is None:
+        st = find_student_by_carnet(carnet)
+        student = SessionContext.student_snapshot(st) if st else None
+    return SessionContext(carnet, student, payload.get("intent"))
+
+
 def _get_request_data(request):
     """
     Soporta tanto DRF Request (request.data) como WSGIRequest (leer JSON del body).
@@ -121,81 +165,455 @@ DOMAIN_INTENTS = {
 }
 
 
-@api_view(["POST"])
-@permission_classes([AllowAny])
-def nlp_intent(request):
-    data = _get_request_data(request)
-    q = (data or {}).get("query", "")
+NLP_BATCH_MAX_QUERIES = getattr(settings, "NLP_BATCH_MAX_QUERIES", 100)
+
+# ─────────────────────────────────────────────
+# Sobrecarga: respuesta barata por palabras clave
+# ─────────────────────────────────────────────
+# "degrade": si ADMISSION descarta el request se contesta por palabras clave
+# (sin neurona); si no hay palabra clave, 503. "reject": siempre 503.
+NLP_SHED_MODE = getattr(settings, "NLP_SHED_MODE", "degrade")
+NLP_RETRY_AFTER_SECONDS = getattr(settings, "NLP_RETRY_AFTER_SECONDS", 1)
+
+# Orden importa: lo más específico primero
+KEYWORD_INTENTS = [
+    (("horario", "grupo", "clase"), "horario_estudiante"),
+    (("monografia", "monografía"), "tramite_monografia"),
+    (("titulo", "título"), "tramite_titulo"),
+    (("baja",), "tramite_baja"),
+    (("cobr", "recib", "donde", "dónde"), "donde_recibo_beca"),
+    (("aplic", "solicit"), "aplicar_beca"),
+    (("requisit",), "requisitos_becas"),
+    (("beca",), "tipos_becas"),
+]
+
+OVERLOADED_MENSAJE = "Estamos atendiendo muchas consultas. Intenta de nuevo en unos segundos."
+
+
+def _keyword_intent(ql: str):
+    for keywords, intent in KEYWORD_INTENTS:
+        if any(k in ql for k in keywords):
+            return intent
+    return None
+
+
+def _degraded_payload(q: str, reason: str, session=None):
+    """
+    Payload sin neurona para un request descartado, o None si no hay forma
+    barata de contestarlo (la vista responde 503).
+
+    No registra fallbacks: la confianza es inventada y esas consultas no
+    dicen nada del modelo (ni van a fallback_queries.jsonl ni a
+    nlp_fallbacks_total).
+    """
+    intent = _keyword_intent(q.lower()) if NLP_SHED_MODE == "degrade" else None
+    if intent is None:
+        ADMISSION.record("rejected")
+        return None
+    ADMISSION.record("degraded")
+    # El carnet + "beca" ya lo resuelve _intent_payload; la confianza mínima pasa el filtro
+    payload = _intent_payload(q, {"intent": intent, "confidence": INTENT_MIN_CONFIDENCE}, log=None, session=session)
+    payload["degraded"] = reason
+    return payload
+
+
+def _overloaded_body(reason: str) -> dict:
+    return {"detail": OVERLOADED_MENSAJE, "reason": reason}
+
+
+def _record_request(endpoint, q, payload, path, t_start, model_ns=0, handler_ns=0,
+                    session=None, conversation_id=None, latency=True):
+    """
+    Métricas de toda consulta (core/metrics.py), telemetría de una muestra
+    (core/telemetry.py) y, con NLP_CAPTURE, la captura para replay
+    (core/capture.py). `latency=False`: el batch mide el request una sola vez.
+    """
+    total_ns = time.perf_counter_ns() - t_start
+    intent = payload.get("intent") or "desconocido"
+    fragment_hit = isinstance(payload.get("answer"), PreEncoded)
+    metrics.REQUESTS.labels(endpoint, intent, path).inc()
+    if latency:
+        metrics.REQUEST_LATENCY.labels(endpoint, intent).observe(total_ns / 1e9)
+        if model_ns:
+            metrics.INFERENCE_LATENCY.labels(endpoint).observe(model_ns / 1e9)
+    if conversation_id:
+        metrics.cache_result("session", session is not None)
+    metrics.cache_result("fragment", fragment_hit)
+
+    if telemetry.sampled():
+        telemetry.record(
+            q, payload, path,
+            model_ns=model_ns,
+            handler_ns=handler_ns,
+            total_ns=total_ns,
+            session_hit=session is not None,
+            fragment_hit=fragment_hit,
+        )
+    if capture.ENABLED and endpoint != "batch":
+        capture.record(endpoint, q, conversation_id, 200, path, t_start)
 
+
+def _clean_query(q) -> str:
     if not isinstance(q, str):
         q = str(q or "")
-    q = q.strip()
+    return q.strip()
+
+
+def _mark_personal(response, personal: bool):
+    """
+    Respuestas con carnet (beca, horario): que ni el proxy ni el navegador las guarden.
+    """
+    if personal:
+        patch_cache_control(response, private=True, no_store=True)
+    return response
+
+
+@api_view(["POST"])
+@permission_classes([AllowAny])
+@renderer_classes(API_RENDERERS)
+@profiling.profiled("nlp_intent")
+def nlp_intent(request):
+    t_start = time.perf_counter_ns()
+    with timing.stage("parse"):
+        data = _get_request_data(request)
+        q = _clean_query((data or {}).get("query", ""))
 
     if not q:
         return Response({"detail": "query requerido"}, status=status.HTTP_400_BAD_REQUEST)
 
+    conversation_id = _conversation_id(request, data)
+    with timing.stage("session"):
+        session = SESSIONS.get(conversation_id) if conversation_id else None
+
+    path, model_ns, handler_ns = "rule", 0, 0
+    with timing.stage("rules"):
+        payload = _rule_payload(q, session)
+    if payload is None:
+        try:
+            with ADMISSION.admit():
+                t0 = time.perf_counter_ns()
+                with timing.stage("model"):
+                    pred = predecir_intencion(q)
+                t1 = time.perf_counter_ns()
+                payload = _intent_payload(q, pred, session=session)
+                model_ns, handler_ns = t1 - t0, time.perf_counter_ns() - t1
+            path = "model"
+        except Overloaded as e:
+            path = "degraded"
+            payload = _degraded_payload(q, e.reason, session=session)
+            if payload is None:
+                if capture.ENABLED:
+                    capture.record("intent", q, conversation_id, 503, "overloaded", t_start)
+                return Response(
+                    _overloaded_body(e.reason),
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={"Retry-After": str(NLP_RETRY_AFTER_SECONDS)},
+                )
+    if conversation_id:
+        with timing.stage("session"):
+            SESSIONS.set(conversation_id, _next_session(q, session, payload))
+        payload["conversation_id"] = conversation_id
+    _record_request("intent", q, payload, path, t_start, model_ns, handler_ns, session, conversation_id)
+    return _mark_personal(Response(payload, status=200), _turn_carnet(q, session) is not None)
+
+
+@api_view(["POST"])
+@permission_classes([AllowAny])
+@renderer_classes(API_RENDERERS)
+def nlp_intent_batch(request):
+    """
+    Varias consultas en un solo request: {"queries": ["...", "..."]}.
+
+    Las reglas se evalúan por consulta y las que necesitan la neurona van
+    juntas a UN predict_proba. Cada elemento de "results" es exactamente lo
+    que devolvería /nlp/intent/ para esa consulta (con sobrecarga, el cuerpo
+    del 503 para las que no tienen respuesta por palabras clave).
+    """
+    t_start = time.perf_counter_ns()
+    with timing.stage("parse"):
+        data = _get_request_data(request)
+        queries = (data or {}).get("queries")
+
+    if not isinstance(queries, list) or not queries:
+        return Response({"detail": "queries requerido (lista de textos)"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(queries) > NLP_BATCH_MAX_QUERIES:
+        return Response(
+            {"detail": f"máximo {NLP_BATCH_MAX_QUERIES} consultas por request"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    results = [None] * len(queries)
+    paths = ["rule"] * len(queries)
+    model_ns = 0
+    pendientes = []
+    personal = False
+    for i, raw in enumerate(queries):
+        q = _clean_query(raw)
+        if not q:
+            results[i] = {"detail": "query requerido"}
+            continue
+        personal = personal or _extract_carnet(q) is not None
+        with timing.stage("rules"):
+            payload = _rule_payload(q)
+        if payload is None:
+            pendientes.append((i, q))
+        else:
+            results[i] = payload
+
+    if pendientes:
+        try:
+            # Un lote ocupa UN lugar: es un solo predict_proba
+            with ADMISSION.admit():
+                t0 = time.perf_counter_ns()
+                with timing.stage("model"):
+                    preds = predecir_intenciones([q for _, q in pendientes])
+                model_ns = time.perf_counter_ns() - t0
+                for (i, q), pred in zip(pendientes, preds):
+                    results[i] = _intent_payload(q, pred)
+                    paths[i] = "batch"
+        except Overloaded as e:
+            # Lo que no tiene respuesta barata se marca en su lugar, como las
+            # consultas vacías; 503 solo si no se pudo contestar ninguna
+            for i, q in pendientes:
+                paths[i] = "degraded"
+                results[i] = _degraded_payload(q, e.reason) or _overloaded_body(e.reason)
+            if not any("intent" in r for r in results):
+                return Response(
+                    _overloaded_body(e.reason),
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={"Retry-After": str(NLP_RETRY_AFTER_SECONDS)},
+                )
+
+    for raw, payload, path in zip(queries, results, paths):
+        if "intent" in payload:
+            _record_request("batch", _clean_query(raw), payload, path, t_start, latency=False)
+    metrics.REQUEST_LATENCY.labels("batch", "mixed").observe((time.perf_counter_ns() - t_start) / 1e9)
+    if model_ns:
+        metrics.INFERENCE_LATENCY.labels("batch").observe(model_ns / 1e9)
+    return _mark_personal(Response({"results": results}, status=200), personal)
+
+
+# ─────────────────────────────────────────────
+# Catálogo cacheable (GET + ETag)
+# ─────────────────────────────────────────────
+# Intenciones cuya respuesta no depende de la consulta ni del carnet: solo
+# cambian cuando cambian los fixtures (tipos de beca, trámites, entrega).
+CATALOG_INTENTS = tuple(i for i, h in HANDLERS.items() if h.static and i in DOMAIN_INTENTS)
+NLP_CATALOG_MAX_AGE = getattr(settings, "NLP_CATALOG_MAX_AGE", 300)
+
+
+@lru_cache(maxsize=None)
+def _catalog_etag_for(intent: str, data_version: str) -> str:
+    # La versión de datos + hash de la respuesta: si cambia el texto en el
+    # código sin cambiar los fixtures, el ETag también cambia
+    answer = HANDLERS[intent](HandlerContext("", intent=intent))
+    body_hash = hashlib.blake2b(answer.raw, digest_size=6).hexdigest()
+    return f"{data_version}-{body_hash}"
+
+
+def _catalog_etag(request, intent):
+    if intent not in CATALOG_INTENTS:
+        return None
+    return _catalog_etag_for(intent, get_data_version())
+
+
+def _public_when_ok(view):
+    """
+    Cache-Control público solo para 200/304: el 404 de una intención sin
+    catálogo no debe quedar guardado en proxies.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            patch_cache_control(response, public=True, max_age=NLP_CATALOG_MAX_AGE)
+        return response
+    return wrapper
+
+
+@_public_when_ok
+@condition(etag_func=_catalog_etag)
+@api_view(["GET"])
+@permission_classes([AllowAny])
+@renderer_classes(API_RENDERERS)
+def nlp_catalog(request, intent):
+    """
+    GET /api/nlp/catalog/<intent>/: misma "answer" que daría /nlp/intent/,
+    con ETag fuerte (304 si coincide If-None-Match) y Cache-Control público.
+    """
+    if intent not in CATALOG_INTENTS:
+        return Response(
+            {"detail": "intención sin catálogo", "intents": list(CATALOG_INTENTS)},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    answer = HANDLERS[intent](HandlerContext("", intent=intent))
+    return Response({"intent": intent, "answer": answer}, status=200)
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+@renderer_classes(API_RENDERERS)
+def nlp_stats(request):
+    """
+    Latencia acumulada por handler, estado de la cola de admisión, del log
+    de fallbacks y tiempos por etapa (core/handlers.py, core/admission.py,
+    core/fallback_log.py, core/timing.py) en este proceso.
+    """
+    return Response(
+        {
+            "handlers": handler_stats(),
+            "admission": ADMISSION.stats(),
+            "fallback_log": fallback_log_stats(),
+            "stages": timing.stage_stats(),
+        },
+        status=200,
+    )
+
+
+@require_GET
+def metrics_view(request):
+    """
+    GET /api/metrics/ en formato de texto de Prometheus, sumando todos los
+    workers (core/metrics.py).
+    """
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+# ─────────────────────────────────────────────
+# Versión async (ASGI)
+# ─────────────────────────────────────────────
+# Pool acotado SOLO para la inferencia: el event loop queda libre para
+# atender miles de conexiones lentas/ociosas mientras el MLP trabaja.
+_INFERENCE_POOL = ThreadPoolExecutor(
+    max_workers=getattr(settings, "NLP_INFERENCE_THREADS", 2),
+    thread_name_prefix="nlp-inference",
+)
+_data_ready = False
+
+
+async def _ensure_data_ready():
+    """
+    Las búsquedas de core/data.py son en memoria; solo la PRIMERA carga de
+    fixtures toca disco, así que se hace una vez fuera del loop.
+    """
+    global _data_ready
+    if not _data_ready:
+        await asyncio.get_running_loop().run_in_executor(None, warm_up_data)
+        _data_ready = True
+
+
+@csrf_exempt
+@require_POST
+async def nlp_intent_async(request):
+    """
+    Mismo contrato que nlp_intent, pensado para correr bajo ASGI
+    (uvicorn/daphne) sin pasar por el adaptador sync de DRF.
+    """
+    t_start = time.perf_counter_ns()
+    with timing.stage("parse"):
+        data = _get_request_data(request)
+        q = _clean_query((data or {}).get("query", ""))
+
+    if not q:
+        return json_response({"detail": "query requerido"}, status=400)
+
+    await _ensure_data_ready()
+    conversation_id = _conversation_id(request, data)
+    with timing.stage("session"):
+        session = await SESSIONS.aget(conversation_id) if conversation_id else None
+
+    path, model_ns, handler_ns = "rule", 0, 0
+    with timing.stage("rules"):
+        payload = _rule_payload(q, session)
+    if payload is None:
+        loop = asyncio.get_running_loop()
+        try:
+            async with ADMISSION.admit_async():
+                t0 = time.perf_counter_ns()
+                with timing.stage("model"):
+                    pred = await loop.run_in_executor(_INFERENCE_POOL, predecir_intencion, q)
+                t1 = time.perf_counter_ns()
+                payload = _intent_payload(q, pred, session=session)
+                model_ns, handler_ns = t1 - t0, time.perf_counter_ns() - t1
+            path = "model"
+        except Overloaded as e:
+            path = "degraded"
+            payload = _degraded_payload(q, e.reason, session=session)
+            if payload is None:
+                if capture.ENABLED:
+                    capture.record("async", q, conversation_id, 503, "overloaded", t_start)
+                response = json_response(_overloaded_body(e.reason), status=503)
+                response["Retry-After"] = str(NLP_RETRY_AFTER_SECONDS)
+                return response
+    if conversation_id:
+        with timing.stage("session"):
+            await SESSIONS.aset(conversation_id, _next_session(q, session, payload))
+        payload["conversation_id"] = conversation_id
+    _record_request("async", q, payload, path, t_start, model_ns, handler_ns, session, conversation_id)
+    return _mark_personal(json_response(payload, status=200), _turn_carnet(q, session) is not None)
+
+
+def _rule_payload(q: str, session=None):
+    """
+    Reglas que responden SIN la neurona (saludos, beca sin carnet).
+    Devuelve el payload o None si hay que predecir.
+    """
     ql = q.lower()
-    carnet = _extract_carnet(q)
+    # estado_beca/detalle_beca necesitan carnet: si la conversación ya lo
+    # tiene, no se vuelve a pedir
+    carnet = _turn_carnet(q, session)
 
     # ─────────────────────────────────────────────
     # 0) SALUDOS / CHARLA GENERAL
     # ─────────────────────────────────────────────
     if _is_smalltalk(ql):
-        payload = {
+        return {
             "query": q,
             "intent": "saludo",
             "confidence": 1.0,
-            "answer": {
-                "mensaje": (
-                    "¡Hola! 👋 Puedo ayudarte con:\n"
-                    "• Becas (tipos, requisitos, si tienes beca, etc.)\n"
-                    "• Horarios y grupo según tu carnet\n"
-                    "• Trámites de monografía, título y baja\n\n"
-                    "Por ejemplo, puedes preguntar:\n"
-                    "» ¿Qué tipos de beca hay?\n"
-                    "» ¿Cuáles son los requisitos de la beca monetaria?\n"
-                    "» ¿Cuál es mi grupo según mi carnet 2021-0001I?"
-                )
-            },
+            "answer": SALUDO(HandlerContext(q)),
         }
-        return Response(payload, status=200)
 
     # ─────────────────────────────────────────────
     # 1) Forzar intención: estado_beca (sin carnet)
     # ─────────────────────────────────────────────
     if any(p in ql for p in ["tengo beca", "estado de beca", "ver si tengo beca"]):
         if not carnet:
-            return Response(
-                {
-                    "query": q,
-                    "intent": "estado_beca",
-                    "confidence": 1.0,
-                    "answer": {
-                        "mensaje": "Necesito tu carnet (formato 2021-0001I) para verificar si tienes beca."
-                    },
+            return {
+                "query": q,
+                "intent": "estado_beca",
+                "confidence": 1.0,
+                "answer": {
+                    "mensaje": "Necesito tu carnet (formato 2021-0001I) para verificar si tienes beca."
                 },
-                status=200,
-            )
+            }
 
     # 2) Forzar intención: detalle_beca (sin carnet)
     if any(p in ql for p in ["cual beca tengo", "qué beca tengo", "que beca tengo", "detalle de mi beca"]):
         if not carnet:
-            return Response(
-                {
-                    "query": q,
-                    "intent": "detalle_beca",
-                    "confidence": 1.0,
-                    "answer": {
-                        "mensaje": "Pásame tu carnet (formato 2021-0001I) y te digo cuál beca tienes."
-                    },
+            return {
+                "query": q,
+                "intent": "detalle_beca",
+                "confidence": 1.0,
+                "answer": {
+                    "mensaje": "Pásame tu carnet (formato 2021-0001I) y te digo cuál beca tienes."
                 },
-                status=200,
-            )
+            }
+
+    return None
+
+
+def _intent_payload(q: str, pred: dict, log=log_fallback, session=None) -> dict:
+    """
+    Arma la respuesta a partir de la predicción de la neurona.
+    `log` es la función que registra los fallbacks (core/fallback_log.py, no bloquea).
+    `session` (core/sessions.py) aporta el carnet y el estudiante de turnos anteriores.
+    """
+    ql = q.lower()
 
     # ─────────────────────────────────────────────
     # 3) Predicción NLP
     # ─────────────────────────────────────────────
-    pred = predecir_intencion(q)
     intent = pred.get("intent", "desconocido")
     confidence = float(pred.get("confidence", 0.0))
 
@@ -205,17 +623,22 @@ def nlp_intent(request):
         "confidence": round(confidence, 3),
     }
 
-    # Ajuste inteligente por carnet + palabra "beca"
-    carnet = _extract_carnet(q)
+    # Ajuste inteligente por carnet + palabra "beca": solo si el carnet viene
+    # en ESTE texto; el de la sesión no convierte "como aplico a una beca" en
+    # estado_beca
     q_lower = q.lower()
 
-    if carnet and "beca" in q_lower:
+    if _extract_carnet(q) and "beca" in q_lower:
         if any(w in q_lower for w in ["detalle", "cuál", "cual", "qué beca", "que beca"]):
             intent = "detalle_beca"
         else:
             intent = "estado_beca"
         payload["intent"] = intent
 
+    # El carnet de turnos anteriores solo para los handlers que lo necesitan
+    handler = HANDLERS.get(intent) if intent in DOMAIN_INTENTS else None
+    carnet = _turn_carnet(q, session) if handler is not None and handler.needs_carnet else _extract_carnet(q)
+
     # ─────────────────────────────────────────────
     # 4) FILTRO DE CONFIANZA / DOMINIO
     # ─────────────────────────────────────────────
@@ -224,325 +647,25 @@ def nlp_intent(request):
     #   - la confianza es baja, o
     #   - el texto ni siquiera menciona palabras del dominio,
     # entonces NO lo tomamos como válido y respondemos algo genérico.
+    ctx = HandlerContext(
+        q, carnet=carnet, intent=intent, confidence=confidence, log=log,
+        student=_turn_student(carnet, session),
+    )
     if intent in DOMAIN_INTENTS and (
         confidence < INTENT_MIN_CONFIDENCE or not _has_domain_keyword(ql)
     ):
-         # Logueamos este caso como ejemplo de fallback
-        log_fallback(
-            query=q,
-            intent=intent,
-            confidence=confidence,
-            meta={
-                "reason": "low_conf_or_no_domain",
-                "domain_intent": True,
-            },
-        )
         payload["intent"] = "desconocido"
-        payload["answer"] = {
-            "mensaje": (
-                "No estoy seguro de haber entendido tu consulta.\n\n"
-                "Puedo ayudarte con:\n"
-                "• Becas (tipos, requisitos, si tienes beca, etc.)\n"
-                "• Horarios y grupo según tu carnet\n"
-                "• Trámites de monografía, título y baja\n\n"
-                "Por ejemplo:\n"
-                "» ¿Qué tipos de beca hay?\n"
-                "» ¿Cuáles son los requisitos del trámite de título universitario?\n"
-                "» ¿Cuál es mi grupo según mi carnet 2021-0001I?"
-            )
-        }
-        return Response(payload, status=200)
+        payload["answer"] = FALLBACK(ctx, reason="low_conf_or_no_domain", domain_intent=True)
+        return payload
 
     # ─────────────────────────────────────────────
-    # 5) INTENCIONES PRINCIPALES
+    # 5) INTENCIONES PRINCIPALES (core/handlers.py)
     # ─────────────────────────────────────────────
-
-    # TIPOS DE BECAS
-    if intent == "tipos_becas":
-        tipos = [b["tipo"] or (b.get("nombre") or "Beca") for b in get_becas()]
-        payload["answer"] = {
-            "mensaje": "Tenemos disponibles los siguientes tipos de becas:",
-            "tipos_becas": tipos,
-        }
-
-    # REQUISITOS DE BECAS
-    elif intent == "requisitos_becas":
-        candidatos = buscar_beca_por_tipo(q)
-        if candidatos:
-            payload["answer"] = {
-                "mensaje": "Estos son los requisitos de la beca que consultaste:",
-                "becas": [
-                    {"tipo": b["tipo"], "requisitos": b["requisitos"]}
-                    for b in candidatos
-                ],
-            }
-        else:
-            payload["answer"] = {
-                "mensaje": "No entendí qué beca específica deseas. Te muestro los tipos disponibles:",
-                "requisitos_por_beca": {
-                    b["tipo"]: b["requisitos"] for b in get_becas()
-                },
-            }
-
-    # ESTADO DE BECA
-    elif intent == "estado_beca":
-        if not carnet:
-            payload["answer"] = {
-                "mensaje": "Pásame tu carnet (formato 2021-0001I) y te digo si tienes beca y de qué tipo."
-            }
-        else:
-            st = find_student_by_carnet(carnet)
-            if not st:
-                payload["answer"] = {
-                    "mensaje": f"No encontré el carnet {carnet} en el sistema."
-                }
-            else:
-                info = detalle_beca(carnet)
-                nombre = st.get("fields", {}).get("nombre") or carnet
-
-                if not info:
-                    payload["answer"] = {
-                        "mensaje": f"{nombre} ({carnet}), no tienes una beca asignada.",
-                        "estado_beca": {
-                            "tiene_beca": False,
-                            "carnet": carnet,
-                            "nombre": nombre,
-                        },
-                    }
-                else:
-                    payload["answer"] = {
-                        "mensaje": f"{nombre} ({carnet}), tienes una beca asignada.",
-                        "estado_beca": {
-                            "tiene_beca": True,
-                            "carnet": carnet,
-                            "nombre": nombre,
-                            "beca": info.get("beca"),
-                            "porcentaje": info.get("porcentaje"),
-                            "periodo": info.get("periodo"),
-                            "estado": info.get("estado"),
-                            "activo": info.get("activo", False),
-                        },
-                    }
-
-    # APLICAR A BECA
-    elif intent == "aplicar_beca":
-        candidatos = buscar_beca_por_tipo(q)
-
-        if candidatos:
-            payload["answer"] = {
-                "mensaje": "Estos son los requisitos para aplicar a la beca que mencionaste:",
-                "becas": [
-                    {"tipo": b["tipo"], "requisitos": b["requisitos"]}
-                    for b in candidatos
-                ],
-            }
-        else:
-            tipos = [b["tipo"] or (b.get("nombre") or "Beca") for b in get_becas()]
-            payload["answer"] = {
-                "mensaje": "¿Por cuál beca te gustaría aplicar? Elige una:",
-                "tipos_becas": tipos,
-            }
-
-    # DÓNDE RECIBO BECA
-    elif intent == "donde_recibo_beca":
-        payload["answer"] = {
-            "mensaje": "La beca se recibe según tu asignación (pago en Caja o depósito bancario).",
-            "metodos_entrega": ["Caja", "Depósito"],
-        }
-
-    # DETALLE DE BECA
-    elif intent == "detalle_beca":
-        if not carnet:
-            payload["answer"] = {
-                "mensaje": "Pásame tu carnet (formato 2021-0001I) y te digo cuál beca tienes."
-            }
-        else:
-            st = find_student_by_carnet(carnet)
-            if not st:
-                payload["answer"] = {
-                    "mensaje": f"No encontré el carnet {carnet} en el sistema."
-                }
-            else:
-                info = detalle_beca(carnet)
-                nombre = st.get("fields", {}).get("nombre") or carnet
-
-                if not info:
-                    payload["answer"] = {
-                        "mensaje": f"{nombre} ({carnet}), no tienes una beca asignada.",
-                        "detalle_beca": {
-                            "tiene_beca": False,
-                            "carnet": carnet,
-                            "nombre": nombre,
-                        },
-                    }
-                else:
-                    payload["answer"] = {
-                        "mensaje": f"{nombre} ({carnet}), este es el detalle de tu beca:",
-                        "detalle_beca": {
-                            "tiene_beca": True,
-                            "carnet": carnet,
-                            "nombre": nombre,
-                            "beca": info.get("beca"),
-                            "porcentaje": info.get("porcentaje"),
-                            "periodo": info.get("periodo"),
-                            "estado": info.get("estado"),
-                            "activo": info.get("activo", False),
-                        },
-                    }
-
-    # HORARIO ESTUDIANTE
-    elif intent == "horario_estudiante":
-        if not carnet:
-            payload["answer"] = {
-                "mensaje": "Pásame tu carnet (formato 2021-0001I) y te muestro tu grupo y horarios."
-            }
-        else:
-            info = get_horario_estudiante(carnet)
-            if not info:
-                payload["answer"] = {
-                    "mensaje": f"No encontré el carnet {carnet} en el sistema."
-                }
-            else:
-                grupos = info.get("grupos") or []
-                tiene_algún_horario = any((g.get("horarios") for g in grupos))
-                nombre = info.get("nombre") or carnet
-
-                if not grupos:
-                    payload["answer"] = {
-                        "mensaje": (
-                            f"{nombre} ({carnet}), no encontré ningún grupo asignado "
-                            "para este estudiante."
-                        ),
-                        "horario": {
-                            "tiene_horario": False,
-                            "carnet": info["carnet"],
-                            "nombre": nombre,
-                            "grupo": None,
-                            "mensaje": "No encontré ningún grupo asignado para este estudiante.",
-                            "grupos": [],
-                        },
-                    }
-                elif not tiene_algún_horario:
-                    payload["answer"] = {
-                        "mensaje": (
-                            f"{nombre} ({carnet}), tienes grupo asignado pero no encontré "
-                            "horarios registrados para tus grupos."
-                        ),
-                        "horario": {
-                            "tiene_horario": False,
-                            "carnet": info["carnet"],
-                            "nombre": nombre,
-                            "grupo": info.get("grupo"),
-                            "mensaje": "Tienes grupo, pero no encontré horarios registrados para tus grupos.",
-                            "grupos": grupos,
-                        },
-                    }
-                else:
-                    h = info.get("horario")  # horario principal
-                    payload["answer"] = {
-                        "mensaje": f"{nombre} ({carnet}), estos son tus grupos y horarios.",
-                        "horario": {
-                            "tiene_horario": True,
-                            "carnet": info["carnet"],
-                            "nombre": nombre,
-                            "grupo": info.get("grupo"),
-                            "periodo": h.get("periodo") if h else None,
-                            "titulo": h.get("titulo") if h else None,
-                            "horario_id": h.get("pk") if h else None,
-                            "archivo": h.get("original_filename") if h else None,
-                            "grupos": grupos,
-                        },
-                    }
-
-    # TRÁMITES: MONOGRAFÍA
-    elif intent == "tramite_monografia":
-        tramites = get_tramites_monografia()
-        if not tramites:
-            payload["answer"] = {
-                "mensaje": (
-                    "Por ahora no tengo registrados los requisitos de monografía. "
-                    "Te recomiendo consultar en Registro Académico."
-                )
-            }
-        else:
-            payload["answer"] = {
-                "mensaje": "Aquí tienes los trámites y requisitos relacionados con la monografía.",
-                "tramite": "monografia",
-                "tramites": [
-                    {
-                        "titulo": t["titulo"],
-                        "slug": t["slug"],
-                        "descripcion": t["descripcion"],
-                        "requisitos": t["requisitos"],
-                    }
-                    for t in tramites
-                ],
-            }
-
-    # TRÁMITE: TÍTULO
-    elif intent == "tramite_titulo":
-        tramite = get_tramite_titulo_universitario()
-        if not tramite:
-            payload["answer"] = {
-                "mensaje": (
-                    "Por ahora no tengo registrados los requisitos para el título universitario. "
-                    "Te recomiendo consultar en Registro Académico."
-                )
-            }
-        else:
-            payload["answer"] = {
-                "mensaje": "Estos son los requisitos para el trámite de título universitario.",
-                "tramite": "titulo_universitario",
-                "titulo": tramite["titulo"],
-                "slug": tramite["slug"],
-                "descripcion": tramite["descripcion"],
-                "requisitos": tramite["requisitos"],
-            }
-
-    # TRÁMITE: BAJA
-    elif intent == "tramite_baja":
-        tramite = get_tramite_baja_universidad()
-        if not tramite:
-            payload["answer"] = {
-                "mensaje": (
-                    "Por ahora no tengo registrado el proceso de baja. "
-                    "Te recomiendo consultar en Registro Académico."
-                )
-            }
-        else:
-            payload["answer"] = {
-                "mensaje": "Estos son los requisitos para el trámite de baja de la universidad.",
-                "tramite": "baja_universidad",
-                "titulo": tramite["titulo"],
-                "slug": tramite["slug"],
-                "descripcion": tramite["descripcion"],
-                "requisitos": tramite["requisitos"],
-            }
-
-    # INTENCIÓN DESCONOCIDA / FALLBACK
+    # saludo/desconocido también están en HANDLERS, pero desde la neurona van al fallback
+    if handler is None:
+        # INTENCIÓN DESCONOCIDA / FALLBACK
+        payload["answer"] = FALLBACK(ctx, reason="final_fallback", domain_intent=intent in DOMAIN_INTENTS)
     else:
-         # Logueamos también el fallback general
-        log_fallback(
-            query=q,
-            intent=intent,
-            confidence=confidence,
-            meta={
-                "reason": "final_fallback",
-                "domain_intent": intent in DOMAIN_INTENTS,
-            },
-        )
-        payload["answer"] = {
-            "mensaje": (
-                "No estoy seguro de haber entendido tu consulta.\n\n"
-                "Puedo ayudarte con:\n"
-                "• Becas (tipos, requisitos, si tienes beca, etc.)\n"
-                "• Horarios y grupo según tu carnet\n"
-                "• Trámites de monografía, título y baja\n\n"
-                "Por ejemplo:\n"
-                "» ¿Qué tipos de beca hay?\n"
-                "» ¿Cuáles son los requisitos del trámite de título universitario?\n"
-                "» ¿Cuál es mi grupo según mi carnet 2021-0001I?"
-            )
-        }
+        payload["answer"] = handler(ctx)
 
-    return Response(payload, status=200)
\ No newline at end of file
+    return payload
@@ -0,0 +1,154 @@
+# ml/bench.py
+# Uso (desde la carpeta chatbot/):
+#   python -m ml.bench ml/models/intent_mlp.joblib
+#   python -m ml.bench candidato.joblib --baseline ml/models/intent_mlp.joblib
+"""
+Benchmark estándar de inferencia para un artefacto .joblib.
+
+Mide siempre lo mismo para que dos corridas se puedan comparar:
+- tiempo de carga y tamaño del archivo
+- latencia de UNA consulta (p50 / p99), que es lo que paga cada request
+- throughput de predict_proba por lotes de varios tamaños
+"""
+import argparse
+import json
+import os
+import time
+from itertools import cycle, islice
+
+from joblib import load
+
+# Mezcla fija de consultas crudas, como llegan al endpoint
+BENCH_QUERIES = [
+    "¿Qué becas ofrecen?",
+    "requisitos de la beca monetaria",
+    "tengo beca? mi carnet es 2021-0001I",
+    "cual beca tengo 2021-0003I",
+    "cual es mi horario 2021-0005I",
+    "como aplico a una beca",
+    "donde cobran la beca",
+    "requisitos para la monografia de graduacion",
+    "que necesito para solicitar mi titulo universitario",
+    "como me doy de baja de la universidad",
+    "quiero sáber mi horraio",
+    "hola buenas tardes",
+    "qué ayudas económicas ofrece la universidad para estudiantes de primer ingreso",
+    "xyz",
+]
+BATCH_SIZES = (1, 8, 32, 128)
+SINGLE_RUNS = 500
+
+# Cuánto puede empeorar el candidato respecto al modelo desplegado.
+# Latencias/carga/tamaño: máximo N veces el actual; throughput: mínimo N veces.
+DEFAULT_THRESHOLDS = {
+    "single_p50_ms": 1.25,
+    "single_p99_ms": 1.5,
+    "load_time_s": 2.0,
+    "size_bytes": 1.5,
+    "min_throughput_ratio": 0.8,
+}
+# Diferencias absolutas por debajo de esto se consideran ruido de medición
+ABSOLUTE_SLACK = {
+    "single_p50_ms": 0.1,
+    "single_p99_ms": 0.25,
+    "load_time_s": 0.05,
+    "size_bytes": 0,
+}
+
+
+def _percentile(sorted_vals, p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(p / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+def benchmark_model(path: str, queries=BENCH_QUERIES, batch_sizes=BATCH_SIZES,
+                    single_runs: int = SINGLE_RUNS, min_seconds: float = 0.3) -> dict:
+    t0 = time.perf_counter()
+    pipe = load(path)
+    load_time = time.perf_counter() - t0
+
+    pipe.predict_proba(list(queries))  # calentamiento
+
+    lat = []
+    for q in islice(cycle(queries), single_runs):
+        t = time.perf_counter_ns()
+        pipe.predict_proba([q])
+        lat.append((time.perf_counter_ns() - t) / 1e6)
+    lat.sort()
+
+    throughput = {}
+    for bs in batch_sizes:
+        lote = list(islice(cycle(queries), bs))
+        n = 0
+        t = time.perf_counter()
+        while True:
+            pipe.predict_proba(lote)
+            n += bs
+            elapsed = time.perf_counter() - t
+            if elapsed >= min_seconds:
+                break
+        throughput[str(bs)] = round(n / elapsed, 1)
+
+    return {
+        "artifact": os.path.abspath(path),
+        "size_bytes": os.path.getsize(path),
+        "load_time_s": round(load_time, 4),
+        "single_p50_ms": round(_percentile(lat, 50), 4),
+        "single_p99_ms": round(_percentile(lat, 99), 4),
+        "throughput_qps": throughput,
+        "measured_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(candidate: dict, baseline: dict, thresholds: dict | None = None):
+    """
+    Devuelve la lista de regresiones (vacía si el candidato pasa).
+    """
+    th = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    regresiones = []
+    for key in ("single_p50_ms", "single_p99_ms", "load_time_s", "size_bytes"):
+        base = baseline.get(key) or 0
+        if base and candidate[key] > base * th[key] and candidate[key] - base > ABSOLUTE_SLACK[key]:
+            regresiones.append(f"{key}: {candidate[key]} > {th[key]} x {base}")
+    for bs, base_qps in (baseline.get("throughput_qps") or {}).items():
+        cand_qps = candidate["throughput_qps"].get(bs)
+        if cand_qps is not None and base_qps and cand_qps < base_qps * th["min_throughput_ratio"]:
+            regresiones.append(
+                f"throughput lote {bs}: {cand_qps} qps < {th['min_throughput_ratio']} x {base_qps}"
+            )
+    return regresiones
+
+
+def report_path(artifact_path: str) -> str:
+    """
+    El reporte va al lado del artefacto: intent_mlp.joblib -> intent_mlp.bench.json
+    """
+    return os.path.splitext(artifact_path)[0] + ".bench.json"
+
+
+def write_report(artifact_path: str, report: dict):
+    with open(report_path(artifact_path), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de inferencia de un modelo .joblib")
+    parser.add_argument("model")
+    parser.add_argument("--baseline", help="Otro .joblib contra el cual comparar")
+    args = parser.parse_args(argv)
+
+    cand = benchmark_model(args.model)
+    out = {"candidate": cand}
+    if args.baseline:
+        base = benchmark_model(args.baseline)
+        out["baseline"] = base
+        out["regressions"] = compare(cand, base)
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+    if out.get("regressions"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# ml/compare_features.py
+# Uso (desde la carpeta chatbot/):
+#   python -m ml.compare_features
+#   python -m ml.compare_features --synthetic 0 50000 --out ml/models/compare_features.json
+"""
+Compara el espacio de features TF-IDF (vocabulario) contra hashing (tamaño fijo)
+con el mismo split: exactitud, latencia de inferencia (ml.bench), tamaño del
+artefacto y RSS que agrega el modelo a un proceso nuevo.
+
+Con --synthetic se ve cómo crece cada variante al agrandar el corpus.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from joblib import dump
+
+from ml.bench import benchmark_model
+from ml.train_intents import FEATURE_SPACES, MLP_HASH_N_FEATURES, entrenar, strip_training_state
+
+# Se mide en un proceso aparte para que lo ya importado aquí no ensucie el número
+_RSS_SNIPPET = """
+import json, sys
+
+def rss():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+import joblib, sklearn.pipeline, sklearn.neural_network, sklearn.feature_extraction.text
+antes = rss()
+pipe = joblib.load(sys.argv[1])
+pipe.predict_proba(["hola", "tengo beca 2021-0001I"])
+print(json.dumps({"rss_process": rss(), "rss_model": rss() - antes}))
+"""
+
+
+def medir_rss(path: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _RSS_SNIPPET, path],
+        check=True, capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    return json.loads(out.stdout)
+
+
+def comparar(synthetic_sizes, n_features: int = MLP_HASH_N_FEATURES, seed: int = 42):
+    filas = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for synthetic in synthetic_sizes:
+            for features in FEATURE_SPACES:
+                r = entrenar(synthetic=synthetic, seed=seed, features=features, n_features=n_features)
+                pipe = strip_training_state(r["pipeline"])
+                path = os.path.join(tmp, f"{features}_{synthetic}.joblib")
+                dump(pipe, path)
+
+                vocab = getattr(pipe.named_steps.get("tfidf"), "vocabulary_", None)
+                bench = benchmark_model(path)
+                filas.append({
+                    "features": features,
+                    "synthetic": synthetic,
+                    "n_columns": len(vocab) if vocab is not None else n_features,
+                    "accuracy": r["accuracy"],
+                    "synthetic_accuracy": r["synthetic_accuracy"],
+                    "size_bytes": bench["size_bytes"],
+                    "load_time_s": bench["load_time_s"],
+                    "single_p50_ms": bench["single_p50_ms"],
+                    "single_p99_ms": bench["single_p99_ms"],
+                    "throughput_qps": bench["throughput_qps"],
+                    **medir_rss(path),
+                })
+    return filas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TF-IDF vs hashing: exactitud, latencia y memoria")
+    parser.add_argument("--synthetic", type=int, nargs="+", default=[0],
+                        help="Tamaños de corpus sintético a probar")
+    parser.add_argument("--n-features", type=int, default=MLP_HASH_N_FEATURES)
+    parser.add_argument("--out", help="Guardar el resultado en JSON")
+    args = parser.parse_args(argv)
+
+    filas = comparar(args.synthetic, args.n_features)
+
+    print(f"{'features':9} {'sint':>7} {'columnas':>9} {'acc':>6} {'acc_sint':>8} "
+          f"{'MB':>6} {'p50ms':>7} {'p99ms':>7} {'qps@32':>8} {'RSS MB':>7}")
+    for f in filas:
+        acc_sint = f"{f['synthetic_accuracy']:.3f}" if f["synthetic_accuracy"] is not None else "-"
+        print(f"{f['features']:9} {f['synthetic']:>7} {f['n_columns']:>9} {f['accuracy']:>6.3f} {acc_sint:>8} "
+              f"{f['size_bytes'] / 1e6:>6.2f} {f['single_p50_ms']:>7.3f} {f['single_p99_ms']:>7.3f} "
+              f"{f['throughput_qps'].get('32', 0):>8.0f} {f['rss_model'] / 1e6:>7.1f}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(filas, fh, ensure_ascii=False, indent=2)
+        print(f" Resultado guardado en {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# ml/corpus.py
+"""
+Corpus de entrenamiento versionado (ml/data/corpus/<version>/) y generador de
+ejemplos sintéticos.
+
+Cada versión tiene un manifest.json con el orden de los archivos (el orden
+importa: train_test_split usa random_state fijo) y un .txt por intención con
+una frase por línea. `{carnet}` en una frase se reemplaza por un carnet.
+"""
+import json
+import os
+import random
+import re
+import unicodedata
+from itertools import islice
+
+from ml.text import COMMON_TYPO_MAP
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "corpus")
+DEFAULT_CORPUS_VERSION = "v1"
+CARNET_PLACEHOLDER = "{carnet}"
+
+
+def _manifest(version: str) -> dict:
+    with open(os.path.join(CORPUS_DIR, version, "manifest.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def iter_templates(version: str = DEFAULT_CORPUS_VERSION):
+    """
+    Devuelve (frase, intent) en el orden del manifest, SIN reemplazar {carnet}.
+    """
+    manifest = _manifest(version)
+    for entry in manifest["archivos"]:
+        path = os.path.join(CORPUS_DIR, version, entry["archivo"])
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line.strip() or line.lstrip().startswith("#"):
+                    continue
+                yield line, entry["intent"]
+
+
+def load_corpus(version: str = DEFAULT_CORPUS_VERSION):
+    """
+    Corpus base como listas (X, y), con el carnet por defecto de la versión.
+    Es chico; los ejemplos sintéticos van por `iter_augmented`.
+    """
+    carnet = _manifest(version).get("carnet_default", "2021-0001i")
+    X, y = [], []
+    for frase, intent in iter_templates(version):
+        X.append(frase.replace(CARNET_PLACEHOLDER, carnet))
+        y.append(intent)
+    return X, y
+
+
+# -----------------------
+# Aumentación
+# -----------------------
+
+# Inverso del mapa de typos: palabra correcta -> formas mal escritas.
+# Solo entradas de una palabra (las de varias palabras son alias de intención).
+_TYPOS_BY_WORD = {}
+for _wrong, _right in COMMON_TYPO_MAP.items():
+    if _wrong == _right or " " in _wrong or "_" in _right:
+        continue
+    _TYPOS_BY_WORD.setdefault(_right, []).append(_wrong)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_ACCENTABLE = {"a": "á", "e": "é", "i": "í", "o": "ó", "u": "ú"}
+
+
+def random_carnet(rng: random.Random) -> str:
+    """
+    Carnet con formato válido (CARNET_REGEX: 20AA-NNNNI). La 'i' a veces
+    en minúscula, como la escriben los usuarios.
+    """
+    carnet = f"{rng.randint(2015, 2025)}-{rng.randint(1, 9999):04d}I"
+    return carnet.lower() if rng.random() < 0.5 else carnet
+
+
+def _strip_accents(word: str) -> str:
+    return "".join(
+        c for c in unicodedata.normalize("NFD", word)
+        if unicodedata.category(c) != "Mn"
+    )
+
+
+def _inject_typos(texto: str, rng: random.Random, prob: float) -> str:
+    def repl(m):
+        word = m.group(0)
+        base = _strip_accents(word.lower())
+        typos = _TYPOS_BY_WORD.get(base)
+        if typos and rng.random() < prob:
+            return rng.choice(typos)
+        return word
+    return _WORD_RE.sub(repl, texto)
+
+
+def _mess_accents(texto: str, rng: random.Random, prob: float) -> str:
+    """
+    Quita los acentos de una palabra o se los pone en otra vocal
+    ("qué" -> "que", "beca" -> "béca").
+    """
+    def repl(m):
+        word = m.group(0)
+        if rng.random() >= prob:
+            return word
+        sin = _strip_accents(word)
+        if sin != word:
+            return sin
+        vocales = [i for i, c in enumerate(word) if c in _ACCENTABLE]
+        if not vocales:
+            return word
+        i = rng.choice(vocales)
+        return word[:i] + _ACCENTABLE[word[i]] + word[i + 1:]
+    return _WORD_RE.sub(repl, texto)
+
+
+def iter_augmented(templates, n: int | None = None, seed: int = 42,
+                   typo_prob: float = 0.3, accent_prob: float = 0.15):
+    """
+    Generador de ejemplos sintéticos (texto, intent) a partir de plantillas.
+
+    - {carnet} -> carnet válido aleatorio
+    - typos tomados de COMMON_TYPO_MAP
+    - acentos quitados o cambiados de lugar
+
+    No guarda nada: `n=None` genera sin fin y el consumidor corta con islice.
+    """
+    templates = list(templates)
+    if not templates:
+        return
+    rng = random.Random(seed)
+    generados = 0
+    while n is None or generados < n:
+        frase, intent = rng.choice(templates)
+        if CARNET_PLACEHOLDER in frase:
+            frase = frase.replace(CARNET_PLACEHOLDER, random_carnet(rng))
+        frase = _inject_typos(frase, rng, typo_prob)
+        frase = _mess_accents(frase, rng, accent_prob)
+        yield frase, intent
+        generados += 1
+
+
+def iter_chunks(pairs, size: int):
+    """
+    Agrupa un iterable de (texto, intent) en bloques (textos, intents).
+    """
+    it = iter(pairs)
+    while True:
+        bloque = list(islice(it, size))
+        if not bloque:
+            return
+        textos, intents = zip(*bloque)
+        yield list(textos), list(intents)
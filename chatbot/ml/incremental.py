@@ -0,0 +1,50 @@
+# ml/incremental.py
+"""
+Variante del clasificador de intenciones que se puede actualizar por partes
+(partial_fit) sin reentrenar todo desde cero.
+
+- HashingVectorizer: no guarda vocabulario, así que los n-gramas nuevos que
+  traigan las consultas del fallback no obligan a reajustar nada.
+- SGDClassifier(loss="log_loss"): soporta partial_fit y predict_proba, así que
+  el pipeline resultante se puede servir igual que el MLP.
+"""
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+
+from ml.text import normalize
+
+# 2**16 columnas: pocas colisiones para n-gramas de 3-5 caracteres y un
+# modelo de pocos MB (10 clases x 65536 pesos).
+HASH_N_FEATURES = 2 ** 16
+
+
+def build_incremental_pipeline(n_features: int = HASH_N_FEATURES) -> Pipeline:
+    """
+    Pipeline hashing + SGD. La normalización va dentro del vectorizador para que
+    el servidor no tenga que acordarse de aplicarla antes de predecir.
+    """
+    return Pipeline([
+        ("hash", HashingVectorizer(
+            preprocessor=normalize,
+            analyzer="char_wb",
+            ngram_range=(3, 5),
+            n_features=n_features,
+            alternate_sign=False,
+        )),
+        ("sgd", SGDClassifier(
+            loss="log_loss",
+            alpha=1e-5,
+            random_state=42,
+        )),
+    ])
+
+
+def partial_fit(pipeline: Pipeline, textos, etiquetas, classes):
+    """
+    Actualiza el clasificador con un bloque de ejemplos.
+    `classes` debe ser siempre la lista completa de intenciones (labels.json).
+    """
+    X = pipeline.named_steps["hash"].transform(textos)
+    pipeline.named_steps["sgd"].partial_fit(X, etiquetas, classes=classes)
+    return pipeline
@@ -0,0 +1,164 @@
+# ml/registry.py
+# Uso (desde la carpeta chatbot/):
+#   python -m ml.registry list
+#   python -m ml.registry publish ml/models/intent_mlp.joblib --labels ml/models/labels.json
+#   python -m ml.registry promote <version>
+"""
+Registro de modelos versionados.
+
+    ml/registry/
+      CURRENT                 <- versión que debe servir el backend
+      <version>/
+        model.joblib
+        labels.json           <- las etiquetas con que se entrenó
+        meta.json             <- hash, fecha y metadata del entrenamiento
+
+La versión es el prefijo del sha256 del .joblib, así que publicar dos veces
+el mismo artefacto no duplica nada. CURRENT se escribe con os.replace para
+que el servidor nunca lea un puntero a medio escribir.
+
+Este módulo no importa Django ni sklearn: lo usan tanto los scripts de
+entrenamiento como core/nlp.py.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+REGISTRY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "registry")
+CURRENT_FILE = "CURRENT"
+MODEL_FILE = "model.joblib"
+LABELS_FILE = "labels.json"
+META_FILE = "meta.json"
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _write_atomic(path: str, text: str):
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def version_dir(version: str, registry_dir: str = REGISTRY_DIR) -> str:
+    return os.path.join(registry_dir, version)
+
+
+def model_path(version: str, registry_dir: str = REGISTRY_DIR) -> str:
+    return os.path.join(version_dir(version, registry_dir), MODEL_FILE)
+
+
+def current_version(registry_dir: str = REGISTRY_DIR):
+    """
+    Versión apuntada por CURRENT, o None si el registro está vacío.
+    """
+    try:
+        with open(os.path.join(registry_dir, CURRENT_FILE), "r", encoding="utf-8") as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return version or None
+
+
+def read_meta(version: str, registry_dir: str = REGISTRY_DIR) -> dict:
+    with open(os.path.join(version_dir(version, registry_dir), META_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_versions(registry_dir: str = REGISTRY_DIR):
+    """
+    Metadata de todas las versiones, de la más nueva a la más vieja.
+    """
+    if not os.path.isdir(registry_dir):
+        return []
+    metas = []
+    for name in os.listdir(registry_dir):
+        if os.path.isfile(os.path.join(registry_dir, name, META_FILE)):
+            metas.append(read_meta(name, registry_dir))
+    metas.sort(key=lambda m: m.get("created_at", ""), reverse=True)
+    return metas
+
+
+def set_current(version: str, registry_dir: str = REGISTRY_DIR):
+    if not os.path.isfile(model_path(version, registry_dir)):
+        raise FileNotFoundError(f"No existe la versión {version} en {registry_dir}")
+    _write_atomic(os.path.join(registry_dir, CURRENT_FILE), version + "\n")
+
+
+def publish(model_file: str, labels, metadata: dict | None = None,
+            registry_dir: str = REGISTRY_DIR, make_current: bool = True) -> str:
+    """
+    Copia el artefacto al registro y devuelve su versión.
+    `labels` es la lista de intenciones con que se entrenó el modelo.
+    """
+    sha = _sha256(model_file)
+    version = sha[:12]
+    destino = version_dir(version, registry_dir)
+
+    if not os.path.isfile(os.path.join(destino, META_FILE)):
+        tmp_dir = f"{destino}.tmp{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        shutil.copyfile(model_file, os.path.join(tmp_dir, MODEL_FILE))
+        with open(os.path.join(tmp_dir, LABELS_FILE), "w", encoding="utf-8") as f:
+            json.dump(sorted(labels), f, ensure_ascii=False, indent=2)
+        meta = {
+            "version": version,
+            "sha256": sha,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "size_bytes": os.path.getsize(model_file),
+            "metadata": metadata or {},
+        }
+        with open(os.path.join(tmp_dir, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.makedirs(registry_dir, exist_ok=True)
+        os.replace(tmp_dir, destino)
+
+    if make_current:
+        set_current(version, registry_dir)
+    return version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Registro de modelos de intención")
+    parser.add_argument("--registry", default=REGISTRY_DIR)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    sub.add_parser("list", help="Lista las versiones publicadas")
+
+    p_pub = sub.add_parser("publish", help="Publica un .joblib existente")
+    p_pub.add_argument("model")
+    p_pub.add_argument("--labels", required=True, help="labels.json con que se entrenó")
+    p_pub.add_argument("--no-current", action="store_true", help="No mover CURRENT")
+
+    p_prom = sub.add_parser("promote", help="Apunta CURRENT a una versión (sirve para rollback)")
+    p_prom.add_argument("version")
+
+    args = parser.parse_args(argv)
+    if args.cmd == "list":
+        actual = current_version(args.registry)
+        for m in list_versions(args.registry):
+            marca = "*" if m["version"] == actual else " "
+            print(f"{marca} {m['version']}  {m['created_at']}  {m.get('metadata', {})}")
+    elif args.cmd == "publish":
+        with open(args.labels, "r", encoding="utf-8") as f:
+            labels = json.load(f)
+        version = publish(args.model, labels, {"origen": os.path.basename(args.model)},
+                          registry_dir=args.registry, make_current=not args.no_current)
+        print(f" Publicado {version}")
+    elif args.cmd == "promote":
+        set_current(args.version, args.registry)
+        print(f" CURRENT -> {args.version}")
+
+
+if __name__ == "__main__":
+    main()
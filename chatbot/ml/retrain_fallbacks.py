@@ -0,0 +1,274 @@
+# ml/retrain_fallbacks.py
+# Uso (desde la carpeta chatbot/):
+#   python -m ml.retrain_fallbacks init
+#   python -m ml.retrain_fallbacks export --out ml/data/fallbacks_por_revisar.csv
+#   python -m ml.retrain_fallbacks update --reviewed ml/data/fallbacks_revisados.csv
+"""
+Reentrenamiento incremental a partir de fallback_queries.jsonl.
+
+Flujo:
+1) `init`   arma el modelo hashing + SGD con el corpus base (una sola vez).
+2) `export` lee el log de fallbacks línea por línea, deduplica por texto
+            normalizado y escribe un CSV con la columna `intent` vacía para
+            que alguien la revise.
+3) `update` lee el CSV revisado y aplica partial_fit SOLO con las filas que
+            no se habían aplicado antes. El costo depende de lo nuevo, no de
+            todo el historial.
+"""
+import argparse
+import csv
+import glob
+import gzip
+import hashlib
+import json
+import os
+import random
+from itertools import islice
+
+from joblib import dump, load
+
+from ml import registry
+from ml.corpus import load_corpus
+from ml.incremental import build_incremental_pipeline, partial_fit
+from ml.text import normalize
+
+DEFAULT_LOG_PATH = "fallback_queries.jsonl"
+DEFAULT_MODEL_PATH = os.path.join("ml", "models", "intent_sgd.joblib")
+LABELS_PATH = os.path.join("ml", "models", "labels.json")
+
+# Etiquetas que el revisor puede usar para descartar una consulta
+IGNORED_LABELS = {"", "desconocido", "ignorar"}
+
+
+def _key(texto_norm: str) -> str:
+    # 16 hex alcanzan para deduplicar y ocupan poco en el archivo de estado
+    return hashlib.blake2b(texto_norm.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _load_labels(path: str = LABELS_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return sorted(json.load(f))
+
+
+def _state_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + ".state.json"
+
+
+def _load_state(model_path: str) -> set:
+    p = _state_path(model_path)
+    if not os.path.exists(p):
+        return set()
+    with open(p, "r", encoding="utf-8") as f:
+        return set(json.load(f).get("aplicados", []))
+
+
+def _save_atomic(model_path: str, pipeline, aplicados: set):
+    tmp = model_path + ".tmp"
+    dump(pipeline, tmp)
+    os.replace(tmp, model_path)
+    tmp_state = _state_path(model_path) + ".tmp"
+    with open(tmp_state, "w", encoding="utf-8") as f:
+        json.dump({"aplicados": sorted(aplicados)}, f)
+    os.replace(tmp_state, _state_path(model_path))
+
+
+def log_files(log_path: str, include_rotated: bool = True):
+    """
+    El log actual más los rotados por core/fallback_log.py
+    (fallback_queries.<fecha>.jsonl[.gz]), del más viejo al más nuevo.
+    """
+    archivos = []
+    if include_rotated:
+        base, ext = os.path.splitext(log_path)
+        rotados = glob.glob(f"{glob.escape(base)}.*{ext}") + glob.glob(f"{glob.escape(base)}.*{ext}.gz")
+        archivos = sorted(rotados, key=os.path.getmtime)
+    if os.path.exists(log_path):
+        archivos.append(log_path)
+    return archivos
+
+
+def iter_fallbacks(log_path: str):
+    """
+    Recorre el log (plano o .gz) sin cargarlo entero. Ignora líneas corruptas
+    (p. ej. una escritura cortada a la mitad).
+    """
+    opener = gzip.open if log_path.endswith(".gz") else open
+    with opener(log_path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            query = entry.get("query")
+            if query:
+                yield entry
+
+
+def iter_unique_fallbacks(log_path: str):
+    """
+    Deduplica por texto normalizado. Solo guarda en memoria un registro por
+    consulta distinta (no todo el log).
+    """
+    vistos = {}
+    for entry in iter_fallbacks(log_path):
+        texto_norm = normalize(entry["query"])
+        if not texto_norm:
+            continue
+        k = _key(texto_norm)
+        row = vistos.get(k)
+        if row is None:
+            vistos[k] = {
+                "query": entry["query"],
+                "normalized": texto_norm,
+                "predicted_intent": entry.get("intent") or "",
+                "confidence": entry.get("confidence") or 0.0,
+                "count": 1,
+            }
+        else:
+            row["count"] += 1
+    return vistos
+
+
+def iter_reviewed(csv_path: str, classes):
+    """
+    Lee el CSV revisado (columnas `query` e `intent`) fila por fila y
+    devuelve (clave, query, intent) solo para etiquetas válidas.
+    """
+    classes = set(classes)
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            intent = (row.get("intent") or "").strip()
+            query = (row.get("query") or "").strip()
+            if not query or intent in IGNORED_LABELS:
+                continue
+            if intent not in classes:
+                print(f"⚠️ Intención desconocida '{intent}' para: {query!r} (se omite)")
+                continue
+            yield _key(normalize(query)), query, intent
+
+
+def _chunks(it, size: int):
+    it = iter(it)
+    while True:
+        bloque = list(islice(it, size))
+        if not bloque:
+            return
+        yield bloque
+
+
+def cmd_init(args):
+    X, y = load_corpus()
+    classes = _load_labels()
+    pipeline = build_incremental_pipeline()
+    datos = list(zip(X, y))
+    rng = random.Random(42)
+    for _ in range(args.epochs):
+        rng.shuffle(datos)
+        for bloque in _chunks(datos, args.chunk_size):
+            textos, etiquetas = zip(*bloque)
+            partial_fit(pipeline, list(textos), list(etiquetas), classes)
+
+    os.makedirs(os.path.dirname(args.model), exist_ok=True)
+    _save_atomic(args.model, pipeline, set())
+    print(f" Modelo incremental inicial guardado en {args.model}")
+
+
+def cmd_export(args):
+    ya_revisados = set()
+    if args.reviewed and os.path.exists(args.reviewed):
+        with open(args.reviewed, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                if row.get("query"):
+                    ya_revisados.add(_key(normalize(row["query"])))
+
+    vistos = iter_unique_fallbacks(args.log)
+    nuevos = [row for k, row in vistos.items() if k not in ya_revisados]
+    nuevos.sort(key=lambda r: r["count"], reverse=True)
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8", newline="") as f:
+        fields = ["query", "normalized", "predicted_intent", "confidence", "count", "intent"]
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for row in nuevos:
+            writer.writerow({**row, "intent": ""})
+    print(f" {len(nuevos)} consultas únicas para revisar en {args.out} "
+          f"({len(vistos)} distintas en el log)")
+
+
+def cmd_update(args):
+    if not os.path.exists(args.model):
+        raise SystemExit(f"No existe {args.model}. Corre primero: python -m ml.retrain_fallbacks init")
+
+    classes = _load_labels()
+    pipeline = load(args.model)
+    aplicados = _load_state(args.model)
+
+    base = []
+    if args.replay:
+        # Repaso: mezclamos ejemplos del corpus base para no "olvidar" lo aprendido
+        X, y = load_corpus()
+        base = list(zip(X, y))
+    rng = random.Random(42)
+
+    nuevos = 0
+    pendientes = (r for r in iter_reviewed(args.reviewed, classes) if r[0] not in aplicados)
+    for bloque in _chunks(pendientes, args.chunk_size):
+        claves = {k for k, _, _ in bloque}
+        textos = [q for _, q, _ in bloque]
+        etiquetas = [i for _, _, i in bloque]
+        if base:
+            repaso = rng.sample(base, min(args.replay, len(base)))
+            textos += [t for t, _ in repaso]
+            etiquetas += [e for _, e in repaso]
+        for _ in range(args.epochs):
+            partial_fit(pipeline, textos, etiquetas, classes)
+        aplicados |= claves
+        nuevos += len(claves)
+
+    if not nuevos:
+        print(" No hay filas nuevas en el CSV revisado; el modelo no cambia.")
+        return
+    _save_atomic(args.model, pipeline, aplicados)
+    print(f" {nuevos} consultas nuevas aplicadas. Modelo guardado en {args.model}")
+
+    if args.publish:
+        version = registry.publish(args.model, classes, {
+            "tipo": "incremental",
+            "aplicados": len(aplicados),
+            "reviewed": os.path.basename(args.reviewed),
+        })
+        print(f" Publicado en el registro como {version} (CURRENT)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reentrenamiento incremental desde el log de fallbacks")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--epochs", type=int, default=5)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    sub.add_parser("init", help="Entrena el modelo incremental con el corpus base")
+
+    p_export = sub.add_parser("export", help="Genera el CSV de consultas únicas para revisar")
+    p_export.add_argument("--log", default=DEFAULT_LOG_PATH)
+    p_export.add_argument("--out", default=os.path.join("ml", "data", "fallbacks_por_revisar.csv"))
+    p_export.add_argument("--reviewed", default=os.path.join("ml", "data", "fallbacks_revisados.csv"),
+                          help="Consultas ya revisadas que no hace falta volver a exportar")
+
+    p_update = sub.add_parser("update", help="Aplica partial_fit con el CSV revisado")
+    p_update.add_argument("--reviewed", default=os.path.join("ml", "data", "fallbacks_revisados.csv"))
+    p_update.add_argument("--replay", type=int, default=200,
+                          help="Ejemplos del corpus base que se mezclan en cada bloque (0 = ninguno)")
+    p_update.add_argument("--publish", action="store_true",
+                          help="Publicar el modelo actualizado en ml/registry y moverle CURRENT")
+
+    args = parser.parse_args(argv)
+    {"init": cmd_init, "export": cmd_export, "update": cmd_update}[args.cmd](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# ml/text.py
+"""
+Normalización de texto compartida por el entrenamiento y los scripts de
+reentrenamiento. Debe ser la MISMA en todos lados para que los n-gramas
+que ve el modelo coincidan.
+"""
+import re, unicodedata
+
+COMMON_TYPO_MAP = {
+    # HORARIO
+    "horaro": "horario",
+    "orario": "horario",
+    "horarrio": "horario",
+    "orarrio": "horario",
+    "horrario": "horario",
+    "horraio": "horario",
+
+    # BECA
+    "vaca": "beca",        # error común con b/v
+    "becas": "becas",
+    "veca": "beca",
+    "beaca": "beca",
+    "bekca": "beca",
+
+    # MONOGRAFIA
+    "monogafia": "monografia",
+    "monografiaa": "monografia",
+    "monogrfia": "monografia",
+    "monografhia": "monografia",
+    "monograffia": "monografia",
+
+    # TITULO
+    "tituo": "titulo",
+    "tituulo": "titulo",
+    "tiltulo": "titulo",
+    "titlo": "titulo",
+    "titluo": "titulo",
+
+    # BAJA
+    "vaja": "baja",
+    "bja": "baja",
+    "bajja": "baja",
+    "bajah": "baja",
+
+    # CARNET
+    "carnet": "carnet",
+    "carne": "carnet",
+    "carnett": "carnet",
+    "carné": "carnet",
+    "carnettte": "carnet",
+
+    # GENERAL / OTROS ERRORES COMUNES
+    "aplicar beca": "aplicar_beca",
+    "solicitar beca": "aplicar_beca",
+    "detalle beca": "detalle_beca",
+    "estado beca": "estado_beca",
+    "recibo beca": "donde_recibo_beca",
+    "horarios estudiante": "horario_estudiante",
+    "monografía": "monografia",
+}
+
+
+# \bword\b para evitar reemplazar dentro de otras palabras. Se compilan una
+# vez y se aplican en el mismo orden del mapa (algunas correcciones encadenan).
+_TYPO_PATTERNS = [
+    (re.compile(r"\b" + re.escape(wrong) + r"\b"), right)
+    for wrong, right in COMMON_TYPO_MAP.items()
+]
+
+
+def fix_common_typos(s: str) -> str:
+    """
+    Reemplaza palabras clave mal escritas por su forma correcta.
+    Trabaja a nivel de palabra completa (usando \b).
+    """
+    for pattern, right in _TYPO_PATTERNS:
+        s = pattern.sub(right, s)
+    return s
+
+def normalize(s: str) -> str:
+    if not s:
+        return ""
+    s = s.replace("\u00A0", " ")  # NBSP -> espacio normal
+    s = s.lower()
+    s = "".join(
+        c for c in unicodedata.normalize("NFD", s)
+        if unicodedata.category(c) != "Mn"
+    )  # sin acentos
+    s = re.sub(r"[¿?¡!.,;:]", " ", s)  # quita puntuación básica
+    s = re.sub(r"\s+", " ", s).strip()
+    # 👇 muy importante: corregir errores TÍPICOS de tu dominio
+    s = fix_common_typos(s)
+    return s